@@ -1,9 +1,10 @@
 import sqlite3
 from typing import List,Tuple, Any
-from db_utils import db_cursor, fetch_id_mapping
+from db_utils import db_cursor, fetch_id_mapping, run_with_retry
 from logger import get_logger
-from topic_priority import TopicPriority
-from frequency_weights import FrequencyWeights
+from weight_registry import get_weight_registry
+from catalog_snapshot import bump_catalog_version
+from similarity import refresh_similar
 
 logger = get_logger(__name__, 'add_problems.log')
 
@@ -22,9 +23,10 @@ def associate_entries(
 
 def compute_priority(topic: str, frequency: str) -> int:
     """Compute final priority based on topic and frequency weights."""
-    base_priority = TopicPriority.get_priority(topic)
-    freq_weight = FrequencyWeights.get_weight(frequency)
-    computed_priority = max(1, base_priority // freq_weight)
+    registry = get_weight_registry()
+    base_priority = registry.topic_priority(topic)
+    freq_weight = registry.frequency_weight(frequency)
+    computed_priority = max(1, base_priority // max(1, freq_weight))
     logger.debug(f"Computed priority for topic '{topic}' with frequency '{frequency}': {computed_priority}")
     return computed_priority
 
@@ -86,11 +88,18 @@ def insert_problems(cursor: sqlite3.Cursor, problems: List[Tuple[Any, ...]]) ->
     logger.info(f"Inserted {cursor.rowcount} problems into the Problems table.")
 
 def add_problems(problems: List[Tuple], db_path: str = 'leetcode_mastery.db') -> None:
-    """Add a list of problems to the database with improved prerequisite handling."""
-    with db_cursor(db_path) as cursor:
+    """
+    Add a list of problems to the database with improved prerequisite handling.
+    The insert runs as one write transaction, retried if another process holds the lock.
+    """
+    run_with_retry(lambda: _insert_all(problems, db_path), 'add_problems')
+
+def _insert_all(problems: List[Tuple], db_path: str) -> None:
+    with db_cursor(db_path, immediate=True) as cursor:
         # Pre-fetch mappings
         topic_mapping = fetch_id_mapping(cursor, 'Topics', 'name')
         pattern_mapping = fetch_id_mapping(cursor, 'Patterns', 'name')
+        get_weight_registry().load_overrides(cursor.connection)
 
         problems_to_insert = []
         problem_patterns_entries = []
@@ -130,6 +139,12 @@ def add_problems(problems: List[Tuple], db_path: str = 'leetcode_mastery.db') ->
 
         # Resolve prerequisites after all problems have been inserted
         resolve_prerequisites(cursor, problems)
+        bump_catalog_version(cursor)
+
+        # New problems, and the prerequisites they now depend on, have new features.
+        changed_ids = {entry[0] for entry in problems_to_insert}
+        changed_ids.update(pid for problem in problems if len(problem) == 8 for pid in (problem[7] or ()))
+        refresh_similar(cursor.connection, changed_ids)
 
         logger.info(f"Successfully added {len(problems_to_insert)} problems to the database.")
 
@@ -0,0 +1,249 @@
+import configparser
+import datetime
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import time
+from typing import List, NamedTuple, Optional
+
+import profiler
+from logger import get_logger
+
+logger = get_logger(__name__, 'backup.log')
+
+SNAPSHOT_SUFFIX = '.db'
+COMPRESSED_SUFFIX = '.gz'
+_TIMESTAMP_FORMAT = '%Y%m%d-%H%M%S'
+
+
+class BackupSettings(NamedTuple):
+    """
+    Settings from the [Backup] section of config.ini.
+
+    pages_per_step and sleep_ms pace the copy: the source is only read-locked while a step runs,
+    so a concurrent `today` session can write between steps.
+    """
+    directory: str = 'backups'
+    pages_per_step: int = 256
+    sleep_ms: int = 50
+    keep: int = 7
+    compress: bool = True
+
+
+class BackupResult(NamedTuple):
+    """
+    Outcome of one backup.
+    """
+    path: str
+    pages: int
+    size_bytes: int
+    seconds: float
+    quick_check: Optional[List[str]]
+    removed: List[str]
+
+
+def load_backup_settings(config_path: str = 'config.ini') -> BackupSettings:
+    """
+    Parameters:
+        config_path (str): Path to the configuration file.
+
+    Returns:
+        BackupSettings: Configured settings, with defaults for missing keys.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    defaults = BackupSettings()
+    return BackupSettings(
+        directory=config.get('Backup', 'directory', fallback=defaults.directory),
+        pages_per_step=config.getint('Backup', 'pages_per_step', fallback=defaults.pages_per_step),
+        sleep_ms=config.getint('Backup', 'sleep_ms', fallback=defaults.sleep_ms),
+        keep=config.getint('Backup', 'keep', fallback=defaults.keep),
+        compress=config.getboolean('Backup', 'compress', fallback=defaults.compress)
+    )
+
+
+def _snapshot_pattern(db_path: str) -> 're.Pattern[str]':
+    stem = re.escape(os.path.splitext(os.path.basename(db_path))[0])
+    return re.compile(rf'^{stem}-(\d{{8}}-\d{{6}})(?:-(\d+))?{re.escape(SNAPSHOT_SUFFIX)}(?:{re.escape(COMPRESSED_SUFFIX)})?$')
+
+
+def snapshot_path(db_path: str, directory: str, when: datetime.datetime, compress: bool) -> str:
+    """
+    Name a new snapshot '<db stem>-YYYYmmdd-HHMMSS.db[.gz]', adding a counter if that name is taken.
+
+    Parameters:
+        db_path (str): Path of the database being backed up.
+        directory (str): Backup directory.
+        when (datetime.datetime): Time of the backup.
+        compress (bool): Whether the snapshot is gzip-compressed.
+
+    Returns:
+        str: Path of the snapshot to write.
+    """
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    suffix = SNAPSHOT_SUFFIX + (COMPRESSED_SUFFIX if compress else '')
+    base = f"{stem}-{when.strftime(_TIMESTAMP_FORMAT)}"
+    path = os.path.join(directory, base + suffix)
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{base}-{counter}{suffix}")
+        counter += 1
+    return path
+
+
+def list_snapshots(db_path: str, directory: str) -> List[str]:
+    """
+    Parameters:
+        db_path (str): Path of the backed-up database.
+        directory (str): Backup directory.
+
+    Returns:
+        List[str]: Snapshot paths of this database, oldest first.
+    """
+    if not os.path.isdir(directory):
+        return []
+    pattern = _snapshot_pattern(db_path)
+    snapshots = []
+    for name in os.listdir(directory):
+        match = pattern.match(name)
+        if match:
+            snapshots.append((match.group(1), int(match.group(2) or 0), name))
+    return [os.path.join(directory, name) for _, _, name in sorted(snapshots)]
+
+
+def rotate(db_path: str, directory: str, keep: int) -> List[str]:
+    """
+    Delete the oldest snapshots so at most keep remain. keep <= 0 keeps everything.
+
+    Returns:
+        List[str]: Paths removed.
+    """
+    if keep <= 0:
+        return []
+    snapshots = list_snapshots(db_path, directory)
+    removed = snapshots[:-keep] if len(snapshots) > keep else []
+    for path in removed:
+        os.remove(path)
+        logger.info(f"Removed old backup '{path}'.")
+    return removed
+
+
+def quick_check(path: str) -> List[str]:
+    """
+    Open a snapshot read-only and run PRAGMA quick_check. Compressed snapshots are expanded to a
+    temporary file next to them first.
+
+    Parameters:
+        path (str): Snapshot path.
+
+    Returns:
+        List[str]: ['ok'] for a sound snapshot, otherwise the problems found.
+    """
+    check_path = path
+    if path.endswith(COMPRESSED_SUFFIX):
+        check_path = f"{path[:-len(COMPRESSED_SUFFIX)]}.{os.getpid()}.check"
+        with gzip.open(path, 'rb') as source, open(check_path, 'wb') as target:
+            shutil.copyfileobj(source, target)
+    try:
+        conn = sqlite3.connect(f"file:{check_path}?mode=ro", uri=True)
+        try:
+            return [row[0] for row in conn.execute('PRAGMA quick_check').fetchall()]
+        finally:
+            conn.close()
+    finally:
+        if check_path != path and os.path.exists(check_path):
+            os.remove(check_path)
+
+
+def _compress(path: str, target: str) -> None:
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(path, 'rb') as source, gzip.open(tmp_path, 'wb', compresslevel=6) as compressed:
+        shutil.copyfileobj(source, compressed, 1024 * 1024)
+    os.replace(tmp_path, target)
+
+
+def backup_database(
+    db_path: str,
+    settings: Optional[BackupSettings] = None,
+    verify: bool = False,
+    now: Optional[datetime.datetime] = None
+) -> BackupResult:
+    """
+    Take a consistent snapshot of a live database with the SQLite online backup API, then
+    optionally compress and verify it and rotate old snapshots.
+
+    The copy runs in steps of settings.pages_per_step pages with settings.sleep_ms between them,
+    so writers are never blocked for more than one step. If another connection writes to the
+    database mid-copy, SQLite restarts the copy from the new state; the snapshot is always of a
+    single committed state.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        settings (Optional[BackupSettings]): Backup settings; defaults to config.ini.
+        verify (bool): Run quick_check on the finished snapshot.
+        now (Optional[datetime.datetime]): Timestamp for the snapshot name; defaults to now.
+
+    Returns:
+        BackupResult: Snapshot path, size, timing, quick_check result and rotated-out files.
+
+    Raises:
+        FileNotFoundError: If the database does not exist.
+        sqlite3.Error: If the copy fails; no partial snapshot is left behind.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database '{db_path}' does not exist.")
+    settings = settings or load_backup_settings()
+    os.makedirs(settings.directory, exist_ok=True)
+    path = snapshot_path(db_path, settings.directory, now or datetime.datetime.now(), settings.compress)
+    copy_path = path[:-len(COMPRESSED_SUFFIX)] if settings.compress else path
+    tmp_path = f"{copy_path}.{os.getpid()}.tmp"
+
+    def progress(status: int, remaining: int, total: int) -> None:
+        logger.debug(f"Backup of '{db_path}': {total - remaining}/{total} pages copied.")
+
+    start = time.perf_counter()
+    source = sqlite3.connect(db_path)
+    try:
+        target = sqlite3.connect(tmp_path)
+        try:
+            with profiler.span('backup.copy'):
+                source.backup(
+                    target, pages=max(1, settings.pages_per_step), progress=progress,
+                    sleep=max(0, settings.sleep_ms) / 1000.0
+                )
+            pages = target.execute('PRAGMA page_count').fetchone()[0]
+            # A snapshot of a WAL database would otherwise need its -wal file to be opened.
+            target.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            target.close()
+    except sqlite3.Error:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        source.close()
+
+    if settings.compress:
+        with profiler.span('backup.compress'):
+            try:
+                _compress(tmp_path, path)
+            finally:
+                os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+    seconds = time.perf_counter() - start
+
+    check: Optional[List[str]] = None
+    if verify:
+        with profiler.span('backup.verify'):
+            check = quick_check(path)
+        if check != ['ok']:
+            logger.error(f"Backup '{path}' failed quick_check: {check[:5]}")
+
+    # A snapshot that failed verification must not push a good one out of the rotation.
+    removed = rotate(db_path, settings.directory, settings.keep) if check in (None, ['ok']) else []
+    size = os.path.getsize(path)
+    logger.info(f"Backed up '{db_path}' to '{path}' ({pages} pages, {size} bytes, {seconds:.2f}s).")
+    return BackupResult(path, pages, size, seconds, check, removed)
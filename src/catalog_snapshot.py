@@ -0,0 +1,302 @@
+import mmap
+import os
+import secrets
+import sqlite3
+import struct
+from bisect import bisect_left
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__, 'catalog_snapshot.log')
+
+SNAPSHOT_SUFFIX = '.catalog'
+MAGIC = b'LCCATv1\x00'
+
+# magic, epoch, version, problems, pattern edges, prerequisite edges, topics, patterns, name bytes
+_HEADER = struct.Struct('<8sqqqqqqqq')
+_INT = 8
+
+CatalogStamp = Tuple[int, int]
+
+
+def create_catalog_meta(cursor: sqlite3.Cursor) -> None:
+    """
+    Create the CatalogMeta table holding the catalog version counter.
+
+    The epoch is random per table creation, so a reset (which drops and recreates the table)
+    never reuses a (epoch, version) stamp of an older snapshot.
+
+    Parameters:
+        cursor (sqlite3.Cursor): Database cursor.
+    """
+    cursor.execute('''CREATE TABLE IF NOT EXISTS CatalogMeta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    )''')
+    cursor.executemany(
+        'INSERT OR IGNORE INTO CatalogMeta (key, value) VALUES (?, ?)',
+        [('catalog_epoch', secrets.randbits(62)), ('catalog_version', 0)]
+    )
+
+
+def bump_catalog_version(cursor: sqlite3.Cursor) -> None:
+    """
+    Mark the catalog (Problems, Topics, Patterns and their link tables) as modified.
+
+    Parameters:
+        cursor (sqlite3.Cursor): Database cursor inside the modifying transaction.
+    """
+    cursor.execute("UPDATE CatalogMeta SET value = value + 1 WHERE key = 'catalog_version'")
+    logger.debug("Catalog version bumped.")
+
+
+def read_catalog_stamp(conn: sqlite3.Connection) -> Optional[CatalogStamp]:
+    """
+    Read the (epoch, version) stamp of the catalog.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        Optional[CatalogStamp]: The stamp, or None if the database predates CatalogMeta.
+    """
+    try:
+        row = conn.execute('''
+            SELECT MAX(CASE WHEN key = 'catalog_epoch' THEN value END),
+                   MAX(CASE WHEN key = 'catalog_version' THEN value END)
+            FROM CatalogMeta
+        ''').fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None or row[0] is None or row[1] is None:
+        return None
+    return (row[0], row[1])
+
+
+class CsrIndex:
+    """
+    Read-only mapping of problem_id to a run of integers, stored as sorted keys plus CSR
+    offsets and values. Lookups return zero-copy slices of the underlying buffer.
+    """
+    __slots__ = ('keys', 'offsets', 'values')
+
+    def __init__(self, keys: Sequence[int], offsets: Sequence[int], values: Sequence[int]):
+        self.keys = keys
+        self.offsets = offsets
+        self.values = values
+
+    def get(self, key: int, default: Any = ()) -> Any:
+        pos = bisect_left(self.keys, key)
+        if pos == len(self.keys) or self.keys[pos] != key:
+            return default
+        start, end = self.offsets[pos], self.offsets[pos + 1]
+        if start == end:
+            return default
+        return self.values[start:end]
+
+    def items(self) -> Iterator[Tuple[int, List[int]]]:
+        offsets, values = self.offsets, self.values
+        for pos, key in enumerate(self.keys):
+            if offsets[pos] != offsets[pos + 1]:
+                yield key, list(values[offsets[pos]:offsets[pos + 1]])
+
+
+class CatalogSnapshot:
+    """
+    The static catalog (problem IDs, topics, patterns and problem links) laid out in one flat
+    binary buffer. Integer sections are exposed as memoryviews cast to int64, so a snapshot
+    loaded from a memory-mapped file is never copied into Python lists.
+    """
+
+    def __init__(self, buffer: Any, source: Optional[mmap.mmap] = None):
+        """
+        Parse a snapshot buffer.
+
+        Parameters:
+            buffer (Any): Bytes-like object produced by serialize_catalog.
+            source (Optional[mmap.mmap]): The mapping backing buffer, closed by close().
+
+        Raises:
+            ValueError: If the buffer is not a valid snapshot.
+        """
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Catalog snapshot is truncated.")
+        (magic, epoch, version, n_problems, n_pattern_edges, n_prereq_edges,
+         n_topics, n_patterns, n_name_bytes) = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC:
+            raise ValueError("Not a catalog snapshot.")
+
+        self.stamp: CatalogStamp = (epoch, version)
+        self._source = source
+        view = memoryview(buffer)
+        offset = _HEADER.size
+
+        def section(count: int) -> memoryview:
+            nonlocal offset
+            part = view[offset:offset + count * _INT].cast('q')
+            offset += count * _INT
+            return part
+
+        self.problem_ids = section(n_problems)
+        self.patterns = CsrIndex(self.problem_ids, section(n_problems + 1), section(n_pattern_edges))
+        self.prerequisites = CsrIndex(self.problem_ids, section(n_problems + 1), section(n_prereq_edges))
+        topic_ids = section(n_topics)
+        topic_offsets = section(n_topics + 1)
+        pattern_ids = section(n_patterns)
+        pattern_offsets = section(n_patterns + 1)
+        names = view[offset:offset + n_name_bytes]
+        if offset + n_name_bytes > len(buffer):
+            raise ValueError("Catalog snapshot is truncated.")
+
+        self.topics: List[Tuple[int, str]] = [
+            (topic_ids[i], str(names[topic_offsets[i]:topic_offsets[i + 1]], 'utf-8')) for i in range(n_topics)
+        ]
+        base = topic_offsets[n_topics] if n_topics else 0
+        self.pattern_list: List[Tuple[int, str]] = [
+            (pattern_ids[i], str(names[base + pattern_offsets[i]:base + pattern_offsets[i + 1]], 'utf-8'))
+            for i in range(n_patterns)
+        ]
+
+    def close(self) -> None:
+        """
+        Release the memory mapping, if any. Views handed out earlier must no longer be used.
+        """
+        if self._source is not None:
+            try:
+                self._source.close()
+            except BufferError:
+                # Views are still referenced; the mapping is released when they are collected.
+                pass
+            self._source = None
+
+
+def _csr(problem_ids: List[int], edges: List[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+    grouped: Dict[int, List[int]] = {}
+    for problem_id, value in edges:
+        grouped.setdefault(problem_id, []).append(value)
+    offsets, values = [0], []
+    for problem_id in problem_ids:
+        values.extend(grouped.get(problem_id, ()))
+        offsets.append(len(values))
+    return offsets, values
+
+
+def serialize_catalog(conn: sqlite3.Connection, stamp: CatalogStamp) -> bytes:
+    """
+    Query the catalog tables and encode them as a snapshot.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+        stamp (CatalogStamp): Catalog stamp the data belongs to.
+
+    Returns:
+        bytes: The encoded snapshot.
+    """
+    problem_ids = [row[0] for row in conn.execute('SELECT id FROM Problems ORDER BY id').fetchall()]
+    named = conn.execute('''
+        SELECT 'topic', topic_id, name FROM Topics
+        UNION ALL
+        SELECT 'pattern', pattern_id, name FROM Patterns
+    ''').fetchall()
+    pattern_edges = [tuple(row) for row in conn.execute('SELECT problem_id, pattern_id FROM ProblemPatterns').fetchall()]
+    prereq_edges = [tuple(row) for row in conn.execute('SELECT problem_id, prerequisite_id FROM ProblemPrerequisites').fetchall()]
+
+    pattern_offsets, pattern_values = _csr(problem_ids, pattern_edges)
+    prereq_offsets, prereq_values = _csr(problem_ids, prereq_edges)
+
+    def encode_names(kind: str) -> Tuple[List[int], List[int], bytes]:
+        ids, offsets, blob = [], [0], bytearray()
+        for row_kind, row_id, name in named:
+            if row_kind == kind:
+                ids.append(row_id)
+                blob += name.encode('utf-8')
+                offsets.append(len(blob))
+        return ids, offsets, bytes(blob)
+
+    topic_ids, topic_offsets, topic_blob = encode_names('topic')
+    pattern_ids, pattern_name_offsets, pattern_blob = encode_names('pattern')
+
+    def pack(values: List[int]) -> bytes:
+        return struct.pack(f'<{len(values)}q', *values)
+
+    return b''.join([
+        _HEADER.pack(
+            MAGIC, stamp[0], stamp[1], len(problem_ids), len(pattern_values), len(prereq_values),
+            len(topic_ids), len(pattern_ids), len(topic_blob) + len(pattern_blob)
+        ),
+        pack(problem_ids), pack(pattern_offsets), pack(pattern_values),
+        pack(prereq_offsets), pack(prereq_values),
+        pack(topic_ids), pack(topic_offsets), pack(pattern_ids), pack(pattern_name_offsets),
+        topic_blob, pattern_blob
+    ])
+
+
+def snapshot_path(db_path: str) -> Optional[str]:
+    """
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        Optional[str]: Snapshot path next to the database, or None for in-memory databases.
+    """
+    if not db_path or db_path == ':memory:' or db_path.startswith('file:'):
+        return None
+    return db_path + SNAPSHOT_SUFFIX
+
+
+def _map_file(path: str, stamp: CatalogStamp) -> Optional[CatalogSnapshot]:
+    try:
+        with open(path, 'rb') as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        snapshot = CatalogSnapshot(mapped, source=mapped)
+    except ValueError as e:
+        logger.warning(f"Ignoring invalid catalog snapshot '{path}': {e}")
+        mapped.close()
+        return None
+    if snapshot.stamp != stamp:
+        snapshot.close()
+        return None
+    return snapshot
+
+
+def load_catalog(conn: sqlite3.Connection, db_path: str, stamp: Optional[CatalogStamp] = None) -> CatalogSnapshot:
+    """
+    Return the catalog snapshot for a database, memory-mapping the snapshot file if it matches
+    the current catalog stamp and rewriting it otherwise.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+        db_path (str): Path to the SQLite database file.
+        stamp (Optional[CatalogStamp]): Stamp already read by the caller; read from conn if None.
+
+    Returns:
+        CatalogSnapshot: The catalog snapshot.
+    """
+    if stamp is None:
+        stamp = read_catalog_stamp(conn)
+    path = snapshot_path(db_path)
+    if stamp is not None and path is not None:
+        snapshot = _map_file(path, stamp)
+        if snapshot is not None:
+            logger.debug(f"Mapped catalog snapshot '{path}' at version {stamp[1]}.")
+            return snapshot
+
+    data = serialize_catalog(conn, stamp or (0, -1))
+    if stamp is None or path is None:
+        return CatalogSnapshot(data)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as handle:
+            handle.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write catalog snapshot '{path}': {e}")
+        return CatalogSnapshot(data)
+
+    logger.info(f"Wrote catalog snapshot '{path}' at version {stamp[1]}.")
+    return _map_file(path, stamp) or CatalogSnapshot(data)
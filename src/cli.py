@@ -8,24 +8,70 @@ import webbrowser
 from prettytable import PrettyTable
 import logging
 from contextlib import contextmanager
-from typing import Generator, Optional, List
+from typing import Any, Dict, Generator, Optional, List, Tuple
 
-from scheduler import ProblemScheduler
-from models import Problem
+from scheduler import ProblemScheduler, as_date
+from models import ProblemRow
+from load_leveling import DayLoad, fetch_load, fetch_overdue, utilization
 from prerequisite_map import PREREQUISITE_MAP
-from topic_priority import TopicPriority
-from list_problems_by_topic import get_problems_by_topic
+from list_problems_by_topic import PROBLEM_LIST_ORDER, PROBLEM_LIST_QUERY, get_problems_by_topic
 from utils import prompt_positive_int
+from db_utils import db_cursor, enable_mirror, reload_mirror, run_with_retry, sync_mirror
+import profiler
+import result_cache
+import sql_trace
+from sql_trace import query_budget
 from logger import get_logger
 
 DIFFICULTY_ORDER = {'Easy': 1, 'Medium': 2, 'Hard': 3}
 
 logger = get_logger(__name__, 'cli.log')
 
+# Scheduler shared by the commands of a `shell` session; None outside the shell.
+_shell_scheduler: Optional[ProblemScheduler] = None
+
+
+def get_scheduler(current_date: Optional[datetime.date] = None) -> ProblemScheduler:
+    """
+    The scheduler a command runs with: inside `shell`, the session's scheduler (its caches and
+    connection stay warm between commands) moved to current_date; otherwise a new one.
+
+    Parameters:
+        current_date (Optional[datetime.date]): Simulated current date; today if None.
+
+    Returns:
+        ProblemScheduler: Scheduler for the command.
+    """
+    if _shell_scheduler is None:
+        return ProblemScheduler(current_date=current_date)
+    _shell_scheduler.current_date = as_date(current_date)
+    return _shell_scheduler
+
 @click.group()
-def cli():
+@click.option('--profile', is_flag=True, default=False, help='Print a per-stage timing breakdown when the command finishes.')
+@click.option('--profile-trace', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Also write the timings as Chrome trace-event JSON to this file (implies --profile).')
+@click.option('--sql-trace', 'sql_trace_flag', is_flag=True, default=False, help='Print every SQL statement shape with counts, time and rows when the command finishes.')
+@click.option('--sql-budget', type=click.Choice(sql_trace.BUDGET_MODES, case_sensitive=False), default=None,
+              help=f'How per-command query budgets are enforced (default: ${sql_trace.BUDGET_ENV_VAR} or off).')
+@click.option('--no-cache', is_flag=True, default=False, help='Recompute results instead of reusing cached results of read-only commands.')
+@click.option('--mirror/--no-mirror', default=None,
+              help='Load the database into memory once and run read queries against the copy (default: [Database] mirror).')
+@click.pass_context
+def cli(ctx: click.Context, profile: bool, profile_trace: Optional[str], sql_trace_flag: bool, sql_budget: Optional[str], no_cache: bool, mirror: Optional[bool]):
     """Advanced LeetCode Mastery CLI"""
-    pass
+    if no_cache:
+        result_cache.disable()
+    if mirror is not None:
+        enable_mirror(mirror)
+    if profile or profile_trace:
+        profiler.enable()
+        ctx.call_on_close(lambda: profiler.finish(profile_trace))
+    if sql_budget:
+        sql_trace.set_budget_mode(sql_budget.lower())
+    if sql_trace_flag:
+        sql_trace.enable()
+        ctx.call_on_close(sql_trace.finish)
 
 
 @cli.command()
@@ -49,6 +95,151 @@ def reset() -> None:
     else:
         click.echo("Reset action canceled.")
 
+@cli.group()
+def db():
+    """Database maintenance commands."""
+    pass
+
+@db.command(name='tune')
+@click.option('--apply', 'apply_changes', is_flag=True, default=False, help='Apply persistent recommendations (page_size, auto_vacuum, journal_mode).')
+@click.option('--no-vacuum', is_flag=True, default=False, help='Skip reclaiming free pages.')
+@click.option('--runs', type=int, default=5, help='Repetitions per hot query timing.')
+def tune_db(apply_changes: bool, no_vacuum: bool, runs: int) -> None:
+    """
+    Gather planner statistics, reclaim space, check integrity and recommend pragma settings,
+    timing the hot queries before and after.
+
+    Usage Examples:
+        db tune
+        db tune --apply
+        db tune --no-vacuum --runs 10
+    """
+    try:
+        import db_maintenance
+        db_path = get_scheduler().db_path
+        report = db_maintenance.tune(db_path, apply=apply_changes, vacuum=not no_vacuum, runs=runs)
+        click.echo(db_maintenance.render_report(report))
+        if report.integrity != ['ok'] or report.foreign_key_violations:
+            click.echo("\u26a0\ufe0f Integrity problems found; restore from a backup or run `reset`. Persistent changes were not applied.")
+    except FileNotFoundError as e:
+        click.echo(f"\u26a0\ufe0f {e} Run `reset` or db_init.py first.")
+    except sqlite3.Error as e:
+        logger.error(f"Database error in db tune: {e}")
+        click.echo(f"\u26a0\ufe0f Database error while tuning: {e}")
+    except Exception as e:
+        logger.error(f"Error in db tune command: {e}")
+        click.echo("\u26a0\ufe0f An unexpected error occurred while tuning the database.")
+
+@db.command(name='migrate')
+@click.option('--status', 'status_only', is_flag=True, default=False, help='Only show the schema version and pending migrations.')
+def migrate_db(status_only: bool) -> None:
+    """
+    Apply pending schema migrations. Migrations also run automatically when a database is opened;
+    this command shows what is pending and applies it explicitly.
+
+    Usage Examples:
+        db migrate --status
+        db migrate
+    """
+    try:
+        import migrations
+        db_path = get_scheduler().db_path
+        conn = sqlite3.connect(db_path)
+        try:
+            status = migrations.migration_status(conn)
+            click.echo(f"Schema version {status.current} (latest {status.latest}).")
+            if status_only:
+                for migration in status.pending:
+                    click.echo(f"  pending {migration.version}: {migration.description}")
+                return
+            if not migrations.is_initialized(conn):
+                click.echo("⚠️ Database is not initialized. Run `reset` or db_init.py first.")
+                return
+            applied = migrations.migrate(conn)
+        finally:
+            conn.close()
+        for migration in applied:
+            click.echo(f"  applied {migration.version}: {migration.description}")
+        click.echo("Schema is up to date." if not applied else f"Applied {len(applied)} migration(s).")
+    except sqlite3.Error as e:
+        logger.error(f"Database error in db migrate: {e}")
+        click.echo(f"⚠️ Migration failed: {e}")
+
+@db.command(name='similar')
+def rebuild_similar_db() -> None:
+    """
+    Rebuild the similar-problem index from scratch. It is otherwise kept up to date when problems
+    are added.
+
+    Usage Examples:
+        db similar
+    """
+    try:
+        import similarity
+        with db_cursor(get_scheduler().db_path, immediate=True) as cursor:
+            indexed = similarity.rebuild_similar(cursor.connection)
+        click.echo(f"Indexed similar problems for {indexed} problems.")
+    except sqlite3.Error as e:
+        logger.error(f"Database error in db similar: {e}")
+        click.echo(f"⚠️ Rebuilding the similar-problem index failed: {e}")
+
+@db.command(name='backup')
+@click.option('--dir', 'directory', default=None, help='Backup directory (default: [Backup] directory in config.ini).')
+@click.option('--pages', type=int, default=None, help='Pages copied per step.')
+@click.option('--sleep-ms', type=int, default=None, help='Pause between steps in milliseconds.')
+@click.option('--keep', type=int, default=None, help='Snapshots to keep; older ones are deleted (0 keeps all).')
+@click.option('--compress/--no-compress', default=None, help='Gzip the snapshot.')
+@click.option('--verify', is_flag=True, default=False, help='Run quick_check on the snapshot after writing it.')
+@click.option('--check', 'check_path', type=click.Path(exists=True, dir_okay=False), default=None, help='Only verify an existing snapshot.')
+def backup_db(
+    directory: Optional[str],
+    pages: Optional[int],
+    sleep_ms: Optional[int],
+    keep: Optional[int],
+    compress: Optional[bool],
+    verify: bool,
+    check_path: Optional[str]
+) -> None:
+    """
+    Write a consistent snapshot of the database while it may be in use, using the SQLite online
+    backup API. The copy proceeds in small steps so an active session is not blocked.
+
+    Usage Examples:
+        db backup
+        db backup --verify --keep 14
+        db backup --dir /mnt/backups --no-compress --pages 64 --sleep-ms 100
+        db backup --check backups/leetcode_mastery-20240101-120000.db.gz
+    """
+    try:
+        import backup
+        if check_path:
+            result = backup.quick_check(check_path)
+            if result == ['ok']:
+                click.echo(f"Snapshot '{check_path}' passed quick_check.")
+            else:
+                click.echo(f"⚠️ Snapshot '{check_path}' failed quick_check: {'; '.join(result[:5])}")
+            return
+
+        settings = backup.load_backup_settings()
+        overrides = {
+            'directory': directory, 'pages_per_step': pages, 'sleep_ms': sleep_ms, 'keep': keep, 'compress': compress
+        }
+        settings = settings._replace(**{key: value for key, value in overrides.items() if value is not None})
+        result = backup.backup_database(get_scheduler().db_path, settings, verify=verify)
+        click.echo(f"Backup written to '{result.path}' ({result.pages} pages, {result.size_bytes / 1024:.1f} KiB, {result.seconds:.2f}s).")
+        if result.quick_check is not None:
+            if result.quick_check == ['ok']:
+                click.echo("quick_check: ok")
+            else:
+                click.echo(f"⚠️ quick_check failed: {'; '.join(result.quick_check[:5])}. Older backups were kept.")
+        for path in result.removed:
+            click.echo(f"Removed old backup '{path}'.")
+    except FileNotFoundError as e:
+        click.echo(f"⚠️ {e} Run `reset` or db_init.py first.")
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Error in db backup: {e}")
+        click.echo(f"⚠️ Backup failed: {e}")
+
 @cli.group()
 def problem():
     """Commands related to problem management."""
@@ -105,6 +296,37 @@ def add_problem(
         click.echo(f"⚠️ An error occurred while adding the problem: {e}")
 
 
+@problem.command(name='similar')
+@click.argument('problem_id', type=int)
+@click.option('--limit', type=int, default=5, help='Number of similar problems to show.')
+@click.option('--include-mastered', is_flag=True, default=False, help='Also show problems already mastered.')
+# The precomputed neighbour list (1).
+@query_budget(1, name='problem similar')
+def similar_problems(problem_id: int, limit: int, include_mastered: bool) -> None:
+    """
+    Show the problems most similar to one problem by shared patterns, topic and prerequisites.
+
+    Usage Examples:
+        problem similar 1
+        problem similar 1 --limit 10 --include-mastered
+    """
+    try:
+        import similarity
+        with get_scheduler().get_connection(read_only=True) as conn:
+            similar = similarity.similar_problems(conn, problem_id, limit, exclude_mastered=not include_mastered)
+        if not similar:
+            click.echo(f"No similar problems found for problem {problem_id}.")
+            return
+        table = PrettyTable()
+        table.field_names = ["ID", "Title", "Difficulty", "Topic", "Similarity"]
+        for entry in similar:
+            table.add_row([entry.id, entry.title, entry.difficulty, entry.topic, f"{entry.similarity:.0%}"])
+        click.echo(table)
+    except sqlite3.Error as e:
+        logger.error(f"Database error in problem similar: {e}")
+        click.echo("⚠️ An error occurred while looking up similar problems.")
+
+
 @problem.command(name='list')
 @click.option('--difficulty', type=click.Choice(['Easy', 'Medium', 'Hard'], case_sensitive=False), default=None, help='Filter by difficulty.')
 @click.option('--topic', default=None, help='Filter by topic (supports partial matching).')
@@ -113,6 +335,8 @@ def add_problem(
 @click.option('--per-page', type=int, default=10, help='Number of results per page.')
 @click.option('--verbose', is_flag=True, help='Show detailed output (default).')
 @click.option('--compact', is_flag=True, help='Show compact output with minimal columns.')
+# The pattern filter lookup (1) and the list query (1).
+@query_budget(2, name='problem list')
 def list_problems(difficulty: Optional[str], topic: Optional[str], pattern: Optional[str], page: int, per_page: int, verbose: bool, compact: bool) -> None:
     """
     List problems in the database with enhanced input validation, pagination, and flexible output modes.
@@ -128,22 +352,12 @@ def list_problems(difficulty: Optional[str], topic: Optional[str], pattern: Opti
         list --difficulty medium --compact
     """
     try:
-        scheduler = ProblemScheduler()
-        with scheduler.get_connection() as conn:
+        scheduler = get_scheduler()
+        with scheduler.get_connection(read_only=True) as conn:
             cursor = conn.cursor()
 
             # Base query
-            query = '''
-                SELECT p.id, p.title, p.difficulty, t.name AS topic, 
-                       GROUP_CONCAT(pr.name, ', ') AS patterns, 
-                       p.url, p.priority, p.frequency, 
-                       GROUP_CONCAT(pp2.prerequisite_id, ',') AS prerequisites
-                FROM Problems p
-                JOIN Topics t ON p.topic_id = t.topic_id
-                LEFT JOIN ProblemPatterns pp ON p.id = pp.problem_id
-                LEFT JOIN Patterns pr ON pp.pattern_id = pr.pattern_id
-                LEFT JOIN ProblemPrerequisites pp2 ON p.id = pp2.problem_id
-            '''
+            query = PROBLEM_LIST_QUERY
             conditions = []
             params = []
 
@@ -172,17 +386,7 @@ def list_problems(difficulty: Optional[str], topic: Optional[str], pattern: Opti
             # Build query with filters
             if conditions:
                 query += " WHERE " + " AND ".join(conditions)
-            query += '''
-                GROUP BY p.id
-                ORDER BY p.priority ASC, 
-                         CASE p.difficulty 
-                             WHEN 'Easy' THEN 1 
-                             WHEN 'Medium' THEN 2 
-                             WHEN 'Hard' THEN 3 
-                             ELSE 4 
-                         END ASC, 
-                         t.name ASC
-            '''
+            query += PROBLEM_LIST_ORDER
 
             # Execute query
             cursor.execute(query, params)
@@ -230,11 +434,91 @@ def list_problems(difficulty: Optional[str], topic: Optional[str], pattern: Opti
         click.echo("⚠️ An unexpected error occurred.")
 
 
+@cli.group()
+def weights():
+    """Commands related to scoring weight overrides."""
+    pass
+
+@weights.command(name='list')
+@click.option('--category', type=click.Choice(['topic', 'frequency', 'pattern'], case_sensitive=False), default=None, help='Only show one category.')
+def list_weights(category: Optional[str]) -> None:
+    """
+    List effective topic priorities, frequency weights and pattern weights.
+
+    Usage Examples:
+        weights list
+        weights list --category pattern
+    """
+    try:
+        scheduler = get_scheduler()
+        scheduler.load_weights()
+        table = PrettyTable()
+        table.field_names = ["Category", "Name", "Weight"]
+        for entry_category, name, weight in scheduler.weights.entries():
+            if category is None or entry_category == category.lower():
+                table.add_row([entry_category, name, weight])
+        click.echo(table)
+    except Exception as e:
+        logger.error(f"Error in weights list command: {e}")
+        click.echo("⚠️ An unexpected error occurred while listing weights.")
+
+@weights.command(name='set')
+@click.argument('category', type=click.Choice(['topic', 'frequency', 'pattern'], case_sensitive=False))
+@click.argument('name')
+@click.argument('weight', type=int)
+def set_weight(category: str, name: str, weight: int) -> None:
+    """
+    Override a weight without editing the enums.
+
+    Usage Examples:
+        weights set pattern "Sliding Window" 6
+        weights set topic Graph 3
+    """
+    try:
+        scheduler = get_scheduler()
+        with scheduler.get_connection() as conn:
+            conn.execute('''
+                INSERT INTO Weights (category, name, weight) VALUES (?, ?, ?)
+                ON CONFLICT (category, name) DO UPDATE SET weight = excluded.weight
+            ''', (category.lower(), name, weight))
+        sync_mirror(scheduler.db_path, 'Weights')
+        click.echo(f"Set {category.lower()} weight for '{name}' to {weight}.")
+        logger.info(f"Weight override set: {category.lower()} '{name}' = {weight}")
+    except sqlite3.Error as e:
+        logger.error(f"Database error in weights set: {e}")
+        click.echo("⚠️ An error occurred while saving the weight override.")
+
+@weights.command(name='clear')
+@click.option('--category', type=click.Choice(['topic', 'frequency', 'pattern'], case_sensitive=False), default=None, help='Only clear one category.')
+def clear_weights(category: Optional[str]) -> None:
+    """
+    Remove weight overrides and fall back to the built-in weights.
+
+    Usage Examples:
+        weights clear
+        weights clear --category topic
+    """
+    try:
+        scheduler = get_scheduler()
+        with scheduler.get_connection() as conn:
+            if category:
+                cursor = conn.execute('DELETE FROM Weights WHERE category = ?', (category.lower(),))
+            else:
+                cursor = conn.execute('DELETE FROM Weights')
+        sync_mirror(scheduler.db_path, 'Weights')
+        click.echo(f"Removed {cursor.rowcount} weight override(s).")
+    except sqlite3.Error as e:
+        logger.error(f"Database error in weights clear: {e}")
+        click.echo("⚠️ An error occurred while clearing weight overrides.")
+
+
 @cli.command()
 @click.option('--page', type=int, default=1, help='Page number for paginated results.')
 @click.option('--per-page', type=int, default=10, help='Number of results per page.')
 @click.option('--filter', default=None, help='Filter patterns by name (supports partial matching).')
 @click.option('--export', type=click.Choice(['csv', 'json'], case_sensitive=False), default=None, help='Export results to a file format.')
+# The pattern list (1).
+@query_budget(1, name='list-patterns')
 def list_patterns(page: int, per_page: int, filter: Optional[str], export: Optional[str]) -> None:
     """List all unique patterns available in the database with additional features.
     
@@ -246,8 +530,8 @@ def list_patterns(page: int, per_page: int, filter: Optional[str], export: Optio
         list_patterns --filter string --export json
     """
     try:
-        scheduler = ProblemScheduler()
-        with scheduler.get_connection() as conn:
+        scheduler = get_scheduler()
+        with scheduler.get_connection(read_only=True) as conn:
             cursor = conn.cursor()
 
             # Build query with optional filtering
@@ -310,16 +594,128 @@ def list_patterns(page: int, per_page: int, filter: Optional[str], export: Optio
         click.echo("\u26a0\ufe0f An unexpected error occurred.")
 
 
+def suggest_similar(scheduler: ProblemScheduler, problem_id: int, limit: int = 3) -> None:
+    """
+    Print the unmastered problems most similar to one just attempted.
+
+    Parameters:
+        scheduler (ProblemScheduler): Scheduler of the session.
+        problem_id (int): Problem just attempted.
+        limit (int): Suggestions to show.
+    """
+    import similarity
+    with scheduler.get_connection(read_only=True) as conn:
+        similar = similarity.similar_problems(conn, problem_id, limit)
+    if similar:
+        click.echo("Practice next: " + "; ".join(
+            f"[{entry.id}] {entry.title} ({entry.difficulty}, {entry.similarity:.0%} similar)" for entry in similar
+        ))
+
+
+def warn_if_policy_changed(scheduler: ProblemScheduler) -> None:
+    """
+    Warn when the [Scheduling] settings differ from those stored progress was computed under.
+
+    Parameters:
+        scheduler (ProblemScheduler): Scheduler with config.ini loaded.
+    """
+    import reschedule
+    with scheduler.get_connection() as conn:
+        stale = reschedule.check_policy(conn, reschedule.policy_from_scheduler(scheduler))
+    if stale is not None:
+        click.echo("⚠️ The [Scheduling] settings changed since progress was last scheduled. "
+                   "Run `reschedule` to preview the update and `reschedule --apply` to write it.\n")
+
+
+@cli.command(name='reschedule')
+@click.option('--apply', 'apply_changes', is_flag=True, default=False, help='Write the recomputed schedule (default: dry run).')
+@click.option('--sample', type=int, default=10, help='Number of changed problems to list.')
+@click.option('--current-date', type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help='Simulate the current date (YYYY-MM-DD)')
+def reschedule_progress(apply_changes: bool, sample: int, current_date: Optional[datetime.date]) -> None:
+    """
+    Recompute interval positions, due dates and mastery for all progress after the [Scheduling]
+    settings changed. Shows what would change unless --apply is given; with --apply every row is
+    rewritten in one transaction.
+
+    Usage Examples:
+        reschedule
+        reschedule --sample 25
+        reschedule --apply
+    """
+    try:
+        import reschedule
+        scheduler = get_scheduler(current_date=current_date)
+        policy = reschedule.policy_from_scheduler(scheduler)
+        with scheduler.get_connection() as conn:
+            old = reschedule.stored_policy(conn)
+            if old is None:
+                click.echo("No scheduling settings are recorded for this database; assuming the current ladder.")
+            elif old == policy:
+                click.echo(f"Progress already matches the current settings (policy {policy.fingerprint}).")
+            else:
+                for field in policy._fields:
+                    if getattr(old, field) != getattr(policy, field):
+                        click.echo(f"  {field}: {getattr(old, field)} -> {getattr(policy, field)}")
+            if apply_changes:
+                conn.isolation_level = None  # apply manages its own transaction.
+                summary = run_with_retry(
+                    lambda: reschedule.apply(conn, old, policy, scheduler.current_date, sample), 'reschedule'
+                )
+            else:
+                summary = reschedule.plan(conn, old, policy, scheduler.current_date, sample)
+
+        table = PrettyTable()
+        table.field_names = ["Change", "Problems"]
+        table.align["Change"] = "l"
+        table.add_row(["Progress rows", summary.rows])
+        table.add_row(["Rows changed", summary.changed])
+        table.add_row(["Newly mastered", summary.mastered_gained])
+        table.add_row(["No longer mastered", summary.mastered_lost])
+        table.add_row(["Interval position changed", summary.index_changed])
+        table.add_row(["Due earlier", summary.due_earlier])
+        table.add_row(["Due later", summary.due_later])
+        table.add_row(["Due by today (before -> after)", f"{summary.due_now_before} -> {summary.due_now_after}"])
+        click.echo(table)
+
+        if summary.samples:
+            changes = PrettyTable()
+            changes.field_names = ["ID", "Title", "Interval", "Next Due", "Mastered"]
+            for change in summary.samples:
+                changes.add_row([
+                    change.problem_id,
+                    change.title,
+                    f"{change.old_interval_index} -> {change.new_interval_index}",
+                    f"{change.old_next_due} -> {change.new_next_due}",
+                    f"{'yes' if change.old_mastered else 'no'} -> {'yes' if change.new_mastered else 'no'}"
+                ])
+            click.echo(changes)
+
+        if apply_changes:
+            reload_mirror(scheduler.db_path)
+            scheduler.cache.bump('reschedule')
+            click.echo(f"Rescheduled {summary.changed} problem(s); recorded policy {policy.fingerprint}.")
+        else:
+            click.echo("Dry run: nothing was written. Run `reschedule --apply` to write these changes.")
+    except sqlite3.Error as e:
+        logger.error(f"Database error in reschedule: {e}")
+        click.echo(f"⚠️ Reschedule failed; nothing was written: {e}")
+
+
 @cli.command()
 @click.option('--limit', type=int, default=None, help='Max number of problems to solve today')
+@click.option('--minutes', type=click.IntRange(min=1), default=None, help='Time budget: pick the most valuable due problems that fit in this many minutes')
 @click.option('--auto-open/--no-auto-open', default=False, help='Automatically open problem URLs in browser')
 @click.option('--current-date', type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help='Simulate the current date (YYYY-MM-DD)')
-def today(limit: Optional[int], auto_open: bool, current_date: Optional[datetime.date]) -> None:
+def today(limit: Optional[int], minutes: Optional[int], auto_open: bool, current_date: Optional[datetime.date]) -> None:
     """
     Show today's scheduled problems.
 
+    With --minutes, the due problems with the highest total score whose expected times (from
+    recorded history) fit in the budget are chosen.
+
     Usage Examples:
         today --limit 5
+        today --minutes 60
         today --auto-open
         today --limit 3 --auto-open
         today --current-date 2022-12-31
@@ -327,42 +723,69 @@ def today(limit: Optional[int], auto_open: bool, current_date: Optional[datetime
     """
     logger.info("Started 'today' session.")
     try:
-        scheduler = ProblemScheduler(current_date=current_date)
-        due_problems = scheduler.get_due_problems()
+        with profiler.span('cli.setup'):
+            scheduler = get_scheduler(current_date=current_date)
+            warn_if_policy_changed(scheduler)
+        due_problems = result_cache.cached(
+            'today', (), scheduler.db_path, scheduler.get_due_problems, current_date=scheduler.current_date
+        )
 
         if not due_problems:
             click.echo("No problems are due today. Enjoy your break! 🎉")
             return
 
+        estimates: Dict[int, int] = {}
+        if minutes is not None:
+            import session_planner
+            with scheduler.get_connection(read_only=True) as conn:
+                time_estimates = session_planner.load_time_estimates(conn)
+            session = session_planner.plan_session(due_problems, time_estimates, minutes)
+            if not session.problems:
+                click.echo(f"None of the {len(due_problems)} due problems fits in {minutes} minutes.")
+                return
+            click.echo(
+                f"Planned {len(session.problems)} of {len(due_problems)} due problems: "
+                f"about {session.total_minutes} of {minutes} minutes.\n"
+            )
+            due_problems, estimates = session.problems, session.minutes
+
         # Apply limit if specified
         if limit is not None and limit < len(due_problems):
             due_problems = due_problems[:limit]
 
         # Sort by priority and difficulty
-        due_problems.sort(key=lambda x: (
-            x.priority,
-            DIFFICULTY_ORDER.get(x.difficulty, 4)
-        ))
+        with profiler.span('cli.sort'):
+            due_problems.sort(key=lambda x: (
+                x.priority,
+                DIFFICULTY_ORDER.get(x.difficulty, 4)
+            ))
 
         # Display sorted problems
-        click.echo("Problems to solve today (in recommended order):\n")
-        table = PrettyTable()
-        table.field_names = ["ID", "Title", "Difficulty", "Topic", "Frequency", "Attempts", "Successes", "Time (min)", "URL"]
-
-        for problem in due_problems:
-            table.add_row([
-                problem.id,
-                problem.title,
-                problem.difficulty,
-                problem.topic,
-                problem.frequency,
-                problem.attempts,
-                problem.successes,
-                problem.time_spent,
-                problem.url
-            ])
+        with profiler.span('cli.render'):
+            click.echo("Problems to solve today (in recommended order):\n")
+            table = PrettyTable()
+            field_names = ["ID", "Title", "Difficulty", "Topic", "Frequency", "Attempts", "Successes", "Time (min)", "URL"]
+            if estimates:
+                field_names.insert(-1, "Est. (min)")
+            table.field_names = field_names
+
+            for problem in due_problems:
+                row = [
+                    problem.id,
+                    problem.title,
+                    problem.difficulty,
+                    problem.topic,
+                    problem.frequency,
+                    problem.attempts,
+                    problem.successes,
+                    problem.time_spent,
+                    problem.url
+                ]
+                if estimates:
+                    row.insert(-1, estimates[problem.id])
+                table.add_row(row)
 
-        click.echo(table)
+            click.echo(table)
 
         # Initialize session summary variables
         total_time_spent = 0
@@ -370,7 +793,7 @@ def today(limit: Optional[int], auto_open: bool, current_date: Optional[datetime
         total_attempted = 0
 
         # Collect problems to solve
-        problems_to_solve: List[Problem] = []
+        problems_to_solve: List[ProblemRow] = []
         for problem in due_problems:
             solve_choice = click.prompt(
                 f"\nDo you want to solve Problem [{problem.id}]: '{problem.title}' ({problem.difficulty}, {problem.topic})?",
@@ -416,7 +839,15 @@ def today(limit: Optional[int], auto_open: bool, current_date: Optional[datetime
 
             # Update progress
             try:
-                scheduler.update_progress(problem.id, success, hints_used_val, time_spent_val)
+                update = scheduler.update_progress(problem.id, success, hints_used_val, time_spent_val)
+                unlocks = update.unlocks
+                if update.newly_mastered:
+                    mastered_today += 1
+                if unlocks.topics:
+                    click.echo(f"🔓 Unlocked topics: {', '.join(unlocks.topics)}")
+                if unlocks.problems:
+                    click.echo(f"🔓 Unlocked problems: {', '.join(str(pid) for pid in unlocks.problems)}")
+                suggest_similar(scheduler, problem.id)
             except Exception as e:
                 logger.error(f"Error updating progress for Problem [{problem.id}]: {e}")
                 click.echo(f"⚠️ An error occurred while updating progress for Problem [{problem.id}].")
@@ -424,8 +855,6 @@ def today(limit: Optional[int], auto_open: bool, current_date: Optional[datetime
             # Update session summary variables
             total_attempted += 1
             total_time_spent += time_spent_val
-            if success:
-                mastered_today += 1
 
         # Session Summary
         click.echo("\n--- Session Summary ---")
@@ -441,9 +870,150 @@ def today(limit: Optional[int], auto_open: bool, current_date: Optional[datetime
         click.echo("⚠️ An unexpected error occurred during today's session.")
 
 
+@cli.command()
+@click.option('--days', type=int, default=14, help='Number of days to forecast.')
+@click.option('--current-date', type=click.DateTime(formats=["%Y-%m-%d"]), default=None, help='Simulate the current date (YYYY-MM-DD)')
+# Overdue totals and per-day load from the due-count histogram (2).
+@query_budget(2, name='forecast')
+def forecast(days: int, current_date: Optional[datetime.date]) -> None:
+    """
+    Show the number of scheduled reviews and expected minutes per day.
+
+    Reads the due-count histogram, so the cost does not depend on the number of problems.
+    Problems that were never attempted are not scheduled and do not appear.
+
+    Usage Examples:
+        forecast
+        forecast --days 30
+        forecast --current-date 2022-12-31
+    """
+    try:
+        scheduler = get_scheduler(current_date=current_date)
+        start = scheduler.current_date
+        end = start + datetime.timedelta(days=max(days, 1) - 1)
+        with scheduler.get_connection(read_only=True) as conn:
+            overdue = fetch_overdue(conn, start)
+            load = fetch_load(conn, start, end)
+
+        capacity = scheduler.CAPACITY
+        table = PrettyTable()
+        table.field_names = ["Date", "Problems", "Minutes", "Load"]
+        table.align["Load"] = "l"
+        if overdue.problems:
+            table.add_row(["overdue", overdue.problems, overdue.minutes, ""])
+        for offset in range((end - start).days + 1):
+            day = start + datetime.timedelta(days=offset)
+            day_load = load.get(day.isoformat(), DayLoad(0, 0))
+            if capacity.enabled:
+                bar = f"{utilization(day_load, capacity) * 100:.0f}%"
+            else:
+                bar = '#' * min(day_load.problems, 40)
+            table.add_row([f"{day.isoformat()} {day.strftime('%a')}", day_load.problems, day_load.minutes, bar])
+        title = f"Review forecast, {start.isoformat()} to {end.isoformat()}"
+        if capacity.enabled:
+            limits = [f"{capacity.problems} problems" if capacity.problems else '',
+                      f"{capacity.minutes} minutes" if capacity.minutes else '']
+            title += f" (capacity: {' / '.join(limit for limit in limits if limit)} per day)"
+        table.title = title
+        click.echo(table)
+    except sqlite3.Error as e:
+        logger.error(f"Database error in forecast command: {e}")
+        click.echo("\u26a0\ufe0f An error occurred while reading the forecast.")
+    except Exception as e:
+        logger.error(f"Error in forecast command: {e}")
+        click.echo("\u26a0\ufe0f An unexpected error occurred.")
+
+
+@cli.command()
+@click.option('--recompute', is_flag=True, default=False, help='Rebuild the ratings by replaying all recorded attempts.')
+def ratings(recompute: bool) -> None:
+    """
+    Show the Elo rating of each topic. Every attempt moves its topic's rating toward the difficulty
+    of the problems solved (Easy 1200, Medium 1500, Hard 1800), and `today` prefers problems close
+    to it.
+
+    Usage Examples:
+        ratings
+        ratings --recompute
+    """
+    try:
+        import topic_ratings
+        scheduler = get_scheduler()
+        if recompute:
+            with db_cursor(scheduler.db_path, immediate=True) as cursor:
+                replayed = topic_ratings.recompute_ratings(cursor.connection, scheduler.RATINGS)
+            sync_mirror(scheduler.db_path, 'TopicRatings')
+            scheduler.cache.bump('ratings')
+            click.echo(f"Recomputed topic ratings from {replayed} attempt(s).")
+        with scheduler.get_connection(read_only=True) as conn:
+            rows = topic_ratings.fetch_topic_ratings(conn)
+
+        table = PrettyTable()
+        table.field_names = ["Topic", "Rating", "Level", "Attempts", "Success Rate"]
+        table.align["Topic"] = "l"
+        for row in rows:
+            level = min(
+                topic_ratings.DIFFICULTY_RATINGS,
+                key=lambda difficulty: abs(topic_ratings.DIFFICULTY_RATINGS[difficulty] - row.rating)
+            )
+            success_rate = f"{row.successes / row.attempts:.0%}" if row.attempts else "-"
+            table.add_row([row.topic, f"{row.rating:.0f}", level, row.attempts, success_rate])
+        click.echo(table)
+    except sqlite3.Error as e:
+        logger.error(f"Database error in ratings command: {e}")
+        click.echo("\u26a0\ufe0f An error occurred while reading topic ratings.")
+
+
+def suggest_next_topics(scheduler: ProblemScheduler) -> Tuple[List[str], Dict[str, Tuple[int, int, Optional[float]]], List[List[Any]]]:
+    """
+    Compute the topics that can be studied next, sorted by priority, with their table rows.
+
+    Parameters:
+        scheduler (ProblemScheduler): Scheduler used for mastery and metrics queries.
+
+    Returns:
+        Tuple: (available topics, metrics per topic, rows for the suggestions table).
+    """
+    scheduler.load_weights()
+    mastered_topics = set(scheduler.get_mastered_topics())
+
+    # Determine topics that can be scheduled next
+    available_topics = []
+    for topic, prereqs in PREREQUISITE_MAP.items():
+        if topic in mastered_topics:
+            continue  # Already mastered
+        # Check if all prerequisites are met
+        if scheduler.can_schedule_topic(topic, mastered_topics):
+            available_topics.append(topic)
+
+    if not available_topics:
+        return [], {}, []
+
+    # Sort available topics by priority
+    available_topics.sort(key=lambda t: scheduler.weights.topic_priority(t, 100))
+
+    # Prepare table data (metrics for all topics are fetched in one query)
+    topic_metrics = scheduler.get_topic_metrics()
+    table_data = []
+    for topic in available_topics:
+        priority = scheduler.weights.topic_priority(topic, 100)
+        prereqs = PREREQUISITE_MAP.get(topic, [])
+        prereqs_str = ", ".join(prereqs) if prereqs else "None"
+
+        _, solved_problems, success_rate = topic_metrics.get(topic, (0, 0, None))
+        success_rate = f"{success_rate * 100:.2f}%" if success_rate is not None else "N/A"
+
+        table_data.append([priority, topic, prereqs_str, solved_problems, success_rate])
+    return available_topics, topic_metrics, table_data
+
+
 @cli.command(name='next-topics')
 @click.option('--export', type=click.Choice(['csv', 'json'], case_sensitive=False), default=None, help='Export results to a file format (csv/json).')
 @click.option('--quick', is_flag=True, default=False, help='Display quick suggestions without interactivity.')
+# Weight overrides and topic mastery counts (2), the catalog stamp and snapshot rebuild (5) and
+# topic metrics (1); filtering by difficulty rereads the weights and metrics (2) and exploring a
+# topic looks it up and lists its problems (2).
+@query_budget(12, name='next-topics')
 def next_topics(export: Optional[str], quick: bool) -> None:
     """
     Suggest next topics to focus on based on mastery and prerequisites.
@@ -453,45 +1023,15 @@ def next_topics(export: Optional[str], quick: bool) -> None:
         next-topics --quick
     """
     try:
-        scheduler = ProblemScheduler()
-        mastered_topics = set(scheduler.get_mastered_topics())
-
-        # Determine topics that can be scheduled next
-        available_topics = []
-        for topic, prereqs in PREREQUISITE_MAP.items():
-            if topic in mastered_topics:
-                continue  # Already mastered
-            # Check if all prerequisites are met
-            if scheduler.can_schedule_topic(topic, mastered_topics):
-                available_topics.append(topic)
+        scheduler = get_scheduler()
+        available_topics, topic_metrics, table_data = result_cache.cached(
+            'next-topics', (), scheduler.db_path, lambda: suggest_next_topics(scheduler)
+        )
 
         if not available_topics:
             click.echo("🎉 All topics are either mastered or prerequisites not met yet.")
             return
 
-        # Sort available topics by priority
-        available_topics.sort(key=lambda t: TopicPriority.get_priority(t, 100))
-
-        # Prepare table data
-        table_data = []
-        for topic in available_topics:
-            priority = TopicPriority.get_priority(topic, 100)
-            prereqs = PREREQUISITE_MAP.get(topic, [])
-            prereqs_str = ", ".join(prereqs) if prereqs else "None"
-
-            # Fetch additional metrics
-            try:
-                metrics = scheduler.get_mastery_status(topic)
-                solved_problems = metrics['solved_problems']
-                success_rate = metrics['success_rate']
-                success_rate = f"{success_rate * 100:.2f}%" if success_rate is not None else "N/A"
-            except Exception as e:
-                logger.error(f"Error fetching metrics for topic '{topic}': {e}")
-                solved_problems = 0
-                success_rate = "N/A"
-
-            table_data.append([priority, topic, prereqs_str, solved_problems, success_rate])
-
         # Export results if specified
         if export:
             file_name = f"next_topics.{export}"
@@ -554,15 +1094,12 @@ def next_topics(export: Optional[str], quick: bool) -> None:
             # Implement filtering options (e.g., by difficulty)
             filter_difficulty = click.prompt("Filter by difficulty? Choose 'Easy', 'Medium', 'Hard' or 'No' to skip", type=click.Choice(['Easy', 'Medium', 'Hard', 'No'], case_sensitive=False), default='No')
             if filter_difficulty.lower() in ['easy', 'medium', 'hard']:
-                filtered_topics = []
-                for topic in available_topics:
-                    try:
-                        total, solved, success_rate = scheduler.get_additional_metrics(topic, filter_difficulty.capitalize())
-                        if total > 0:
-                            filtered_topics.append(topic)
-                    except Exception as e:
-                        logger.error(f"Error filtering topics by difficulty '{filter_difficulty}': {e}")
-                        continue
+                scheduler.load_weights()
+                difficulty_metrics = scheduler.get_topic_metrics(filter_difficulty.capitalize())
+                filtered_topics = [
+                    topic for topic in available_topics
+                    if difficulty_metrics.get(topic, (0, 0, None))[0] > 0
+                ]
 
                 if not filtered_topics:
                     click.echo(f"No topics found with difficulty '{filter_difficulty.capitalize()}'.")
@@ -572,20 +1109,12 @@ def next_topics(export: Optional[str], quick: bool) -> None:
                     filtered_table.field_names = ["Priority", "Topic", "Prerequisites", "Problems Solved", "Success Rate"]
 
                     for topic in filtered_topics:
-                        priority = TopicPriority.get_priority(topic, 100)
+                        priority = scheduler.weights.topic_priority(topic, 100)
                         prereqs = PREREQUISITE_MAP.get(topic, [])
                         prereqs_str = ", ".join(prereqs) if prereqs else "None"
 
-                        # Fetch additional metrics
-                        try:
-                            metrics = scheduler.get_mastery_status(topic)
-                            solved_problems = metrics['solved_problems']
-                            success_rate = metrics['success_rate']
-                            success_rate = f"{success_rate * 100:.2f}%" if success_rate is not None else "N/A"
-                        except Exception as e:
-                            logger.error(f"Error fetching metrics for topic '{topic}': {e}")
-                            solved_problems = 0
-                            success_rate = "N/A"
+                        _, solved_problems, success_rate = topic_metrics.get(topic, (0, 0, None))
+                        success_rate = f"{success_rate * 100:.2f}%" if success_rate is not None else "N/A"
 
                         filtered_table.add_row([priority, topic, prereqs_str, solved_problems, success_rate])
 
@@ -630,6 +1159,8 @@ def next_topics(export: Optional[str], quick: bool) -> None:
 @click.option('--db-path', default='leetcode_mastery.db', help='Path to the SQLite database file.')
 @click.option('--output-format', default='table', type=click.Choice(['table', 'json'], case_sensitive=False),
               help='Format of the output - table or JSON.')
+# Overall, per-difficulty and per-topic progress (3).
+@query_budget(3, name='view-progress')
 def view_progress(db_path: str, output_format: str) -> None:
     """
     View overall progress metrics, progress by difficulty, and progress by topic.
@@ -655,11 +1186,61 @@ def view_progress(db_path: str, output_format: str) -> None:
 
 
 @cli.command()
-def visualize() -> None:
-    """Generate analytics/visualizations."""
+@click.option('--out', type=click.Path(dir_okay=False), default='report.html', help='Path of the HTML file to write.')
+@click.option('--format', 'image_format', type=click.Choice(['svg', 'png'], case_sensitive=False), default='svg', help='Chart image format.')
+@click.option('--db-path', default=None, help='Database to report on. Defaults to the configured database.')
+# The three progress queries of view-progress and the three chart data queries (6).
+@query_budget(6, name='report')
+def report(out: str, image_format: str, db_path: Optional[str]) -> None:
+    """
+    Write a static HTML progress report with tables and charts.
+
+    Chart images are kept in a sidecar directory next to the report and only redrawn when
+    their data changes.
+
+    Usage Examples:
+        report
+        report --out site/progress.html --format png
+    """
+    try:
+        import report as progress_report
+        result = progress_report.build_report(db_path or get_scheduler().db_path, out, image_format.lower())
+        click.echo(f"Report written to '{result.path}' ({result.rendered} charts rendered, {result.reused} reused).")
+    except sqlite3.Error as e:
+        logger.error(f"Database error in report command: {e}")
+        click.echo("⚠️ An error occurred while reading progress for the report.")
+    except Exception as e:
+        logger.error(f"Error in report command: {e}")
+        click.echo("⚠️ An unexpected error occurred while writing the report.")
+
+
+@cli.command()
+@click.option('--all', 'render_all', is_flag=True, default=False, help='Render every chart type to files without a display.')
+@click.option('--out', type=click.Path(file_okay=False), default='charts', help='Output directory for --all.')
+@click.option('--format', 'formats', type=click.Choice(['png', 'svg'], case_sensitive=False), multiple=True, help='Image format for --all (repeatable, default png).')
+@click.option('--workers', type=int, default=None, help='Rendering processes for --all (default: CPU count).')
+@click.option('--db-path', 'db_paths', multiple=True, help='Database to chart (repeatable with --all). Defaults to the configured database.')
+def visualize(render_all: bool, out: str, formats: Tuple[str, ...], workers: Optional[int], db_paths: Tuple[str, ...]) -> None:
+    """
+    Generate analytics/visualizations.
+
+    Usage Examples:
+        visualize
+        visualize --all --out charts
+        visualize --all --out charts --format png --format svg
+        visualize --all --out charts --db-path alice.db --db-path bob.db
+    """
     
     try:
         import visualize_progress
+        if not db_paths:
+            db_paths = (get_scheduler().db_path,)
+
+        if render_all:
+            written = visualize_progress.render_all(list(db_paths), out, [fmt.lower() for fmt in formats] or ['png'], workers)
+            click.echo(f"Wrote {len(written)} chart(s) to '{out}'.")
+            return
+
         click.echo("Select Visualization:")
         click.echo("1. Success Rate Over Time")
         click.echo("2. Mastered Problems by Topic")
@@ -667,12 +1248,11 @@ def visualize() -> None:
         choice = click.prompt("Enter choice (1/2/3)", type=int, default=1)
 
         if choice == 1:
-            # def plot_success_over_time(db_path: str, save_path: Optional[str] = None) -> None: -> structure of imported function
-            visualize_progress.plot_success_over_time(db_path='leetcode_mastery.db')
+            visualize_progress.plot_success_over_time(db_path=db_paths[0])
         elif choice == 2:
-            visualize_progress.plot_mastered_topics(db_path='leetcode_mastery.db')
+            visualize_progress.plot_mastered_topics(db_path=db_paths[0])
         elif choice == 3:
-            visualize_progress.plot_difficulty_success(db_path='leetcode_mastery.db')
+            visualize_progress.plot_difficulty_success(db_path=db_paths[0])
         else:
             click.echo("Invalid choice.")
     except ImportError as e:
@@ -682,5 +1262,41 @@ def visualize() -> None:
         logger.error(f"Error in visualize command: {e}")
         click.echo("⚠️ An error occurred while generating visualization.")
 
+
+@cli.command(name='shell')
+def interactive_shell() -> None:
+    """
+    Run commands interactively in one process, with the same syntax as on the command line (e.g.
+    `today --limit 3`, `problem list --topic Array`). The scheduler, its database connection and
+    the catalog and weight caches stay loaded between commands; after a command that wrote to the
+    database they are invalidated. Tab completes commands and options, and the line history is
+    kept across sessions. `help [COMMAND]` shows help; `exit`, `quit` or Ctrl-D leaves.
+
+    Usage Examples:
+        shell
+    """
+    global _shell_scheduler
+    import repl
+    scheduler = ProblemScheduler()
+    scheduler.hold_connection()
+    stamp = result_cache.change_stamp(scheduler.db_path)
+
+    def invalidate_after_write() -> None:
+        nonlocal stamp
+        current = result_cache.change_stamp(scheduler.db_path)
+        if current != stamp:
+            stamp = current
+            reload_mirror(scheduler.db_path)
+            scheduler.cache.bump('shell command wrote')
+
+    _shell_scheduler = scheduler
+    click.echo("LeetCode Mastery shell. Type `help` for commands, `exit` to leave.")
+    try:
+        commands = repl.run_shell(cli, invalidate_after_write)
+        logger.info(f"Shell session ran {commands} command(s).")
+    finally:
+        _shell_scheduler = None
+        scheduler.release_connection()
+
 if __name__ == '__main__':
     cli()
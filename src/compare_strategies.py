@@ -0,0 +1,159 @@
+import argparse
+import configparser
+import datetime
+import math
+import random
+from typing import Dict, List, Optional
+
+from prettytable import PrettyTable
+
+from logger import get_logger
+from scheduling_strategies import ReviewState, SchedulingStrategy, create_strategy
+
+logger = get_logger(__name__, 'compare_strategies.log')
+
+
+class SimulatedProblem:
+    """
+    One problem as seen by a synthetic learner with exponential forgetting.
+
+    true_stability is the learner's real memory strength in days (recall probability after t days is
+    exp(-t / true_stability)); strategies never see it and only observe review outcomes.
+    """
+    __slots__ = ('true_stability', 'growth', 'state', 'due', 'last_review', 'attempts', 'successes', 'mastered')
+
+    def __init__(self, true_stability: float, growth: float):
+        self.true_stability = true_stability
+        self.growth = growth
+        self.state = ReviewState(-1, None, None, None)
+        self.due: Optional[datetime.date] = None
+        self.last_review: Optional[datetime.date] = None
+        self.attempts = 0
+        self.successes = 0
+        self.mastered = False
+
+    def recall_probability(self, today: datetime.date) -> float:
+        if self.last_review is None:
+            return 0.0
+        return math.exp(-(today - self.last_review).days / self.true_stability)
+
+
+def simulate(
+    strategy: SchedulingStrategy,
+    problems: int,
+    days: int,
+    new_per_day: int,
+    seed: int,
+    min_attempts: int = 3,
+    mastery_ratio: float = 0.8
+) -> Dict[str, float]:
+    """
+    Run one strategy against the synthetic learner, reviewing every due problem each day.
+
+    Parameters:
+        strategy (SchedulingStrategy): Strategy under test.
+        problems (int): Number of problems in the pool.
+        days (int): Number of simulated days.
+        new_per_day (int): New problems introduced per day.
+        seed (int): Random seed; the same seed gives every strategy the same learner.
+        min_attempts (int): Attempts required before a problem can be mastered.
+        mastery_ratio (float): Success ratio required for mastery.
+
+    Returns:
+        Dict[str, float]: Total reviews, reviews per day, measured retention and lapses.
+    """
+    rng = random.Random(seed)
+    pool: List[SimulatedProblem] = [
+        SimulatedProblem(rng.uniform(1.0, 5.0), rng.uniform(2.0, 3.5)) for _ in range(problems)
+    ]
+    start = datetime.date(2024, 1, 1)
+    introduced = 0
+    reviews = 0
+    lapses = 0
+    retention_sum = 0.0
+    retention_samples = 0
+
+    for day in range(days):
+        today = start + datetime.timedelta(days=day)
+        for problem in pool[introduced:introduced + new_per_day]:
+            problem.due = today
+        introduced = min(problems, introduced + new_per_day)
+
+        for problem in pool[:introduced]:
+            if problem.last_review is not None:
+                retention_sum += problem.recall_probability(today)
+                retention_samples += 1
+            if problem.due is None or problem.due > today:
+                continue
+
+            success = problem.last_review is None and rng.random() < 0.7 or \
+                problem.last_review is not None and rng.random() < problem.recall_probability(today)
+            reviews += 1
+            problem.attempts += 1
+            problem.successes += int(success)
+            if success:
+                problem.true_stability *= problem.growth
+            else:
+                lapses += 1
+                problem.true_stability = max(0.5, problem.true_stability * 0.5)
+            problem.mastered = problem.mastered or (
+                problem.attempts >= min_attempts and problem.successes / problem.attempts >= mastery_ratio
+            )
+
+            outcome = strategy.next_review(problem.state, success, 0, problem.mastered, today)
+            problem.state = ReviewState(
+                outcome.interval_index, outcome.stability, outcome.memory_difficulty, today.isoformat()
+            )
+            problem.due = datetime.date.fromisoformat(outcome.next_due)
+            problem.last_review = today
+
+    return {
+        'reviews': reviews,
+        'reviews_per_day': reviews / days if days else 0.0,
+        'retention': retention_sum / retention_samples if retention_samples else 0.0,
+        'lapses': lapses,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare scheduling strategies on a synthetic learner: reviews per day versus retention."
+    )
+    parser.add_argument('--problems', type=int, default=300, help="Problems in the simulated pool.")
+    parser.add_argument('--days', type=int, default=180, help="Days to simulate.")
+    parser.add_argument('--new-per-day', type=int, default=5, help="New problems introduced per day.")
+    parser.add_argument('--seed', type=int, default=7, help="Random seed for the synthetic learner.")
+    parser.add_argument('--config', default='config.ini', help="Configuration file for intervals and retention.")
+    parser.add_argument(
+        '--retention', type=float, nargs='+',
+        help="Desired retention values to try for the memory model (default: desired_retention from config)."
+    )
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read(args.config)
+    intervals = [int(x) for x in config.get('Scheduling', 'spaced_intervals', fallback='1,3,7,14,30').split(',')]
+    retentions = args.retention or [config.getfloat('Scheduling', 'desired_retention', fallback=0.9)]
+    max_interval = config.getint('Scheduling', 'max_interval_days', fallback=365)
+    min_attempts = config.getint('Scheduling', 'min_attempts_for_mastery', fallback=3)
+    mastery_ratio = config.getfloat('Scheduling', 'mastery_threshold_ratio', fallback=0.8)
+
+    table = PrettyTable()
+    table.field_names = ["Strategy", "Reviews", "Reviews/Day", "Retention", "Lapses"]
+    runs = [('ladder', create_strategy('ladder', intervals))] + [
+        (f"memory @ {retention:g}", create_strategy('memory', intervals, retention, max_interval))
+        for retention in retentions
+    ]
+    for label, strategy in runs:
+        result = simulate(strategy, args.problems, args.days, args.new_per_day, args.seed, min_attempts, mastery_ratio)
+        logger.info(f"Strategy '{label}': {result}")
+        table.add_row([
+            label, result['reviews'], f"{result['reviews_per_day']:.2f}",
+            f"{result['retention'] * 100:.1f}%", result['lapses']
+        ])
+    table.title = f"{args.problems} problems, {args.days} days, {args.new_per_day} new/day"
+    print(table)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,14 @@ from typing import List, Tuple
 
 from logger import get_logger
 from db_utils import db_cursor
+from catalog_snapshot import create_catalog_meta, bump_catalog_version
+from load_leveling import ensure_due_histogram
+from scheduling_strategies import ensure_memory_columns
+from reschedule import create_scheduling_meta
+from similarity import ensure_similar_problems
+from topic_ratings import ensure_topic_ratings
+from weight_registry import WEIGHTS_SCHEMA
+import migrations
 
 logger = get_logger(__name__, 'db_init.log')
 
@@ -17,7 +25,8 @@ def drop_tables(cursor: sqlite3.Cursor) -> None:
     """
     tables = [
         'UserProgress', 'ProblemPatterns', 'TopicRatings',
-        'Problems', 'Topics', 'Patterns', 'ProblemPrerequisites'
+        'Problems', 'Topics', 'Patterns', 'ProblemPrerequisites', 'Weights', 'CatalogMeta', 'DueCounts',
+        'SchedulingMeta', 'SimilarProblems', 'SimilarBuckets', 'AttemptLog'
     ]
     cursor.execute('PRAGMA foreign_keys = OFF;')
     for table in tables:
@@ -25,10 +34,13 @@ def drop_tables(cursor: sqlite3.Cursor) -> None:
         logger.info(f"Dropped table '{table}' if it existed.")
     cursor.execute('PRAGMA foreign_keys = ON;')
     logger.debug("Foreign key constraints re-enabled.")
+    # The tables are recreated from scratch, so every migration applies again.
+    cursor.execute('PRAGMA user_version = 0')
 
 def create_tables(cursor: sqlite3.Cursor) -> None:
     """
-    Creates necessary tables if they do not exist.
+    Creates necessary tables if they do not exist, at the latest schema version. Schema changes
+    also need a step in migrations.MIGRATIONS so existing databases receive them.
     
     Parameters:
         cursor (sqlite3.Cursor): Database cursor.
@@ -69,6 +81,8 @@ def create_tables(cursor: sqlite3.Cursor) -> None:
             next_due DATETIME,
             mastered INTEGER DEFAULT 0 NOT NULL,
             current_interval_index INTEGER DEFAULT 0,
+            stability REAL,
+            memory_difficulty REAL,
             FOREIGN KEY (problem_id) REFERENCES Problems(id)
         )''',
         "TopicRatings": '''CREATE TABLE IF NOT EXISTS TopicRatings (
@@ -82,19 +96,31 @@ def create_tables(cursor: sqlite3.Cursor) -> None:
             FOREIGN KEY (problem_id) REFERENCES Problems(id),
             FOREIGN KEY (pattern_id) REFERENCES Patterns(pattern_id),
             PRIMARY KEY (problem_id, pattern_id)
-        )'''
+        )''',
+        "Weights": WEIGHTS_SCHEMA
     }
 
     for table, sql in tables_sql.items():
         cursor.execute(sql)
         logger.info(f"Ensured table '{table}' exists.")
 
+    create_catalog_meta(cursor)
+    logger.info("Ensured table 'CatalogMeta' exists.")
+    create_scheduling_meta(cursor.connection)
+    logger.info("Ensured table 'SchedulingMeta' exists.")
+    ensure_memory_columns(cursor.connection)
+    ensure_due_histogram(cursor.connection)
+    ensure_similar_problems(cursor.connection)
+    ensure_topic_ratings(cursor.connection)
+
     indexes = [
         'CREATE INDEX IF NOT EXISTS idx_problems_topic_id ON Problems(topic_id)',
         'CREATE INDEX IF NOT EXISTS idx_problempatterns_problem_id ON ProblemPatterns(problem_id)',
         'CREATE INDEX IF NOT EXISTS idx_problempatterns_pattern_id ON ProblemPatterns(pattern_id)',
         'CREATE INDEX IF NOT EXISTS idx_problemprerequisites_prerequisite_id ON ProblemPrerequisites(prerequisite_id)',
-        'CREATE INDEX IF NOT EXISTS idx_userprogress_mastered ON UserProgress(mastered)'
+        'CREATE INDEX IF NOT EXISTS idx_userprogress_mastered ON UserProgress(mastered)',
+        'CREATE INDEX IF NOT EXISTS idx_userprogress_next_due ON UserProgress(next_due)',
+        'CREATE INDEX IF NOT EXISTS idx_userprogress_last_attempt ON UserProgress(last_attempt)'
     ]
     for index in indexes:
         cursor.execute(index)
@@ -165,6 +191,11 @@ def initialize_db(reset: bool = False, db_path: str = 'leetcode_mastery.db') ->
         initialize_table(cursor, 'Topics', topics, 'name')
         initialize_table(cursor, 'Patterns', patterns, 'name')
         initialize_topic_ratings(cursor)
+        bump_catalog_version(cursor)
+        # The tables above are already at the latest schema; this records the version (the steps
+        # are idempotent) so the database is not migrated again on open.
+        cursor.connection.commit()
+        migrations.migrate(cursor.connection)
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Initialize the LeetCode Mastery database.")
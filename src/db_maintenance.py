@@ -0,0 +1,373 @@
+import datetime
+import os
+import sqlite3
+import statistics
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from prettytable import PrettyTable
+
+import profiler
+from db_utils import open_connection
+from logger import get_logger
+
+logger = get_logger(__name__, 'db_maintenance.log')
+
+MIB = 1024 * 1024
+
+# Upper bounds for the size-based recommendations.
+MAX_CACHE_BYTES = 64 * MIB
+MAX_MMAP_BYTES = 256 * MIB
+
+
+class DatabaseStats(NamedTuple):
+    """
+    Storage settings and size of a database file.
+    """
+    size_bytes: int
+    page_size: int
+    page_count: int
+    freelist_count: int
+    journal_mode: str
+    auto_vacuum: int
+    cache_size: int
+    mmap_size: int
+
+
+class Recommendation(NamedTuple):
+    """
+    One pragma setting worth changing.
+
+    persistent settings are stored in the database file and can be applied by `db tune --apply`;
+    the others are per-connection and belong in the [Database] section of config.ini.
+    """
+    pragma: str
+    current: str
+    recommended: str
+    persistent: bool
+    reason: str
+
+
+class TuneReport(NamedTuple):
+    """
+    Everything `db tune` did and measured.
+    """
+    before: DatabaseStats
+    after: DatabaseStats
+    integrity: List[str]
+    foreign_key_violations: int
+    recommendations: List[Recommendation]
+    applied: List[str]
+    timings_before: Dict[str, float]
+    timings_after: Dict[str, float]
+
+
+def read_stats(conn: sqlite3.Connection, db_path: str) -> DatabaseStats:
+    """
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        DatabaseStats: Current settings and size.
+    """
+    def pragma(name: str):
+        return conn.execute(f'PRAGMA {name}').fetchone()[0]
+
+    return DatabaseStats(
+        size_bytes=os.path.getsize(db_path) if os.path.exists(db_path) else 0,
+        page_size=pragma('page_size'),
+        page_count=pragma('page_count'),
+        freelist_count=pragma('freelist_count'),
+        journal_mode=str(pragma('journal_mode')).lower(),
+        auto_vacuum=pragma('auto_vacuum'),
+        cache_size=pragma('cache_size'),
+        mmap_size=pragma('mmap_size') or 0,
+    )
+
+
+def recommend(stats: DatabaseStats) -> List[Recommendation]:
+    """
+    Recommend pragma settings from the database size.
+
+    Parameters:
+        stats (DatabaseStats): Current settings and size.
+
+    Returns:
+        List[Recommendation]: Settings that differ from the recommendation.
+    """
+    size = stats.size_bytes
+    recommendations: List[Recommendation] = []
+
+    # 4 KiB matches the OS page size; larger pages only pay off for much larger, scan-heavy databases.
+    page_size = 8192 if size > 512 * MIB else 4096
+    if stats.page_size != page_size:
+        recommendations.append(Recommendation(
+            'page_size', str(stats.page_size), str(page_size), True,
+            "Match the filesystem page size (takes effect through VACUUM)."
+        ))
+
+    if stats.journal_mode not in ('wal', 'memory'):
+        recommendations.append(Recommendation(
+            'journal_mode', stats.journal_mode, 'wal', True,
+            "Readers no longer block the writer and commits need fewer fsyncs."
+        ))
+
+    if stats.auto_vacuum != 2:
+        recommendations.append(Recommendation(
+            'auto_vacuum', str(stats.auto_vacuum), '2 (incremental)', True,
+            "Lets `db tune` reclaim free pages without rewriting the whole file."
+        ))
+
+    # Keep the whole database in the page cache while it is small; cap it for large ones.
+    cache_kib = max(2000, min(MAX_CACHE_BYTES, size + size // 4) // 1024)
+    current_cache_kib = -stats.cache_size if stats.cache_size < 0 else stats.cache_size * stats.page_size // 1024
+    if current_cache_kib < cache_kib:
+        recommendations.append(Recommendation(
+            'cache_size', str(stats.cache_size), str(-cache_kib), False,
+            f"Cache up to {cache_kib} KiB so hot queries do not re-read pages."
+        ))
+
+    mmap_size = 0 if size < MIB else min(MAX_MMAP_BYTES, 1 << (2 * size - 1).bit_length())
+    if mmap_size and stats.mmap_size < mmap_size:
+        recommendations.append(Recommendation(
+            'mmap_size', str(stats.mmap_size), str(mmap_size), False,
+            "Read pages through a memory map instead of copying them."
+        ))
+    return recommendations
+
+
+def default_hot_queries() -> Dict[str, Callable[[str], object]]:
+    """
+    The read paths whose latency `db tune` reports: the due-problem query, `problem list`,
+    view-progress and the chart queries. Each callable takes a database path.
+
+    Returns:
+        Dict[str, Callable[[str], object]]: Name to callable.
+    """
+    from list_problems_by_topic import PROBLEM_LIST_ORDER, PROBLEM_LIST_QUERY
+    from scheduler import ProblemScheduler
+    from view_progress import load_progress
+    from visualize_progress import query_chart_data
+
+    schedulers: Dict[str, ProblemScheduler] = {}
+
+    def due_problems(db_path: str) -> object:
+        scheduler = schedulers.get(db_path)
+        if scheduler is None:
+            scheduler = schedulers[db_path] = ProblemScheduler()
+            scheduler.db_path = db_path
+        # Drop derived values so every run issues the full set of queries.
+        scheduler.cache.bump('db tune')
+        return scheduler.get_due_problems()
+
+    def with_connection(run: Callable[[sqlite3.Connection], object]) -> Callable[[str], object]:
+        def timed(db_path: str) -> object:
+            conn = open_connection(db_path)
+            try:
+                return run(conn)
+            finally:
+                conn.close()
+        return timed
+
+    return {
+        'get_due_problems': due_problems,
+        'problem list': with_connection(lambda conn: conn.execute(PROBLEM_LIST_QUERY + PROBLEM_LIST_ORDER).fetchall()),
+        'view-progress': load_progress,
+        'chart queries': with_connection(query_chart_data),
+    }
+
+
+def time_queries(db_path: str, queries: Dict[str, Callable[[str], object]], runs: int = 5) -> Dict[str, float]:
+    """
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        queries (Dict[str, Callable[[str], object]]): Name to callable taking the database path.
+        runs (int): Repetitions after one untimed warm-up run; the median is reported.
+
+    Returns:
+        Dict[str, float]: Median milliseconds per query.
+    """
+    timings: Dict[str, float] = {}
+    for name, run in queries.items():
+        samples = []
+        for attempt in range(max(1, runs) + 1):
+            start = time.perf_counter()
+            try:
+                run(db_path)
+            except Exception as e:
+                logger.warning(f"Hot query '{name}' failed: {e}")
+                break
+            if attempt:
+                samples.append((time.perf_counter() - start) * 1000)
+        if samples:
+            timings[name] = statistics.median(samples)
+    return timings
+
+
+def check_integrity(conn: sqlite3.Connection) -> Tuple[List[str], int]:
+    """
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        Tuple[List[str], int]: integrity_check messages (['ok'] when healthy) and the number of
+            foreign key violations.
+    """
+    messages = [row[0] for row in conn.execute('PRAGMA integrity_check').fetchall()]
+    violations = len(conn.execute('PRAGMA foreign_key_check').fetchall())
+    return messages, violations
+
+
+def apply_persistent(conn: sqlite3.Connection, recommendations: Sequence[Recommendation]) -> Tuple[List[str], bool]:
+    """
+    Apply the persistent recommendations. page_size and auto_vacuum only take effect after VACUUM,
+    and page_size cannot change in WAL mode, so journal_mode is switched last.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection (autocommit).
+        recommendations (Sequence[Recommendation]): Recommendations to apply.
+
+    Returns:
+        Tuple[List[str], bool]: Statements executed, and whether a VACUUM is required.
+    """
+    applied: List[str] = []
+    needs_vacuum = False
+    by_name = {rec.pragma: rec for rec in recommendations if rec.persistent}
+
+    if 'page_size' in by_name or 'auto_vacuum' in by_name:
+        if conn.execute('PRAGMA journal_mode').fetchone()[0].lower() == 'wal':
+            conn.execute('PRAGMA journal_mode = DELETE')
+            applied.append('PRAGMA journal_mode = DELETE')
+        for name in ('page_size', 'auto_vacuum'):
+            if name in by_name:
+                value = by_name[name].recommended.split()[0]
+                conn.execute(f'PRAGMA {name} = {value}')
+                applied.append(f'PRAGMA {name} = {value}')
+        needs_vacuum = True
+    return applied, needs_vacuum
+
+
+def tune(
+    db_path: str,
+    apply: bool = False,
+    vacuum: bool = True,
+    runs: int = 5,
+    hot_queries: Optional[Dict[str, Callable[[str], object]]] = None
+) -> TuneReport:
+    """
+    Gather planner statistics, reclaim free pages, check integrity and recommend (or apply)
+    storage pragmas, timing the hot queries before and after.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        apply (bool): Apply persistent recommendations (page_size, auto_vacuum, journal_mode).
+        vacuum (bool): Reclaim free pages.
+        runs (int): Repetitions per hot query timing.
+        hot_queries (Optional[Dict[str, Callable[[str], object]]]): Queries to time; defaults to
+            default_hot_queries().
+
+    Returns:
+        TuneReport: What was measured and done.
+    """
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database '{db_path}' does not exist.")
+    queries = hot_queries if hot_queries is not None else default_hot_queries()
+
+    with profiler.span('db_tune.time_before'):
+        timings_before = time_queries(db_path, queries, runs)
+
+    conn = open_connection(db_path)
+    conn.isolation_level = None  # VACUUM and some pragmas cannot run inside a transaction.
+    try:
+        before = read_stats(conn, db_path)
+        with profiler.span('db_tune.integrity'):
+            integrity, violations = check_integrity(conn)
+        if integrity != ['ok']:
+            logger.error(f"Integrity check failed for '{db_path}': {integrity[:5]}")
+
+        recommendations = recommend(before)
+        applied: List[str] = []
+        needs_vacuum = False
+        if apply and integrity == ['ok']:
+            applied, needs_vacuum = apply_persistent(conn, recommendations)
+
+        with profiler.span('db_tune.vacuum'):
+            if needs_vacuum or (vacuum and before.freelist_count > 0 and before.auto_vacuum != 2):
+                conn.execute('VACUUM')
+                applied.append('VACUUM')
+            elif vacuum and before.freelist_count > 0:
+                conn.execute('PRAGMA incremental_vacuum').fetchall()
+                applied.append('PRAGMA incremental_vacuum')
+
+        # Switch to WAL when recommended, or back to WAL if apply_persistent left it for VACUUM.
+        if apply and (any(rec.pragma == 'journal_mode' for rec in recommendations)
+                      or 'PRAGMA journal_mode = DELETE' in applied):
+            conn.execute('PRAGMA journal_mode = WAL')
+            applied.append('PRAGMA journal_mode = WAL')
+
+        with profiler.span('db_tune.analyze'):
+            conn.execute('ANALYZE')
+            conn.execute('PRAGMA optimize')
+        applied.extend(['ANALYZE', 'PRAGMA optimize'])
+        after = read_stats(conn, db_path)
+    finally:
+        conn.close()
+
+    with profiler.span('db_tune.time_after'):
+        timings_after = time_queries(db_path, queries, runs)
+
+    logger.info(f"Tuned '{db_path}': {', '.join(applied)}.")
+    return TuneReport(
+        before, after, integrity, violations, recommend(after) if apply else recommendations,
+        applied, timings_before, timings_after
+    )
+
+
+def render_report(report: TuneReport) -> str:
+    """
+    Format a TuneReport as text tables.
+
+    Parameters:
+        report (TuneReport): The report.
+
+    Returns:
+        str: Printable report.
+    """
+    parts: List[str] = []
+
+    storage = PrettyTable()
+    storage.field_names = ["Setting", "Before", "After"]
+    storage.align["Setting"] = "l"
+    for field in DatabaseStats._fields:
+        storage.add_row([field, getattr(report.before, field), getattr(report.after, field)])
+    storage.title = "Storage"
+    parts.append(storage.get_string())
+
+    status = 'ok' if report.integrity == ['ok'] else f"{len(report.integrity)} problem(s): {report.integrity[0]}"
+    parts.append(f"Integrity: {status}; foreign key violations: {report.foreign_key_violations}")
+    parts.append(f"Executed: {', '.join(report.applied)}")
+
+    if report.recommendations:
+        recs = PrettyTable()
+        recs.field_names = ["Pragma", "Current", "Recommended", "Where", "Why"]
+        recs.align["Why"] = "l"
+        for rec in report.recommendations:
+            where = 'db tune --apply' if rec.persistent else 'config.ini [Database]'
+            recs.add_row([rec.pragma, rec.current, rec.recommended, where, rec.reason])
+        recs.title = "Recommendations"
+        parts.append(recs.get_string())
+
+    timings = PrettyTable()
+    timings.field_names = ["Query", "Before (ms)", "After (ms)", "Change"]
+    timings.align["Query"] = "l"
+    for name, before_ms in report.timings_before.items():
+        after_ms = report.timings_after.get(name)
+        if after_ms is None:
+            timings.add_row([name, f"{before_ms:.2f}", "-", "-"])
+            continue
+        change = (after_ms - before_ms) / before_ms * 100 if before_ms else 0.0
+        timings.add_row([name, f"{before_ms:.2f}", f"{after_ms:.2f}", f"{change:+.0f}%"])
+    timings.title = f"Hot queries (median), {datetime.date.today().isoformat()}"
+    parts.append(timings.get_string())
+    return '\n\n'.join(parts)
@@ -0,0 +1,110 @@
+import os
+import sqlite3
+from typing import Dict, List, Optional, Sequence
+from urllib.request import pathname2url
+
+import profiler
+import sql_trace
+from logger import get_logger
+
+logger = get_logger(__name__, 'db_mirror.log')
+
+
+def read_only_uri(db_path: str) -> str:
+    """
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        str: URI that opens the file read-only and never creates it.
+    """
+    return f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+
+
+class DatabaseMirror:
+    """
+    In-memory copy of a database file that read-only connections are served from.
+
+    The copy is loaded once with the backup API from a read-only open of the file and lives in a
+    named shared-cache in-memory database, so any number of connections can be opened and closed
+    against it while an anchor connection keeps it alive. The anchor also attaches the file
+    read-only as 'disk', from which rows written to the file are copied into the mirror.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.uri = f"file:leetcode-mirror-{os.getpid()}-{id(self)}?mode=memory&cache=shared"
+        self._anchor = sqlite3.connect(self.uri, uri=True)
+        self._columns: Dict[str, List[str]] = {}
+        self.load()
+        self._anchor.execute('ATTACH DATABASE ? AS disk', (read_only_uri(db_path),))
+
+    def load(self) -> None:
+        """
+        Copy the whole database file into the mirror, replacing its contents.
+        """
+        with profiler.span('db_mirror.load'):
+            source = sqlite3.connect(read_only_uri(self.db_path), uri=True)
+            try:
+                source.backup(self._anchor)
+            finally:
+                source.close()
+        self._columns.clear()
+        logger.debug(f"Loaded '{self.db_path}' into an in-memory mirror.")
+
+    def connect(self) -> sqlite3.Connection:
+        """
+        Returns:
+            sqlite3.Connection: A new connection to the mirror. Writes through it would not reach
+                the file; read-only callers only.
+        """
+        return sqlite3.connect(self.uri, uri=True, factory=sql_trace.connection_factory())
+
+    def _table_columns(self, table: str) -> List[str]:
+        columns = self._columns.get(table)
+        if columns is None:
+            columns = self._columns[table] = [
+                row[1] for row in self._anchor.execute(f'PRAGMA main.table_info({table})').fetchall()
+            ]
+        return columns
+
+    def sync_rows(self, table: str, key_column: Optional[str] = None, keys: Sequence[object] = ()) -> None:
+        """
+        Copy rows written to the file into the mirror.
+
+        Rows are upserted, so triggers in the mirror (such as the due-count histogram's) see the
+        same changes they saw on disk; keys no longer present on disk are deleted.
+
+        Parameters:
+            table (str): Table that was written.
+            key_column (Optional[str]): Primary key column; None copies the whole table.
+            keys (Sequence[object]): Key values of the written rows.
+        """
+        conn = self._anchor
+        with conn:
+            if key_column is None:
+                conn.execute(f'DELETE FROM main.{table}')
+                conn.execute(f'INSERT INTO main.{table} SELECT * FROM disk.{table}')
+                return
+            if not keys:
+                return
+            columns = self._table_columns(table)
+            column_list = ', '.join(columns)
+            placeholders = ', '.join('?' * len(keys))
+            updates = ', '.join(f"{column} = excluded.{column}" for column in columns if column != key_column)
+            conn.execute(f'''
+                INSERT INTO main.{table} ({column_list})
+                SELECT {column_list} FROM disk.{table} WHERE {key_column} IN ({placeholders})
+                ON CONFLICT({key_column}) DO UPDATE SET {updates}
+            ''', list(keys))
+            conn.execute(f'''
+                DELETE FROM main.{table}
+                WHERE {key_column} IN ({placeholders})
+                  AND {key_column} NOT IN (SELECT {key_column} FROM disk.{table} WHERE {key_column} IN ({placeholders}))
+            ''', list(keys) * 2)
+
+    def close(self) -> None:
+        """
+        Drop the mirror.
+        """
+        self._anchor.close()
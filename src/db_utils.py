@@ -1,30 +1,281 @@
+import configparser
+import random
 import sqlite3
+import time
 from contextlib import contextmanager
-from typing import Generator, Dict, Any
+from typing import Callable, Generator, Dict, Any, List, NamedTuple, Optional, Set, Tuple, TypeVar
+import migrations
+import sql_trace
+from db_mirror import DatabaseMirror
 from logger import get_logger
 
 logger = get_logger(__name__, 'database.log')
 
+T = TypeVar('T')
+
+# Per-connection pragmas that may be set in the [Database] section of config.ini (see `db tune`).
+CONNECTION_PRAGMAS = ('cache_size', 'mmap_size')
+
+_connection_pragmas: Optional[List[Tuple[str, int]]] = None
+
+
+class ConcurrencySettings(NamedTuple):
+    """
+    Locking settings from the [Database] section of config.ini.
+
+    busy_timeout_ms is how long a statement waits for another process's lock before failing;
+    write transactions that still fail with a lock error are retried up to write_retries times
+    after a random delay of up to retry_base_ms * 2**attempt (capped at retry_max_ms).
+    """
+    journal_mode: str = 'wal'
+    busy_timeout_ms: int = 5000
+    write_retries: int = 5
+    retry_base_ms: int = 50
+    retry_max_ms: int = 2000
+
+
+_concurrency: Optional[ConcurrencySettings] = None
+
+# Databases whose journal mode was already set in this process.
+_journal_checked: Set[str] = set()
+
+# Databases already brought to the latest schema version in this process.
+_migrated: Set[str] = set()
+
+# In-memory mirrors serving read-only connections, by database path ([Database] mirror or --mirror).
+_mirror_enabled: Optional[bool] = None
+_mirrors: Dict[str, DatabaseMirror] = {}
+
+def load_connection_pragmas(config_path: str = 'config.ini') -> List[Tuple[str, int]]:
+    """
+    Read per-connection pragma settings from config.ini.
+
+    Parameters:
+        config_path (str): Path to the configuration file.
+
+    Returns:
+        List[Tuple[str, int]]: (pragma, value) pairs that are configured.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    pragmas: List[Tuple[str, int]] = []
+    for name in CONNECTION_PRAGMAS:
+        value = config.get('Database', name, fallback=None)
+        if value is None or not value.strip():
+            continue
+        try:
+            pragmas.append((name, int(value)))
+        except ValueError:
+            logger.warning(f"Ignoring non-integer [Database] {name} = {value!r} in {config_path}.")
+    return pragmas
+
+def load_concurrency_settings(config_path: str = 'config.ini') -> ConcurrencySettings:
+    """
+    Parameters:
+        config_path (str): Path to the configuration file.
+
+    Returns:
+        ConcurrencySettings: Configured settings, with defaults for missing keys.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    defaults = ConcurrencySettings()
+    return ConcurrencySettings(
+        journal_mode=config.get('Database', 'journal_mode', fallback=defaults.journal_mode).strip().lower(),
+        busy_timeout_ms=config.getint('Database', 'busy_timeout_ms', fallback=defaults.busy_timeout_ms),
+        write_retries=config.getint('Database', 'write_retries', fallback=defaults.write_retries),
+        retry_base_ms=config.getint('Database', 'retry_base_ms', fallback=defaults.retry_base_ms),
+        retry_max_ms=config.getint('Database', 'retry_max_ms', fallback=defaults.retry_max_ms)
+    )
+
+def concurrency_settings() -> ConcurrencySettings:
+    """
+    Returns:
+        ConcurrencySettings: The settings from config.ini, read once per process.
+    """
+    global _concurrency
+    if _concurrency is None:
+        _concurrency = load_concurrency_settings()
+    return _concurrency
+
+def is_lock_error(error: sqlite3.Error) -> bool:
+    """
+    Parameters:
+        error (sqlite3.Error): Error raised by sqlite3.
+
+    Returns:
+        bool: True if the statement failed because another connection holds a lock.
+    """
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error).lower()
+    return 'database is locked' in message or 'database is busy' in message or 'database table is locked' in message
+
+def run_with_retry(operation: Callable[[], T], description: str) -> T:
+    """
+    Run a write transaction, retrying it with jittered exponential backoff when it fails because
+    another process holds the database lock. The operation must roll back on failure and be safe
+    to run again from the start.
+
+    Parameters:
+        operation (Callable[[], T]): The whole transaction, from opening a connection to commit.
+        description (str): Name used in log messages.
+
+    Returns:
+        T: The operation's result.
+
+    Raises:
+        sqlite3.OperationalError: If the lock is still held after the last retry.
+    """
+    settings = concurrency_settings()
+    attempt = 0
+    while True:
+        try:
+            return operation()
+        except sqlite3.OperationalError as e:
+            if not is_lock_error(e) or attempt >= settings.write_retries:
+                raise
+            # Full jitter: concurrent writers that failed together do not retry together.
+            delay_ms = random.uniform(0, min(settings.retry_max_ms, settings.retry_base_ms * 2 ** attempt))
+            attempt += 1
+            logger.warning(f"{description}: {e}; retry {attempt}/{settings.write_retries} in {delay_ms:.0f} ms.")
+            time.sleep(delay_ms / 1000.0)
+
+def _set_journal_mode(conn: sqlite3.Connection, db_path: str, mode: str) -> None:
+    current = conn.execute('PRAGMA journal_mode').fetchone()[0]
+    if current.lower() == mode or mode in ('', 'default'):
+        return
+    try:
+        # Persistent for WAL: stored in the file, so this only runs once per database.
+        conn.execute(f'PRAGMA journal_mode = {mode}')
+        logger.info(f"Switched '{db_path}' from journal_mode {current} to {mode}.")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Could not switch '{db_path}' to journal_mode {mode}: {e}")
+
+def enable_mirror(enabled: bool = True) -> None:
+    """
+    Serve read-only connections from an in-memory mirror of the database, overriding config.ini.
+
+    Parameters:
+        enabled (bool): Whether mirroring is on.
+    """
+    global _mirror_enabled
+    _mirror_enabled = enabled
+    if not enabled:
+        while _mirrors:
+            _mirrors.popitem()[1].close()
+
+def mirror_enabled(config_path: str = 'config.ini') -> bool:
+    """
+    Returns:
+        bool: True if read-only connections are served from a mirror.
+    """
+    global _mirror_enabled
+    if _mirror_enabled is None:
+        config = configparser.ConfigParser()
+        config.read(config_path)
+        _mirror_enabled = config.getboolean('Database', 'mirror', fallback=False)
+    return _mirror_enabled
+
+def _get_mirror(db_path: str) -> DatabaseMirror:
+    mirror = _mirrors.get(db_path)
+    if mirror is None:
+        if db_path not in _migrated:
+            # Migrations run on the file before it is copied, since the mirror is never written back.
+            open_connection(db_path).close()
+        mirror = _mirrors[db_path] = DatabaseMirror(db_path)
+        logger.info(f"Serving reads of '{db_path}' from an in-memory mirror.")
+    return mirror
+
+def sync_mirror(db_path: str, table: str, key_column: Optional[str] = None, keys: Tuple[Any, ...] = ()) -> None:
+    """
+    Apply rows just committed to the database file to its mirror, if there is one.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        table (str): Table that was written.
+        key_column (Optional[str]): Primary key column; None copies the whole table.
+        keys (Tuple[Any, ...]): Key values of the written rows.
+    """
+    mirror = _mirrors.get(db_path)
+    if mirror is not None:
+        mirror.sync_rows(table, key_column, keys)
+
+def reload_mirror(db_path: str) -> None:
+    """
+    Reload a database's mirror, if there is one, after writes that are not tracked row by row.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+    """
+    mirror = _mirrors.get(db_path)
+    if mirror is not None:
+        mirror.load()
+
+def open_connection(db_path: str, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Open a SQLite connection with sqlite3.Row rows. Every module opens connections through here so
+    connection-wide settings (such as SQL tracing) apply uniformly. The first open of a database in
+    a process applies pending schema migrations.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        read_only (bool): The caller only reads; with mirroring on, the connection is to the
+            in-memory mirror.
+
+    Returns:
+        sqlite3.Connection: The open connection.
+    """
+    if read_only and db_path != ':memory:' and mirror_enabled():
+        conn = _get_mirror(db_path).connect()
+        conn.row_factory = sqlite3.Row
+        sql_trace.attach(conn)
+        return conn
+    settings = concurrency_settings()
+    conn = sqlite3.connect(db_path, timeout=settings.busy_timeout_ms / 1000.0, factory=sql_trace.connection_factory())
+    conn.row_factory = sqlite3.Row
+    global _connection_pragmas
+    if _connection_pragmas is None:
+        _connection_pragmas = load_connection_pragmas()
+    for name, value in _connection_pragmas:
+        conn.execute(f'PRAGMA {name} = {value}')
+    if db_path not in _journal_checked and db_path != ':memory:':
+        _set_journal_mode(conn, db_path, settings.journal_mode)
+        _journal_checked.add(db_path)
+    if db_path not in _migrated and db_path != ':memory:':
+        try:
+            if migrations.ensure_current(conn):
+                _migrated.add(db_path)
+        except sqlite3.Error:
+            conn.close()
+            raise
+    sql_trace.attach(conn)
+    return conn
+
 @contextmanager
-def db_cursor(db_path: str) -> Generator[sqlite3.Cursor, None, None]:
+def db_cursor(db_path: str, immediate: bool = False) -> Generator[sqlite3.Cursor, None, None]:
     """
     Context manager for SQLite database cursor.
     
     Parameters:
         db_path (str): Path to the SQLite database file.
+        immediate (bool): Take the write lock when the transaction starts (BEGIN IMMEDIATE), so a
+            transaction that reads before writing waits for other writers instead of failing.
     
     Yields:
         sqlite3.Cursor: Database cursor object.
     """
     conn = None
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = open_connection(db_path)
         conn.execute('PRAGMA foreign_keys = ON;')
         cursor = conn.cursor()
+        if immediate:
+            cursor.execute('BEGIN IMMEDIATE')
         yield cursor
         conn.commit()
         logger.debug("Transaction committed successfully.")
+        reload_mirror(db_path)
     except sqlite3.Error as e:
         if conn:
             conn.rollback()
@@ -0,0 +1,124 @@
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from prettytable import PrettyTable
+from logger import get_logger
+
+logger = get_logger(__name__, 'generation_cache.log')
+
+T = TypeVar('T')
+
+# Sentinel for "use the cache's default TTL"; None means the entry never expires by age.
+DEFAULT_TTL = object()
+
+
+class CacheStats:
+    """
+    Hit/miss counters for one cache entry name.
+    """
+    __slots__ = ('hits', 'misses', 'stale', 'expired')
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.expired = 0
+
+
+class GenerationCache:
+    """
+    Memoizes derived values under a generation counter.
+
+    Every write path calls bump(), which makes all entries computed under an older generation
+    stale without touching them. Entries can also carry a TTL so that writes made by other
+    processes (which cannot bump this counter) are picked up after a bounded delay.
+    """
+
+    def __init__(self, default_ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Parameters:
+            default_ttl (Optional[float]): Seconds an entry stays valid; None means no age limit.
+            clock (Callable[[], float]): Monotonic time source, in seconds.
+        """
+        self.generation: int = 0
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries: Dict[str, Tuple[int, Optional[float], Any]] = {}
+        self.stats: Dict[str, CacheStats] = {}
+
+    def bump(self, reason: str = '') -> int:
+        """
+        Invalidate every entry computed so far.
+
+        Parameters:
+            reason (str): Write path responsible, for debug logging.
+
+        Returns:
+            int: The new generation.
+        """
+        self.generation += 1
+        logger.debug("Cache generation bumped to %d (%s).", self.generation, reason or 'unspecified')
+        return self.generation
+
+    def get(self, name: str, compute: Callable[[], T], ttl: Any = DEFAULT_TTL) -> T:
+        """
+        Return the cached value for name, computing it if missing, stale or expired.
+
+        Parameters:
+            name (str): Entry name.
+            compute (Callable[[], T]): Function producing the value.
+            ttl (Optional[float]): Seconds the value stays valid; defaults to default_ttl.
+
+        Returns:
+            T: The value.
+        """
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = CacheStats()
+
+        entry = self._entries.get(name)
+        if entry is not None:
+            generation, expires_at, value = entry
+            if generation != self.generation:
+                stats.stale += 1
+            elif expires_at is not None and self._clock() >= expires_at:
+                stats.expired += 1
+            else:
+                stats.hits += 1
+                return value
+
+        stats.misses += 1
+        value = compute()
+        if ttl is DEFAULT_TTL:
+            ttl = self.default_ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._entries[name] = (self.generation, expires_at, value)
+        return value
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        Drop one entry, or all entries if name is None, without changing the generation.
+
+        Parameters:
+            name (Optional[str]): Entry to drop.
+        """
+        if name is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(name, None)
+
+    def render_report(self) -> PrettyTable:
+        """
+        Build a table of hit/miss counters per entry.
+
+        Returns:
+            PrettyTable: The report.
+        """
+        table = PrettyTable()
+        table.field_names = ["Entry", "Hits", "Misses", "Stale", "Expired"]
+        table.align["Entry"] = "l"
+        for name in sorted(self.stats):
+            stats = self.stats[name]
+            table.add_row([name, stats.hits, stats.misses, stats.stale, stats.expired])
+        table.title = f"Scheduler cache (generation {self.generation})"
+        return table
@@ -4,10 +4,39 @@ import click
 import logging
 import json
 from typing import List, Dict, Any, Optional
+import profiler
+import result_cache
+from db_utils import open_connection
 from logger import get_logger
 
 logger = get_logger(__name__, 'list_problems_by_topic.log')
 
+# `problem list`: every problem with its patterns and prerequisites. Filters are appended as a
+# WHERE clause between PROBLEM_LIST_QUERY and PROBLEM_LIST_ORDER.
+PROBLEM_LIST_QUERY = '''
+    SELECT p.id, p.title, p.difficulty, t.name AS topic,
+           GROUP_CONCAT(pr.name, ', ') AS patterns,
+           p.url, p.priority, p.frequency,
+           GROUP_CONCAT(pp2.prerequisite_id, ',') AS prerequisites
+    FROM Problems p
+    JOIN Topics t ON p.topic_id = t.topic_id
+    LEFT JOIN ProblemPatterns pp ON p.id = pp.problem_id
+    LEFT JOIN Patterns pr ON pp.pattern_id = pr.pattern_id
+    LEFT JOIN ProblemPrerequisites pp2 ON p.id = pp2.problem_id
+'''
+
+PROBLEM_LIST_ORDER = '''
+    GROUP BY p.id
+    ORDER BY p.priority ASC,
+             CASE p.difficulty
+                 WHEN 'Easy' THEN 1
+                 WHEN 'Medium' THEN 2
+                 WHEN 'Hard' THEN 3
+                 ELSE 4
+             END ASC,
+             t.name ASC
+'''
+
 def fetch_topic_id(cursor: sqlite3.Cursor, topic: str) -> Optional[int]:
     """
     Fetch the topic ID for a given topic name.
@@ -99,6 +128,28 @@ def render_json(problems: List[Dict[str, Any]]) -> str:
     """
     return json.dumps(problems, indent=4)
 
+def load_problems_by_topic(topic: str, db_path: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Look up a topic and fetch its problems over one connection.
+
+    Parameters:
+        topic (str): The name of the topic.
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: The problems, or None if the topic does not exist.
+    """
+    with profiler.span('list_by_topic.connect'):
+        conn = open_connection(db_path, read_only=True)
+    with conn:
+        cursor = conn.cursor()
+        with profiler.span('list_by_topic.topic_lookup'):
+            topic_id = fetch_topic_id(cursor, topic)
+        if topic_id is None:
+            return None
+        with profiler.span('list_by_topic.problem_query'):
+            return fetch_problems_by_topic(cursor, topic_id)
+
 def get_problems_by_topic(topic: str, db_path: str = 'leetcode_mastery.db', output_format: str = 'table') -> None:
     """
     Core function to get and render problems by topic.
@@ -111,23 +162,18 @@ def get_problems_by_topic(topic: str, db_path: str = 'leetcode_mastery.db', outp
     logger.info(f"Listing problems for topic '{topic}' from database '{db_path}' with format '{output_format}'.")
 
     try:
-        with sqlite3.connect(db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-
-            # Fetch topic ID
-            topic_id = fetch_topic_id(cursor, topic)
-            if topic_id is None:
-                click.echo(f"❌ Topic '{topic}' does not exist in the database.")
-                return
-
-            # Fetch problems
-            problems = fetch_problems_by_topic(cursor, topic_id)
-            if not problems:
-                click.echo(f"ℹ️ No problems found for topic: {topic}")
-                return
-
-            # Render output
+        problems = result_cache.cached(
+            'list-problems-by-topic', (topic.lower(),), db_path, lambda: load_problems_by_topic(topic, db_path)
+        )
+        if problems is None:
+            click.echo(f"❌ Topic '{topic}' does not exist in the database.")
+            return
+        if not problems:
+            click.echo(f"ℹ️ No problems found for topic: {topic}")
+            return
+
+        # Render output
+        with profiler.span('list_by_topic.render'):
             if output_format.lower() == 'table':
                 table = render_table(problems)
                 print(table)
@@ -147,11 +193,19 @@ def get_problems_by_topic(topic: str, db_path: str = 'leetcode_mastery.db', outp
 @click.option('--db-path', default='leetcode_mastery.db', show_default=True, help='Path to the SQLite database file.')
 @click.option('--output-format', default='table', type=click.Choice(['table', 'json'], case_sensitive=False),
               show_default=True, help='Output format: table (default) or JSON.')
-def list_problems_by_topic_cli(topic: str, db_path: str, output_format: str) -> None:
+@click.option('--profile', is_flag=True, default=False, help='Print a per-stage timing breakdown.')
+@click.option('--profile-trace', default=None, help='Also write Chrome trace-event JSON to this file.')
+@click.option('--no-cache', is_flag=True, default=False, help='Recompute instead of reusing a cached result.')
+def list_problems_by_topic_cli(topic: str, db_path: str, output_format: str, profile: bool, profile_trace: Optional[str], no_cache: bool) -> None:
     """
     Click command to list problems by topic.
     """
+    if profile or profile_trace:
+        profiler.enable()
+    if no_cache:
+        result_cache.disable()
     get_problems_by_topic(topic, db_path, output_format)
+    profiler.finish(profile_trace)
 
 if __name__ == "__main__":
     list_problems_by_topic_cli()
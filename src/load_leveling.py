@@ -0,0 +1,238 @@
+import datetime
+import sqlite3
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__, 'load_leveling.log')
+
+# Estimated minutes for a problem without recorded time (no attempts, or time_spent never entered).
+DEFAULT_MINUTES_PER_PROBLEM = 30
+
+
+def _estimated_minutes_sql(alias: str) -> str:
+    """
+    SQL expression for the expected minutes of one review: the average recorded time per attempt,
+    rounded up, or DEFAULT_MINUTES_PER_PROBLEM when nothing was recorded.
+    """
+    return (
+        f"CASE WHEN {alias}.attempts > 0 AND {alias}.time_spent > 0 "
+        f"THEN ({alias}.time_spent + {alias}.attempts - 1) / {alias}.attempts "
+        f"ELSE {DEFAULT_MINUTES_PER_PROBLEM} END"
+    )
+
+
+def estimated_minutes(attempts: int, time_spent: int) -> int:
+    """
+    Python counterpart of the histogram's per-review estimate.
+
+    Parameters:
+        attempts (int): Attempts so far.
+        time_spent (int): Total minutes recorded.
+
+    Returns:
+        int: Expected minutes of the next review.
+    """
+    if attempts > 0 and time_spent > 0:
+        return (time_spent + attempts - 1) // attempts
+    return DEFAULT_MINUTES_PER_PROBLEM
+
+
+def _add_sql(alias: str) -> str:
+    return f'''
+        INSERT INTO DueCounts (due_date, problems, minutes)
+        SELECT date({alias}.next_due), 1, {_estimated_minutes_sql(alias)}
+        WHERE {alias}.next_due IS NOT NULL
+        ON CONFLICT(due_date) DO UPDATE SET
+            problems = problems + 1,
+            minutes = minutes + excluded.minutes;
+    '''
+
+
+def _remove_sql(alias: str) -> str:
+    return f'''
+        UPDATE DueCounts
+        SET problems = problems - 1, minutes = minutes - ({_estimated_minutes_sql(alias)})
+        WHERE due_date = date({alias}.next_due);
+        DELETE FROM DueCounts WHERE due_date = date({alias}.next_due) AND problems <= 0;
+    '''
+
+
+# Per-day count of scheduled reviews, kept in step with UserProgress by triggers so that load
+# queries read a handful of rows from the primary key instead of scanning UserProgress.
+DUE_HISTOGRAM_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS DueCounts (
+        due_date TEXT PRIMARY KEY,
+        problems INTEGER NOT NULL DEFAULT 0,
+        minutes INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID''',
+    f'''CREATE TRIGGER IF NOT EXISTS trg_due_counts_insert
+        AFTER INSERT ON UserProgress
+        BEGIN {_add_sql('NEW')} END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trg_due_counts_update
+        AFTER UPDATE OF next_due, attempts, time_spent ON UserProgress
+        BEGIN {_remove_sql('OLD')} {_add_sql('NEW')} END''',
+    f'''CREATE TRIGGER IF NOT EXISTS trg_due_counts_delete
+        AFTER DELETE ON UserProgress
+        BEGIN {_remove_sql('OLD')} END''',
+)
+
+DUE_HISTOGRAM_OBJECTS = ('DueCounts', 'trg_due_counts_insert', 'trg_due_counts_update', 'trg_due_counts_delete')
+
+
+class DayLoad(NamedTuple):
+    """
+    Reviews scheduled on one day.
+    """
+    problems: int
+    minutes: int
+
+
+class Capacity(NamedTuple):
+    """
+    Daily review capacity from the [Capacity] section of config.ini. A limit of 0 means unlimited.
+    """
+    problems: int = 0
+    minutes: int = 0
+    tolerance: float = 0.15
+    max_shift_days: int = 7
+
+    @property
+    def enabled(self) -> bool:
+        return self.problems > 0 or self.minutes > 0
+
+
+def ensure_due_histogram(conn: sqlite3.Connection) -> None:
+    """
+    Create the DueCounts table and its triggers if missing, populating it from UserProgress when
+    it is first created.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'DueCounts'"
+    ).fetchone()
+    for statement in DUE_HISTOGRAM_SCHEMA:
+        conn.execute(statement)
+    if not exists:
+        rebuild_due_histogram(conn)
+        logger.info("Created due-count histogram 'DueCounts'.")
+
+
+def rebuild_due_histogram(conn: sqlite3.Connection) -> None:
+    """
+    Recompute DueCounts from UserProgress.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+    """
+    conn.execute('DELETE FROM DueCounts')
+    conn.execute(f'''
+        INSERT INTO DueCounts (due_date, problems, minutes)
+        SELECT date(up.next_due), COUNT(*), SUM({_estimated_minutes_sql('up')})
+        FROM UserProgress up
+        WHERE up.next_due IS NOT NULL
+        GROUP BY date(up.next_due)
+    ''')
+
+
+def fetch_load(conn: sqlite3.Connection, start: datetime.date, end: datetime.date) -> Dict[str, DayLoad]:
+    """
+    Read the scheduled load for a range of days.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+        start (datetime.date): First day, inclusive.
+        end (datetime.date): Last day, inclusive.
+
+    Returns:
+        Dict[str, DayLoad]: Load by ISO date; days without reviews are omitted.
+    """
+    rows = conn.execute(
+        'SELECT due_date, problems, minutes FROM DueCounts WHERE due_date BETWEEN ? AND ?',
+        (start.isoformat(), end.isoformat())
+    ).fetchall()
+    return {row[0]: DayLoad(row[1], row[2]) for row in rows}
+
+
+def fetch_overdue(conn: sqlite3.Connection, today: datetime.date) -> DayLoad:
+    """
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+        today (datetime.date): Reference date.
+
+    Returns:
+        DayLoad: Total load of reviews due before today.
+    """
+    row = conn.execute(
+        'SELECT COALESCE(SUM(problems), 0), COALESCE(SUM(minutes), 0) FROM DueCounts WHERE due_date < ?',
+        (today.isoformat(),)
+    ).fetchone()
+    return DayLoad(row[0], row[1])
+
+
+def shift_window(interval_days: int, capacity: Capacity) -> int:
+    """
+    Parameters:
+        interval_days (int): Ideal interval in days.
+        capacity (Capacity): Capacity settings.
+
+    Returns:
+        int: Days the due date may move either way; short intervals are not moved.
+    """
+    return max(0, min(capacity.max_shift_days, int(interval_days * capacity.tolerance)))
+
+
+def utilization(load: DayLoad, capacity: Capacity) -> float:
+    """
+    Fraction of the daily capacity used, taking the tighter of the two limits.
+    """
+    used = 0.0
+    if capacity.problems > 0:
+        used = max(used, load.problems / capacity.problems)
+    if capacity.minutes > 0:
+        used = max(used, load.minutes / capacity.minutes)
+    return used
+
+
+def level_due_date(
+    ideal: datetime.date,
+    today: datetime.date,
+    load: Mapping[str, DayLoad],
+    capacity: Capacity,
+    minutes: int = DEFAULT_MINUTES_PER_PROBLEM
+) -> datetime.date:
+    """
+    Choose the least-loaded day within the tolerance window around the ideal due date.
+
+    Days are compared by utilization after adding this review; ties go to the day closest to the
+    ideal date, and earlier days win ties at equal distance.
+
+    Parameters:
+        ideal (datetime.date): Due date chosen by the scheduling strategy.
+        today (datetime.date): Date of the attempt; the result is always after it.
+        load (Mapping[str, DayLoad]): Current load by ISO date covering the window.
+        capacity (Capacity): Capacity settings.
+        minutes (int): Expected minutes of this review.
+
+    Returns:
+        datetime.date: The leveled due date.
+    """
+    window = shift_window((ideal - today).days, capacity)
+    if not capacity.enabled or window == 0:
+        return ideal
+
+    best: Optional[Tuple[float, int, int]] = None
+    best_day = ideal
+    for offset in range(-window, window + 1):
+        day = ideal + datetime.timedelta(days=offset)
+        if day <= today:
+            continue
+        current = load.get(day.isoformat(), DayLoad(0, 0))
+        key = (utilization(DayLoad(current.problems + 1, current.minutes + minutes), capacity), abs(offset), offset)
+        if best is None or key < best:
+            best, best_day = key, day
+    if best_day != ideal:
+        logger.debug("Leveled due date %s -> %s.", ideal, best_day)
+    return best_day
@@ -1,30 +1,148 @@
+import atexit
+import configparser
 import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Optional, Set, Tuple
 
-def get_logger(name: str, log_file: str) -> logging.Logger:
+APP_LOGGER_NAME = 'leetcode'
+
+# Overrides [Logging] log_file when set; an empty value turns the log file off.
+LOG_FILE_ENV_VAR = 'LEETCODE_LOG_FILE'
+
+DEFAULT_SETTINGS: Dict[str, str] = {
+    'level': 'INFO',
+    'log_file': 'leetcode_mastery.log',
+    'max_bytes': '1048576',
+    'backup_count': '3',
+}
+
+_listener: Optional[QueueListener] = None
+_setup_lock = threading.Lock()
+_emitted_once: Set[Tuple[str, Any]] = set()
+
+
+def load_logging_settings(config_path: str = 'config.ini') -> Dict[str, str]:
+    """
+    Read the [Logging] section of config.ini, falling back to defaults for missing keys. The
+    LEETCODE_LOG_FILE environment variable, if set, takes precedence over log_file.
+
+    Parameters:
+        config_path (str): Path to the configuration file.
+
+    Returns:
+        Dict[str, str]: Logging settings.
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    if 'Logging' in config:
+        settings.update({key: value for key, value in config['Logging'].items() if key in settings})
+    if LOG_FILE_ENV_VAR in os.environ:
+        settings['log_file'] = os.environ[LOG_FILE_ENV_VAR]
+    return settings
+
+
+def _configure() -> None:
+    """
+    Attach a single QueueHandler to the application logger and start a QueueListener that
+    writes to the console and one rotating log file on a background thread. The file path is
+    made absolute here, so a later change of working directory does not move it.
+    """
+    global _listener
+    settings = load_logging_settings()
+    level = logging.getLevelName(settings['level'].upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    handlers = [console_handler]
+    if settings['log_file']:
+        file_handler = RotatingFileHandler(
+            os.path.abspath(settings['log_file']),
+            maxBytes=int(settings['max_bytes']),
+            backupCount=int(settings['backup_count']),
+            delay=True
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    app_logger = logging.getLogger(APP_LOGGER_NAME)
+    app_logger.setLevel(level)
+    app_logger.propagate = False
+    app_logger.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def configure_worker_logging() -> None:
+    """
+    Make the application logger write straight to stderr in a worker process. Workers inherit or
+    re-create the QueueHandler, but not a listener thread draining it into the shared log file, so
+    their records would otherwise be lost. Pass as `initializer=` to process pools.
+    """
+    level = logging.getLevelName(load_logging_settings()['level'].upper())
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    get_logger(__name__)  # Set up first, so a later get_logger call does not put the QueueHandler back.
+    app_logger = logging.getLogger(APP_LOGGER_NAME)
+    for existing in list(app_logger.handlers):
+        app_logger.removeHandler(existing)
+    app_logger.addHandler(handler)
+    app_logger.setLevel(level if isinstance(level, int) else logging.INFO)
+
+
+def shutdown_logging() -> None:
+    """
+    Flush queued records and stop the background listener. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str, log_file: Optional[str] = None) -> logging.Logger:
     """
-    Configures and returns a logger with console and file handlers.
-    
+    Returns a module logger that feeds the shared, non-blocking logging pipeline.
+
     Parameters:
         name (str): Name of the logger.
-        log_file (str): File path for the log file.
-    
+        log_file (Optional[str]): Ignored; kept for compatibility. All modules log to the single
+            rotating file configured in the [Logging] section of config.ini.
+
     Returns:
         logging.Logger: Configured logger.
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
-    
-    if not logger.handlers:
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-        
-        # File handler
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
-    return logger
+    if _listener is None:
+        with _setup_lock:
+            if _listener is None:
+                _configure()
+    return logging.getLogger(f"{APP_LOGGER_NAME}.{name}")
+
+
+def log_once(logger: logging.Logger, level: int, key: Any, msg: str, *args: Any) -> None:
+    """
+    Emit a %-style message only the first time a given key is seen in this process.
+
+    Parameters:
+        logger (logging.Logger): Logger to emit on.
+        level (int): Logging level.
+        key (Any): Deduplication key, scoped to the logger name.
+        msg (str): %-style format string.
+        *args (Any): Format arguments.
+    """
+    dedup_key = (logger.name, key)
+    if dedup_key in _emitted_once:
+        return
+    _emitted_once.add(dedup_key)
+    logger.log(level, msg, *args)
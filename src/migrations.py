@@ -0,0 +1,182 @@
+import sqlite3
+from typing import Callable, List, NamedTuple, Optional
+
+from catalog_snapshot import create_catalog_meta
+from load_leveling import ensure_due_histogram
+from logger import get_logger
+from reschedule import create_scheduling_meta
+from similarity import ensure_similar_problems
+from scheduling_strategies import ensure_memory_columns
+from topic_ratings import ensure_topic_ratings
+from weight_registry import create_weights_table
+
+logger = get_logger(__name__, 'migrations.log')
+
+
+class Migration(NamedTuple):
+    """
+    One numbered schema change. apply must be idempotent: a database created by db_init already
+    has the change, and a step interrupted by a crash is rolled back and retried.
+    """
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+
+
+class MigrationError(sqlite3.DatabaseError):
+    """
+    Raised when a migration step fails; the step is rolled back and user_version is unchanged.
+    """
+
+
+class MigrationStatus(NamedTuple):
+    """
+    Schema version of a database compared with the migrations this code knows.
+    """
+    current: int
+    latest: int
+    pending: List[Migration]
+
+
+def _create_index(sql: str) -> Callable[[sqlite3.Connection], None]:
+    def apply(conn: sqlite3.Connection) -> None:
+        conn.execute(sql)
+    return apply
+
+
+def _create_catalog_meta(conn: sqlite3.Connection) -> None:
+    create_catalog_meta(conn.cursor())
+
+
+# Append only: never renumber or edit a released step, add a new one instead. Index builds are
+# separate steps so each commits on its own and a large database is upgraded in short transactions.
+MIGRATIONS: List[Migration] = [
+    Migration(1, 'UserProgress memory-model columns', ensure_memory_columns),
+    Migration(2, 'Due-count histogram and triggers', ensure_due_histogram),
+    Migration(3, 'CatalogMeta version counter', _create_catalog_meta),
+    Migration(4, 'Index UserProgress(next_due)',
+              _create_index('CREATE INDEX IF NOT EXISTS idx_userprogress_next_due ON UserProgress(next_due)')),
+    Migration(5, 'Index UserProgress(last_attempt)',
+              _create_index('CREATE INDEX IF NOT EXISTS idx_userprogress_last_attempt ON UserProgress(last_attempt)')),
+    Migration(6, 'SchedulingMeta policy hash', create_scheduling_meta),
+    Migration(7, 'SimilarProblems and SimilarBuckets similarity index', ensure_similar_problems),
+    Migration(8, 'AttemptLog, problem rating index and topic ratings from history', ensure_topic_ratings),
+    Migration(9, 'Weights override table', create_weights_table),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    """
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        int: The database's PRAGMA user_version.
+    """
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def is_initialized(conn: sqlite3.Connection) -> bool:
+    """
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        bool: True if db_init has created the tables; migrations only apply to such databases.
+    """
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'UserProgress'"
+    ).fetchone() is not None
+
+
+def migration_status(conn: sqlite3.Connection) -> MigrationStatus:
+    """
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        MigrationStatus: Current version, latest version and the steps not yet applied.
+    """
+    current = schema_version(conn)
+    return MigrationStatus(current, LATEST_VERSION, [m for m in MIGRATIONS if m.version > current])
+
+
+def migrate(conn: sqlite3.Connection, target: Optional[int] = None) -> List[Migration]:
+    """
+    Apply pending migrations in order, each in its own IMMEDIATE transaction that also sets
+    user_version, so a failed or interrupted step leaves the database at the previous version.
+
+    Concurrent processes are safe: the version is re-read after the write lock is taken and
+    steps another process has applied meanwhile are skipped.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection with no transaction in progress.
+        target (Optional[int]): Stop after this version; defaults to the latest.
+
+    Returns:
+        List[Migration]: The steps applied by this call.
+
+    Raises:
+        MigrationError: If a step fails.
+    """
+    target = LATEST_VERSION if target is None else target
+    if schema_version(conn) >= target or not is_initialized(conn):
+        return []
+
+    applied: List[Migration] = []
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # Transactions are managed explicitly below.
+    try:
+        for migration in MIGRATIONS:
+            if migration.version > target:
+                break
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                if schema_version(conn) >= migration.version:
+                    conn.execute('COMMIT')
+                    continue
+                migration.apply(conn)
+                conn.execute(f'PRAGMA user_version = {int(migration.version)}')
+                conn.execute('COMMIT')
+            except BaseException as e:
+                # Any failure, including one in a Python-side data step, must not leave the
+                # transaction open on a connection the caller keeps using.
+                conn.rollback()
+                logger.error(f"Migration {migration.version} ({migration.description}) failed: {e}")
+                if isinstance(e, sqlite3.Error):
+                    raise MigrationError(f"Migration {migration.version} ({migration.description}) failed: {e}") from e
+                raise
+            applied.append(migration)
+            logger.info(f"Applied migration {migration.version}: {migration.description}.")
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
+
+
+def ensure_current(conn: sqlite3.Connection) -> bool:
+    """
+    Bring a database up to the latest schema version. Called by open_connection once per database
+    per process.
+
+    Parameters:
+        conn (sqlite3.Connection): Freshly opened connection.
+
+    Returns:
+        bool: True if the database is initialized and at (or past) the latest version; False if it
+            has no tables yet, so it should be checked again on a later open.
+    """
+    version = schema_version(conn)
+    if version > LATEST_VERSION:
+        logger.warning(
+            f"Database schema version {version} is newer than this code knows ({LATEST_VERSION}); "
+            "newer migrations are left in place."
+        )
+        return True
+    if version == LATEST_VERSION:
+        return True
+    if not is_initialized(conn):
+        return False
+    migrate(conn)
+    return True
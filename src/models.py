@@ -1,21 +1,255 @@
-from dataclasses import dataclass
-from typing import List, Optional
+import math
+from array import array
+from typing import Any, Dict, Iterator, List, Mapping, Optional, Sequence
+
+PROBLEM_FIELDS = (
+    'id', 'title', 'difficulty', 'topic', 'patterns', 'frequency', 'url', 'priority', 'prerequisites',
+    'attempts', 'successes', 'hints_used', 'time_spent', 'last_attempt', 'next_due', 'mastered',
+    'topic_id', 'pattern_ids', 'frequency_code', 'difficulty_rank', 'stability', 'memory_difficulty'
+)
+
 
-@dataclass
 class Problem:
-    id: int
-    title: str
-    difficulty: str
-    topic: str
-    patterns: List[str]
-    frequency: str
-    url: str
-    priority: int
-    prerequisites: List[int]
-    attempts: int = 0
-    successes: int = 0
-    hints_used: int = 0
-    time_spent: int = 0
-    last_attempt: Optional[str] = None
-    next_due: Optional[str] = None
-    mastered: bool = False
+    """
+    A single problem with its progress. Uses __slots__ instead of a per-instance __dict__.
+    """
+    __slots__ = PROBLEM_FIELDS
+
+    def __init__(
+        self,
+        id: int,
+        title: str,
+        difficulty: str,
+        topic: str,
+        patterns: List[str],
+        frequency: str,
+        url: str,
+        priority: int,
+        prerequisites: List[int],
+        attempts: int = 0,
+        successes: int = 0,
+        hints_used: int = 0,
+        time_spent: int = 0,
+        last_attempt: Optional[str] = None,
+        next_due: Optional[str] = None,
+        mastered: bool = False,
+        # Interned identifiers used by the scoring hot path; None when not loaded from the database.
+        topic_id: Optional[int] = None,
+        pattern_ids: Optional[List[int]] = None,
+        frequency_code: Optional[int] = None,
+        difficulty_rank: Optional[int] = None,
+        # Memory-model state; None until a memory-model strategy has scheduled the problem.
+        stability: Optional[float] = None,
+        memory_difficulty: Optional[float] = None
+    ):
+        self.id = id
+        self.title = title
+        self.difficulty = difficulty
+        self.topic = topic
+        self.patterns = patterns
+        self.frequency = frequency
+        self.url = url
+        self.priority = priority
+        self.prerequisites = prerequisites
+        self.attempts = attempts
+        self.successes = successes
+        self.hints_used = hints_used
+        self.time_spent = time_spent
+        self.last_attempt = last_attempt
+        self.next_due = next_due
+        self.mastered = mastered
+        self.topic_id = topic_id
+        self.pattern_ids = pattern_ids if pattern_ids is not None else []
+        self.frequency_code = frequency_code
+        self.difficulty_rank = difficulty_rank
+        self.stability = stability
+        self.memory_difficulty = memory_difficulty
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in PROBLEM_FIELDS)
+        return f"Problem({fields})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Problem):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in PROBLEM_FIELDS)
+
+
+class ProblemTable:
+    """
+    Column-oriented storage for many problems.
+
+    Numeric columns are typed arrays, repeated strings (difficulty, frequency) share one object
+    per distinct value, and topics are stored as topic_id with names held once in topic_names.
+    Patterns and prerequisites are stored in CSR form: the values of row i are
+    values[offsets[i]:offsets[i + 1]]. Missing memory-model state is stored as NaN, as are scores
+    until ProblemScheduler.get_due_problems fills them in.
+    """
+    __slots__ = (
+        'ids', 'titles', 'difficulties', 'difficulty_ranks', 'topic_ids', 'topic_names', 'frequencies',
+        'frequency_codes', 'urls', 'priorities', 'attempts', 'successes', 'hints_used', 'time_spent',
+        'last_attempts', 'next_dues', 'mastered', 'pattern_offsets', 'pattern_values', 'pattern_names',
+        'prereq_offsets', 'prereq_values', 'stabilities', 'memory_difficulties', 'scores'
+    )
+
+    def __init__(self, topic_names: Sequence[str] = (), pattern_names: Sequence[str] = ()):
+        """
+        Create an empty table.
+
+        Parameters:
+            topic_names (Sequence[str]): Topic names indexed by topic_id.
+            pattern_names (Sequence[str]): Pattern names indexed by pattern_id.
+        """
+        self.ids = array('q')
+        self.titles: List[str] = []
+        self.difficulties: List[str] = []
+        self.difficulty_ranks = array('b')
+        self.topic_ids = array('l')
+        self.topic_names = topic_names
+        self.frequencies: List[str] = []
+        self.frequency_codes = array('b')
+        self.urls: List[str] = []
+        self.priorities = array('q')
+        self.attempts = array('l')
+        self.successes = array('l')
+        self.hints_used = array('l')
+        self.time_spent = array('q')
+        self.last_attempts: List[Optional[str]] = []
+        self.next_dues: List[Optional[str]] = []
+        self.mastered = bytearray()
+        self.pattern_offsets = array('l', [0])
+        self.pattern_values = array('l')
+        self.pattern_names = pattern_names
+        self.prereq_offsets = array('l', [0])
+        self.prereq_values = array('q')
+        self.stabilities = array('d')
+        self.memory_difficulties = array('d')
+        self.scores = array('d')
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Sequence[Sequence[Any]],
+        patterns_map: Mapping[int, Sequence[int]],
+        prereqs_map: Mapping[int, Sequence[int]],
+        topic_names: Sequence[str],
+        pattern_names: Sequence[str]
+    ) -> 'ProblemTable':
+        """
+        Build a table from rows selected in the column order of ProblemScheduler.get_due_problems.
+        Columns are read positionally.
+
+        Parameters:
+            rows (Sequence[Sequence[Any]]): Database rows.
+            patterns_map (Mapping[int, Sequence[int]]): Mapping of problem_id to pattern IDs
+                (a dict or a catalog_snapshot.CsrIndex).
+            prereqs_map (Mapping[int, Sequence[int]]): Mapping of problem_id to prerequisite IDs.
+            topic_names (Sequence[str]): Topic names indexed by topic_id.
+            pattern_names (Sequence[str]): Pattern names indexed by pattern_id.
+
+        Returns:
+            ProblemTable: The populated table.
+        """
+        table = cls(topic_names, pattern_names)
+        pool: Dict[str, str] = {}
+        for (problem_id, title, difficulty, _topic, frequency, url, priority, attempts, successes,
+             hints_used, time_spent, last_attempt, next_due, mastered, _interval,
+             topic_id, difficulty_rank, frequency_code, stability, memory_difficulty) in rows:
+            table.ids.append(problem_id)
+            table.titles.append(title)
+            table.difficulties.append(pool.setdefault(difficulty, difficulty))
+            table.difficulty_ranks.append(difficulty_rank or 0)
+            table.topic_ids.append(topic_id)
+            table.frequencies.append(pool.setdefault(frequency, frequency))
+            table.frequency_codes.append(frequency_code)
+            table.urls.append(url)
+            table.priorities.append(priority)
+            table.attempts.append(attempts or 0)
+            table.successes.append(successes or 0)
+            table.hints_used.append(hints_used or 0)
+            table.time_spent.append(time_spent or 0)
+            table.last_attempts.append(last_attempt)
+            table.next_dues.append(next_due)
+            table.mastered.append(1 if mastered else 0)
+            table.pattern_values.extend(patterns_map.get(problem_id, ()))
+            table.pattern_offsets.append(len(table.pattern_values))
+            table.prereq_values.extend(prereqs_map.get(problem_id, ()))
+            table.prereq_offsets.append(len(table.prereq_values))
+            table.stabilities.append(math.nan if stability is None else stability)
+            table.memory_difficulties.append(math.nan if memory_difficulty is None else memory_difficulty)
+        table.scores = array('d', [math.nan]) * len(table.ids)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __iter__(self) -> Iterator['ProblemRow']:
+        return (ProblemRow(self, index) for index in range(len(self.ids)))
+
+    def row(self, index: int) -> 'ProblemRow':
+        """
+        Parameters:
+            index (int): Row position.
+
+        Returns:
+            ProblemRow: A lightweight view of the row.
+        """
+        return ProblemRow(self, index)
+
+    def pattern_ids_of(self, index: int) -> array:
+        return self.pattern_values[self.pattern_offsets[index]:self.pattern_offsets[index + 1]]
+
+    def prerequisites_of(self, index: int) -> array:
+        return self.prereq_values[self.prereq_offsets[index]:self.prereq_offsets[index + 1]]
+
+
+def _optional_float(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+class ProblemRow:
+    """
+    Read-only view of one ProblemTable row exposing the same attributes as Problem.
+    """
+    __slots__ = ('table', 'index')
+
+    def __init__(self, table: ProblemTable, index: int):
+        self.table = table
+        self.index = index
+
+    id = property(lambda self: self.table.ids[self.index])
+    title = property(lambda self: self.table.titles[self.index])
+    difficulty = property(lambda self: self.table.difficulties[self.index])
+    difficulty_rank = property(lambda self: self.table.difficulty_ranks[self.index] or None)
+    topic_id = property(lambda self: self.table.topic_ids[self.index])
+    topic = property(lambda self: self.table.topic_names[self.table.topic_ids[self.index]])
+    frequency = property(lambda self: self.table.frequencies[self.index])
+    frequency_code = property(lambda self: self.table.frequency_codes[self.index])
+    url = property(lambda self: self.table.urls[self.index])
+    priority = property(lambda self: self.table.priorities[self.index])
+    attempts = property(lambda self: self.table.attempts[self.index])
+    successes = property(lambda self: self.table.successes[self.index])
+    hints_used = property(lambda self: self.table.hints_used[self.index])
+    time_spent = property(lambda self: self.table.time_spent[self.index])
+    last_attempt = property(lambda self: self.table.last_attempts[self.index])
+    next_due = property(lambda self: self.table.next_dues[self.index])
+    mastered = property(lambda self: bool(self.table.mastered[self.index]))
+    pattern_ids = property(lambda self: list(self.table.pattern_ids_of(self.index)))
+    patterns = property(lambda self: [self.table.pattern_names[pid] for pid in self.table.pattern_ids_of(self.index)])
+    prerequisites = property(lambda self: list(self.table.prerequisites_of(self.index)))
+    stability = property(lambda self: _optional_float(self.table.stabilities[self.index]))
+    memory_difficulty = property(lambda self: _optional_float(self.table.memory_difficulties[self.index]))
+    # Scheduler score; not part of Problem, since it depends on the weights in effect when scored.
+    score = property(lambda self: _optional_float(self.table.scores[self.index]))
+
+    def to_problem(self) -> Problem:
+        """
+        Materialize the row as a standalone Problem.
+
+        Returns:
+            Problem: A copy of the row.
+        """
+        return Problem(**{name: getattr(self, name) for name in PROBLEM_FIELDS})
+
+    def __repr__(self) -> str:
+        return f"ProblemRow(id={self.id!r}, title={self.title!r})"
@@ -1,8 +1,10 @@
 from enum import Enum
-from typing import Dict
+from typing import Dict, Optional
 from logger import get_logger
 
 logger = get_logger(__name__, 'pattern_weights.log')
+_WEIGHT_MAP: Optional[Dict[str, int]] = None
+
 class PatternWeights(Enum):
     """
     Enum representing different problem-solving patterns and their associated weights.
@@ -42,12 +44,15 @@ class PatternWeights(Enum):
     @classmethod
     def _display_name_to_weight_map(cls) -> Dict[str, int]:
         """
-        Creates a mapping from display names (in lowercase) to their weights.
+        Returns the cached mapping from display names (in lowercase) to their weights.
 
         Returns:
             Dict[str, int]: Mapping of pattern display names to weights.
         """
-        return {member.display_name.lower(): member.weight for member in cls}
+        global _WEIGHT_MAP
+        if _WEIGHT_MAP is None:
+            _WEIGHT_MAP = {member.display_name.lower(): member.weight for member in cls}
+        return _WEIGHT_MAP
 
     @classmethod
     def get_weight(cls, pattern: str, default: int = 1) -> int:
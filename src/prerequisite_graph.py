@@ -0,0 +1,279 @@
+import sqlite3
+from collections import deque
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Set
+
+from prerequisite_map import PREREQUISITE_MAP
+from catalog_snapshot import CatalogSnapshot
+from logger import get_logger
+
+logger = get_logger(__name__, 'prerequisite_graph.log')
+
+
+class Unlocks(NamedTuple):
+    """
+    Topics and problems whose prerequisites became satisfied by a mastery change.
+    """
+    topics: List[str]
+    problems: List[int]
+
+
+class PrerequisiteGraph:
+    """
+    A prerequisite DAG compiled into integer-indexed bitsets.
+
+    Every node is assigned a bit position. For each node the graph stores the bitset of its
+    direct prerequisites and the bitset of its transitive prerequisites, so checking whether a
+    node is schedulable against a mastered bitset is a single AND/compare.
+    """
+
+    def __init__(self, edges: Dict[Hashable, Iterable[Hashable]], known: Optional[Iterable[Hashable]] = None, label: str = 'node'):
+        """
+        Compile an adjacency mapping into bitsets and validate it.
+
+        Parameters:
+            edges (Dict[Hashable, Iterable[Hashable]]): Mapping of node to its direct prerequisites.
+            known (Optional[Iterable[Hashable]]): Nodes that actually exist (e.g. rows in the database).
+                Prerequisites outside this set are reported as dangling. If None, no dangling check is done.
+            label (str): Human readable node kind used in log and error messages.
+
+        Raises:
+            ValueError: If the graph contains a cycle.
+        """
+        self.label = label
+        self.index: Dict[Hashable, int] = {}
+        self.nodes: List[Hashable] = []
+
+        for node, prereqs in edges.items():
+            self._intern(node)
+            for prereq in prereqs:
+                self._intern(prereq)
+
+        size = len(self.nodes)
+        self.direct: List[int] = [0] * size
+        self.dependents: List[List[int]] = [[] for _ in range(size)]
+        for node, prereqs in edges.items():
+            idx = self.index[node]
+            for prereq in prereqs:
+                p_idx = self.index[prereq]
+                if not self.direct[idx] >> p_idx & 1:
+                    self.direct[idx] |= 1 << p_idx
+                    self.dependents[p_idx].append(idx)
+
+        self.dangling: Dict[Hashable, List[Hashable]] = {}
+        if known is not None:
+            known_set = set(known)
+            for node, prereqs in edges.items():
+                for prereq in prereqs:
+                    if prereq not in known_set:
+                        self.dangling.setdefault(prereq, []).append(node)
+            for prereq, dependents in self.dangling.items():
+                logger.warning(f"Prerequisite {label} '{prereq}' does not exist; {dependents} can never be scheduled.")
+
+        self.closure: List[int] = self._compute_closure()
+
+    def _intern(self, node: Hashable) -> int:
+        """
+        Assign a bit position to a node if it does not have one yet.
+
+        Parameters:
+            node (Hashable): The node key.
+
+        Returns:
+            int: The bit position of the node.
+        """
+        idx = self.index.get(node)
+        if idx is None:
+            idx = len(self.nodes)
+            self.index[node] = idx
+            self.nodes.append(node)
+        return idx
+
+    def _compute_closure(self) -> List[int]:
+        """
+        Compute transitive prerequisite bitsets in topological order (Kahn's algorithm).
+
+        Returns:
+            List[int]: Transitive prerequisite bitset per node index.
+
+        Raises:
+            ValueError: If the graph contains a cycle.
+        """
+        size = len(self.nodes)
+        indegree = [bin(mask).count('1') for mask in self.direct]
+        queue = deque(i for i in range(size) if indegree[i] == 0)
+        closure = [0] * size
+        visited = 0
+
+        while queue:
+            idx = queue.popleft()
+            visited += 1
+            for dep in self.dependents[idx]:
+                closure[dep] |= (1 << idx) | closure[idx]
+                indegree[dep] -= 1
+                if indegree[dep] == 0:
+                    queue.append(dep)
+
+        if visited != size:
+            cyclic = [self.nodes[i] for i in range(size) if indegree[i] > 0]
+            logger.error(f"Cycle detected among {self.label}s: {cyclic}")
+            raise ValueError(f"Prerequisite cycle detected among {self.label}s: {cyclic}")
+        return closure
+
+    def mask_of(self, nodes: Iterable[Hashable]) -> int:
+        """
+        Convert a collection of nodes into a bitset. Nodes unknown to the graph are ignored.
+
+        Parameters:
+            nodes (Iterable[Hashable]): Nodes to include.
+
+        Returns:
+            int: Bitset with one bit per known node.
+        """
+        mask = 0
+        index = self.index
+        for node in nodes:
+            idx = index.get(node)
+            if idx is not None:
+                mask |= 1 << idx
+        return mask
+
+    def can_schedule(self, node: Hashable, mastered_mask: int) -> bool:
+        """
+        Check whether all direct prerequisites of a node are contained in the mastered bitset.
+
+        Parameters:
+            node (Hashable): The node to check.
+            mastered_mask (int): Bitset of mastered nodes (see mask_of).
+
+        Returns:
+            bool: True if the node can be scheduled, False otherwise.
+        """
+        idx = self.index.get(node)
+        if idx is None:
+            return True
+        required = self.direct[idx]
+        return required & mastered_mask == required
+
+    def prerequisites(self, node: Hashable, transitive: bool = False) -> List[Hashable]:
+        """
+        List the prerequisites of a node.
+
+        Parameters:
+            node (Hashable): The node to inspect.
+            transitive (bool): If True, include indirect prerequisites.
+
+        Returns:
+            List[Hashable]: Prerequisite nodes.
+        """
+        idx = self.index.get(node)
+        if idx is None:
+            return []
+        mask = self.closure[idx] if transitive else self.direct[idx]
+        return [self.nodes[i] for i in range(mask.bit_length()) if mask >> i & 1]
+
+    def newly_unlocked(self, before_mask: int, after_mask: int) -> List[Hashable]:
+        """
+        List nodes that were blocked under before_mask and are schedulable under after_mask.
+        Only dependents of nodes whose bit changed are examined.
+
+        Parameters:
+            before_mask (int): Mastered bitset before the change.
+            after_mask (int): Mastered bitset after the change.
+
+        Returns:
+            List[Hashable]: Newly unlocked nodes, excluding nodes that are themselves mastered.
+        """
+        changed = before_mask ^ after_mask
+        candidates: Set[int] = set()
+        while changed:
+            low = changed & -changed
+            candidates.update(self.dependents[low.bit_length() - 1])
+            changed ^= low
+
+        unlocked: List[Hashable] = []
+        for idx in sorted(candidates):
+            required = self.direct[idx]
+            if after_mask >> idx & 1:
+                continue
+            if required & after_mask == required and required & before_mask != required:
+                unlocked.append(self.nodes[idx])
+        return unlocked
+
+
+class PrerequisiteEngine:
+    """
+    Topic-level and problem-level prerequisite graphs compiled from PREREQUISITE_MAP and
+    the ProblemPrerequisites table.
+    """
+
+    def __init__(self, topic_graph: PrerequisiteGraph, problem_graph: PrerequisiteGraph):
+        self.topics = topic_graph
+        self.problems = problem_graph
+
+    @classmethod
+    def from_connection(cls, conn: sqlite3.Connection) -> 'PrerequisiteEngine':
+        """
+        Compile both graphs using the topics, problems and problem edges stored in the database.
+
+        Parameters:
+            conn (sqlite3.Connection): Open database connection.
+
+        Returns:
+            PrerequisiteEngine: The compiled engine.
+        """
+        cursor = conn.cursor()
+        cursor.execute('SELECT name FROM Topics')
+        known_topics = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute('SELECT id FROM Problems')
+        known_problems = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute('SELECT problem_id, prerequisite_id FROM ProblemPrerequisites')
+        problem_edges: Dict[int, List[int]] = {}
+        for problem_id, prereq_id in cursor.fetchall():
+            problem_edges.setdefault(problem_id, []).append(prereq_id)
+
+        topic_graph = PrerequisiteGraph(PREREQUISITE_MAP, known_topics, label='topic')
+        problem_graph = PrerequisiteGraph(problem_edges, known_problems, label='problem')
+        logger.debug("Compiled prerequisite graphs: %d topics, %d problems.", len(topic_graph.nodes), len(problem_graph.nodes))
+        return cls(topic_graph, problem_graph)
+
+    @classmethod
+    def from_catalog(cls, catalog: CatalogSnapshot) -> 'PrerequisiteEngine':
+        """
+        Compile both graphs from a catalog snapshot without querying the database.
+
+        Parameters:
+            catalog (CatalogSnapshot): The catalog snapshot.
+
+        Returns:
+            PrerequisiteEngine: The compiled engine.
+        """
+        problem_edges: Dict[int, List[int]] = dict(catalog.prerequisites.items())
+        topic_graph = PrerequisiteGraph(PREREQUISITE_MAP, [name for _, name in catalog.topics], label='topic')
+        problem_graph = PrerequisiteGraph(problem_edges, catalog.problem_ids, label='problem')
+        logger.debug("Compiled prerequisite graphs: %d topics, %d problems.", len(topic_graph.nodes), len(problem_graph.nodes))
+        return cls(topic_graph, problem_graph)
+
+    def unlocked_by(
+        self,
+        topics_before: Iterable[str],
+        topics_after: Iterable[str],
+        problems_before: Iterable[int],
+        problems_after: Iterable[int]
+    ) -> Unlocks:
+        """
+        Compute which topics and problems become schedulable after a mastery change.
+
+        Parameters:
+            topics_before (Iterable[str]): Mastered topics before the change.
+            topics_after (Iterable[str]): Mastered topics after the change.
+            problems_before (Iterable[int]): Mastered problem IDs before the change.
+            problems_after (Iterable[int]): Mastered problem IDs after the change.
+
+        Returns:
+            Unlocks: Newly unlocked topics and problems.
+        """
+        topics = self.topics.newly_unlocked(self.topics.mask_of(topics_before), self.topics.mask_of(topics_after))
+        problems = self.problems.newly_unlocked(self.problems.mask_of(problems_before), self.problems.mask_of(problems_after))
+        return Unlocks(topics=topics, problems=problems)
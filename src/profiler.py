@@ -0,0 +1,189 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from prettytable import PrettyTable
+from logger import get_logger
+
+logger = get_logger(__name__, 'profiler.log')
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+_NULL_SPAN = nullcontext()
+
+_enabled: bool = False
+_origin: float = 0.0
+_depth = threading.local()
+# Recorded spans as (name, start offset, duration, depth, thread id), in completion order.
+_events: List[tuple] = []
+
+
+class _Span:
+    """
+    Times one stage and records it on exit. Only created while profiling is enabled.
+    """
+    __slots__ = ('name', 'start', 'depth')
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> '_Span':
+        self.depth = getattr(_depth, 'value', 0)
+        _depth.value = self.depth + 1
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        end = time.perf_counter()
+        _depth.value = self.depth
+        _events.append((self.name, self.start - _origin, end - self.start, self.depth, threading.get_ident()))
+
+
+def enable() -> None:
+    """
+    Start collecting spans. Clears anything recorded previously.
+    """
+    global _enabled, _origin
+    _events.clear()
+    _origin = time.perf_counter()
+    _enabled = True
+
+
+def disable() -> None:
+    """
+    Stop collecting spans. Recorded spans are kept until the next enable().
+    """
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """
+    Returns:
+        bool: True if spans are currently being recorded.
+    """
+    return _enabled
+
+
+def span(name: str):
+    """
+    Context manager timing a named stage. Returns a shared no-op context when profiling is disabled.
+
+    Parameters:
+        name (str): Stage name, e.g. 'scheduler.due_query'.
+
+    Returns:
+        A context manager.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def traced(name: str) -> Callable[[F], F]:
+    """
+    Decorator recording every call of the wrapped function as a span.
+
+    Parameters:
+        name (str): Stage name.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def summary() -> List[Dict[str, Any]]:
+    """
+    Aggregate recorded spans per stage in the order stages were first entered.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per stage with calls, total, mean and max milliseconds.
+    """
+    stages: Dict[str, Dict[str, Any]] = {}
+    for name, start, duration, depth, _ in sorted(_events, key=lambda e: e[1]):
+        stage = stages.get(name)
+        if stage is None:
+            stage = stages[name] = {'stage': name, 'depth': depth, 'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        stage['calls'] += 1
+        stage['total_ms'] += duration * 1000
+        stage['max_ms'] = max(stage['max_ms'], duration * 1000)
+    for stage in stages.values():
+        stage['mean_ms'] = stage['total_ms'] / stage['calls']
+    return list(stages.values())
+
+
+def render_report() -> PrettyTable:
+    """
+    Build the per-stage breakdown table. Nested stages are indented under their parent.
+
+    Returns:
+        PrettyTable: The rendered report.
+    """
+    wall_ms = (time.perf_counter() - _origin) * 1000
+    table = PrettyTable()
+    table.field_names = ["Stage", "Calls", "Total (ms)", "Mean (ms)", "Max (ms)", "% of Wall"]
+    table.align["Stage"] = "l"
+    for stage in summary():
+        table.add_row([
+            "  " * stage['depth'] + stage['stage'],
+            stage['calls'],
+            f"{stage['total_ms']:.2f}",
+            f"{stage['mean_ms']:.2f}",
+            f"{stage['max_ms']:.2f}",
+            f"{stage['total_ms'] / wall_ms * 100:.1f}" if wall_ms > 0 else "0.0"
+        ])
+    table.title = f"Profile (wall {wall_ms:.2f} ms)"
+    return table
+
+
+def write_chrome_trace(path: str) -> None:
+    """
+    Write recorded spans as Chrome trace-event JSON (viewable in chrome://tracing or Perfetto).
+
+    Parameters:
+        path (str): Output file path.
+    """
+    pid = os.getpid()
+    events = [{
+        'name': name,
+        'cat': name.split('.', 1)[0],
+        'ph': 'X',
+        'ts': round(start * 1e6, 3),
+        'dur': round(duration * 1e6, 3),
+        'pid': pid,
+        'tid': tid
+    } for name, start, duration, _, tid in _events]
+    with open(path, 'w') as trace_file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
+    logger.info(f"Wrote {len(events)} trace events to {path}")
+
+
+def finish(trace_path: Optional[str] = None) -> None:
+    """
+    Stop profiling, print the breakdown to stderr and optionally write a Chrome trace.
+
+    Parameters:
+        trace_path (Optional[str]): If given, path of the trace-event JSON file to write.
+    """
+    if not _enabled:
+        return
+    report = render_report()
+    disable()
+    print(report, file=sys.stderr)
+    if trace_path:
+        write_chrome_trace(trace_path)
+        print(f"Chrome trace written to {trace_path}", file=sys.stderr)
@@ -0,0 +1,153 @@
+import os
+import shlex
+from typing import Callable, List, Optional
+
+import click
+
+from logger import get_logger
+
+logger = get_logger(__name__, 'repl.log')
+
+try:
+    import readline
+except ImportError:  # Not available on Windows: the shell works without history or completion.
+    readline = None
+
+HISTORY_PATH = os.path.join(os.path.expanduser('~'), '.leetcode_mastery_history')
+HISTORY_LENGTH = 1000
+EXIT_COMMANDS = ('exit', 'quit')
+
+
+def completions(group: click.Group, words: List[str], text: str) -> List[str]:
+    """
+    Candidates for the word being typed: the subcommands of the command named so far, and its
+    options.
+
+    Parameters:
+        group (click.Group): Root command group.
+        words (List[str]): Complete words before the one being typed.
+        text (str): Prefix of the word being typed.
+
+    Returns:
+        List[str]: Matching subcommand names and option flags, sorted.
+    """
+    command: click.Command = group
+    for word in words:
+        if isinstance(command, click.Group) and word in command.commands:
+            command = command.commands[word]
+    candidates: List[str] = []
+    if isinstance(command, click.Group):
+        candidates.extend(command.commands)
+        if command is group:
+            candidates.extend(('help',) + EXIT_COMMANDS)
+    for param in command.params:
+        if isinstance(param, click.Option):
+            candidates.extend(param.opts + param.secondary_opts)
+    candidates.append('--help')
+    return sorted(candidate for candidate in set(candidates) if candidate.startswith(text))
+
+
+class Completer:
+    """
+    readline completer over a click command tree.
+    """
+
+    def __init__(self, group: click.Group):
+        self.group = group
+        self._matches: List[str] = []
+
+    def __call__(self, text: str, state: int) -> Optional[str]:
+        if state == 0:
+            before = readline.get_line_buffer()[:readline.get_begidx()]
+            try:
+                words = shlex.split(before)
+            except ValueError:
+                words = before.split()
+            self._matches = completions(self.group, words, text)
+        return self._matches[state] if state < len(self._matches) else None
+
+
+def run_command(group: click.Group, args: List[str]) -> None:
+    """
+    Run one command line through the group as `cli.py` would, reporting errors instead of exiting.
+
+    Parameters:
+        group (click.Group): Root command group.
+        args (List[str]): The command line, split into words.
+    """
+    try:
+        group.main(args=args, prog_name='cli.py', standalone_mode=False)
+    except click.ClickException as e:
+        e.show()
+    except click.Abort:
+        click.echo("Aborted.")
+    except SystemExit:
+        pass  # Commands exit on configuration errors; the shell keeps running.
+    except KeyboardInterrupt:
+        click.echo()
+
+
+def run_shell(
+    group: click.Group,
+    after_command: Callable[[], None],
+    prompt: str = 'leetcode> ',
+    history_path: str = HISTORY_PATH
+) -> int:
+    """
+    Read command lines until `exit`, `quit` or end of input and run each through the group.
+
+    Parameters:
+        group (click.Group): Root command group.
+        after_command (Callable[[], None]): Called after every command, e.g. to drop caches a
+            write made stale.
+        prompt (str): Input prompt.
+        history_path (str): File the line history is loaded from and saved to.
+
+    Returns:
+        int: Commands run.
+    """
+    if readline is not None:
+        try:
+            readline.read_history_file(history_path)
+        except OSError:
+            pass
+        readline.set_history_length(HISTORY_LENGTH)
+        readline.set_completer(Completer(group))
+        readline.set_completer_delims(' \t\n')
+        readline.parse_and_bind('tab: complete')
+
+    commands = 0
+    try:
+        while True:
+            try:
+                line = input(prompt).strip()
+            except EOFError:
+                click.echo()
+                break
+            except KeyboardInterrupt:
+                click.echo()
+                continue
+            if not line:
+                continue
+            if line in EXIT_COMMANDS:
+                break
+            try:
+                args = shlex.split(line)
+            except ValueError as e:
+                click.echo(f"⚠️ {e}")
+                continue
+            if args[0] == 'help':
+                args = args[1:] + ['--help']
+            if args[0] == 'shell':
+                click.echo("Already in the shell.")
+                continue
+            run_command(group, args)
+            commands += 1
+            after_command()
+    finally:
+        if readline is not None:
+            try:
+                readline.write_history_file(history_path)
+            except OSError as e:
+                logger.warning(f"Could not save shell history to '{history_path}': {e}")
+    return commands
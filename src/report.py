@@ -0,0 +1,214 @@
+import argparse
+import datetime
+import hashlib
+import html
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, NamedTuple, Sequence
+
+import profiler
+from db_utils import open_connection
+from logger import get_logger
+from view_progress import fetch_overall_metrics, fetch_progress_by_difficulty, fetch_progress_by_topic
+from visualize_progress import CHART_TYPES, query_chart_data, render_chart_file
+
+logger = get_logger(__name__, 'report.log')
+
+# Part of every chart hash; bump when chart drawing changes so cached images are redrawn.
+CHART_STYLE_VERSION = 1
+
+_STYLE = '''
+body { font-family: sans-serif; margin: 2em auto; max-width: 1000px; color: #222; }
+h1 { margin-bottom: 0; }
+.generated { color: #777; margin-top: 0.2em; }
+table { border-collapse: collapse; margin: 0.5em 0 1.5em; }
+th, td { border: 1px solid #ccc; padding: 4px 10px; text-align: left; }
+th { background: #f0f0f0; }
+td.num { text-align: right; }
+img { max-width: 100%; border: 1px solid #eee; margin-bottom: 1.5em; }
+'''
+
+
+class ReportResult(NamedTuple):
+    """
+    Outcome of one report build.
+    """
+    path: str
+    rendered: int
+    reused: int
+
+
+def sidecar_dir(out_path: str) -> str:
+    """
+    Parameters:
+        out_path (str): Path of the HTML report.
+
+    Returns:
+        str: Directory holding the report's images, next to the report.
+    """
+    return os.path.splitext(out_path)[0] + '_files'
+
+
+def content_hash(chart_type: str, rows: List[Dict[str, Any]]) -> str:
+    """
+    Hash a chart's query result.
+
+    Parameters:
+        chart_type (str): Chart type name.
+        rows (List[Dict[str, Any]]): Rows of the chart's query.
+
+    Returns:
+        str: Hex digest identifying the image.
+    """
+    material = json.dumps([CHART_STYLE_VERSION, chart_type, rows], sort_keys=True, default=str)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]
+
+
+def _table(headers: Sequence[str], rows: Sequence[Sequence[Any]]) -> str:
+    head = ''.join(f"<th>{html.escape(str(header))}</th>" for header in headers)
+    body = []
+    for row in rows:
+        cells = ''.join(
+            f"<td class=\"num\">{value}</td>" if isinstance(value, (int, float)) else f"<td>{html.escape(str(value))}</td>"
+            for value in row
+        )
+        body.append(f"<tr>{cells}</tr>")
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{''.join(body)}</tbody></table>"
+
+
+def _chart_images(
+    chart_data: Dict[str, List[Dict[str, Any]]],
+    image_dir: str,
+    image_format: str
+) -> Dict[str, Any]:
+    """
+    Render charts whose data changed since the last run and reuse the others.
+
+    Returns:
+        Dict[str, Any]: 'images' (list of (title, file name)), 'rendered' and 'reused' counts.
+    """
+    os.makedirs(image_dir, exist_ok=True)
+    images = []
+    rendered = reused = 0
+    for chart_type, (_, build, stem) in CHART_TYPES.items():
+        rows = chart_data[chart_type]
+        spec = build(rows)
+        if spec is None:
+            continue
+        file_name = f"{stem}-{content_hash(chart_type, rows)}.{image_format}"
+        path = os.path.join(image_dir, file_name)
+        if os.path.exists(path):
+            reused += 1
+        else:
+            with profiler.span('report.render_chart'):
+                tmp_path = f"{path}.{os.getpid()}.tmp.{image_format}"
+                render_chart_file(spec, tmp_path)
+                os.replace(tmp_path, path)
+            rendered += 1
+            logger.info(f"Rendered chart '{file_name}'.")
+        # Images of earlier data for the same chart are no longer referenced.
+        for old_name in os.listdir(image_dir):
+            if old_name.startswith(f"{stem}-") and old_name != file_name:
+                os.remove(os.path.join(image_dir, old_name))
+        images.append((spec.title, file_name))
+    return {'images': images, 'rendered': rendered, 'reused': reused}
+
+
+def build_report(db_path: str, out_path: str = 'report.html', image_format: str = 'svg') -> ReportResult:
+    """
+    Write a static HTML progress report with the view-progress tables and the progress charts.
+
+    All aggregates are queried over one connection. Chart images are stored in a sidecar directory
+    named after their query result's hash, so a chart is only redrawn when its data changes.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        out_path (str): Path of the HTML file to write.
+        image_format (str): 'svg' or 'png'.
+
+    Returns:
+        ReportResult: Report path and how many charts were rendered or reused.
+    """
+    with profiler.span('report.query'):
+        conn = open_connection(db_path, read_only=True)
+        try:
+            cursor = conn.cursor()
+            metrics = fetch_overall_metrics(cursor)
+            by_difficulty = fetch_progress_by_difficulty(cursor)
+            by_topic = fetch_progress_by_topic(cursor)
+            chart_data = query_chart_data(conn)
+        finally:
+            conn.close()
+
+    image_dir = sidecar_dir(out_path)
+    charts = _chart_images(chart_data, image_dir, image_format)
+    relative_dir = os.path.basename(image_dir)
+
+    with profiler.span('report.write'):
+        sections = [
+            "<h2>Overall Progress</h2>",
+            _table(
+                ["Total Problems", "Attempted Problems", "Mastered", "Success Rate (%)"],
+                [[metrics['total_problems'], metrics['attempted_problems'], metrics['mastered'],
+                  round(metrics['success_rate'], 2)]]
+            ),
+            "<h2>Progress by Difficulty</h2>",
+            _table(
+                ["Difficulty", "Attempted", "Mastered", "Success Rate (%)"],
+                [[row['difficulty'], row['attempted'], row['mastered'], row['success_rate']] for row in by_difficulty]
+            ),
+            "<h2>Progress by Topic</h2>",
+            _table(
+                ["Topic", "Total Problems", "Mastered"],
+                [[row['topic'], row['total'], row['mastered']] for row in by_topic]
+            ),
+            "<h2>Charts</h2>",
+        ]
+        if charts['images']:
+            sections.extend(
+                f"<h3>{html.escape(title)}</h3><img src=\"{html.escape(relative_dir)}/{html.escape(file_name)}\" alt=\"{html.escape(title)}\">"
+                for title, file_name in charts['images']
+            )
+        else:
+            sections.append("<p>No progress recorded yet.</p>")
+
+        generated = datetime.datetime.now().strftime('%Y-%m-%d %H:%M')
+        page = (
+            "<!DOCTYPE html>\n<html lang=\"en\">\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>Progress Report</title>\n<style>{_STYLE}</style>\n</head>\n<body>\n"
+            f"<h1>Progress Report</h1>\n<p class=\"generated\">{html.escape(os.path.basename(db_path))}, generated {generated}</p>\n"
+            + '\n'.join(sections)
+            + "\n</body>\n</html>\n"
+        )
+        tmp_path = f"{out_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            handle.write(page)
+        os.replace(tmp_path, out_path)
+
+    logger.info(f"Report written to '{out_path}' ({charts['rendered']} charts rendered, {charts['reused']} reused).")
+    return ReportResult(out_path, charts['rendered'], charts['reused'])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a static HTML progress report.")
+    parser.add_argument('--db-path', default='leetcode_mastery.db', help='Path to the SQLite database file.')
+    parser.add_argument('--out', default='report.html', help='Path of the HTML file to write.')
+    parser.add_argument('--format', choices=['svg', 'png'], default='svg', help='Chart image format.')
+    parser.add_argument('--profile', action='store_true', help='Print a per-stage timing breakdown.')
+    parser.add_argument('--profile-trace', default=None, help='Also write Chrome trace-event JSON to this file.')
+    args = parser.parse_args()
+
+    if args.profile or args.profile_trace:
+        profiler.enable()
+    try:
+        result = build_report(args.db_path, args.out, args.format)
+        print(f"Report written to '{result.path}' ({result.rendered} charts rendered, {result.reused} reused).")
+    except (sqlite3.Error, OSError) as e:
+        logger.error(f"Error writing report: {e}")
+        print("⚠️ An error occurred while writing the report.")
+    profiler.finish(args.profile_trace)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+from bisect import bisect_right
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import profiler
+from load_leveling import ensure_due_histogram, rebuild_due_histogram
+from logger import get_logger
+from scheduling_strategies import MemoryModelStrategy
+
+logger = get_logger(__name__, 'reschedule.log')
+
+_POLICY_KEY = 'policy'
+_POLICY_HASH_KEY = 'policy_hash'
+
+
+class SchedulingPolicy(NamedTuple):
+    """
+    The [Scheduling] settings that stored progress was computed under. A change to any of them
+    makes existing interval indexes, due dates or mastery flags stale.
+    """
+    strategy: str
+    spaced_intervals: Tuple[int, ...]
+    mastery_threshold_ratio: float
+    min_attempts_for_mastery: int
+    desired_retention: float
+    max_interval_days: int
+
+    def to_json(self) -> str:
+        return json.dumps(self._asdict(), sort_keys=True, separators=(',', ':'))
+
+    @classmethod
+    def from_json(cls, text: str) -> 'SchedulingPolicy':
+        data = json.loads(text)
+        data['spaced_intervals'] = tuple(data['spaced_intervals'])
+        return cls(**data)
+
+    @property
+    def fingerprint(self) -> str:
+        return hashlib.sha256(self.to_json().encode('utf-8')).hexdigest()[:16]
+
+
+class RescheduleChange(NamedTuple):
+    """
+    One progress row before and after a recompute.
+    """
+    problem_id: int
+    title: str
+    old_interval_index: int
+    new_interval_index: int
+    old_next_due: Optional[str]
+    new_next_due: Optional[str]
+    old_mastered: bool
+    new_mastered: bool
+
+
+class RescheduleSummary(NamedTuple):
+    """
+    What a recompute changes (or changed) across UserProgress.
+    """
+    rows: int
+    changed: int
+    mastered_gained: int
+    mastered_lost: int
+    index_changed: int
+    due_earlier: int
+    due_later: int
+    due_now_before: int
+    due_now_after: int
+    samples: List[RescheduleChange]
+
+
+def policy_from_scheduler(scheduler: Any) -> SchedulingPolicy:
+    """
+    Parameters:
+        scheduler (ProblemScheduler): Scheduler with config.ini loaded.
+
+    Returns:
+        SchedulingPolicy: Its scheduling settings.
+    """
+    return SchedulingPolicy(
+        strategy=scheduler.STRATEGY_NAME,
+        spaced_intervals=tuple(scheduler.SPACED_INTERVALS),
+        mastery_threshold_ratio=scheduler.MASTERY_THRESHOLD_RATIO,
+        min_attempts_for_mastery=scheduler.MIN_ATTEMPTS_FOR_MASTERY,
+        desired_retention=scheduler.DESIRED_RETENTION,
+        max_interval_days=scheduler.MAX_INTERVAL_DAYS
+    )
+
+
+def create_scheduling_meta(conn: sqlite3.Connection) -> None:
+    """
+    Create the SchedulingMeta table holding the policy progress was last computed under.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+    """
+    conn.execute('''CREATE TABLE IF NOT EXISTS SchedulingMeta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    )''')
+
+
+def stored_policy(conn: sqlite3.Connection) -> Optional[SchedulingPolicy]:
+    """
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        Optional[SchedulingPolicy]: The recorded policy, or None if none has been recorded.
+    """
+    try:
+        row = conn.execute('SELECT value FROM SchedulingMeta WHERE key = ?', (_POLICY_KEY,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    try:
+        return SchedulingPolicy.from_json(row[0])
+    except (ValueError, TypeError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable stored scheduling policy: {e}")
+        return None
+
+
+def record_policy(conn: sqlite3.Connection, policy: SchedulingPolicy) -> None:
+    """
+    Store policy as the one progress is computed under. The caller commits.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection inside a write transaction.
+        policy (SchedulingPolicy): Current settings.
+    """
+    conn.executemany(
+        'INSERT INTO SchedulingMeta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+        [(_POLICY_KEY, policy.to_json()), (_POLICY_HASH_KEY, policy.fingerprint)]
+    )
+
+
+def check_policy(conn: sqlite3.Connection, policy: SchedulingPolicy) -> Optional[SchedulingPolicy]:
+    """
+    Compare the current settings with the stored hash. A database with no recorded policy adopts
+    the current one, so a later change can be mapped from it.
+
+    Parameters:
+        conn (sqlite3.Connection): Writable connection with no transaction in progress.
+        policy (SchedulingPolicy): Current settings.
+
+    Returns:
+        Optional[SchedulingPolicy]: The stored policy if it differs from the current one, else None.
+    """
+    try:
+        row = conn.execute('SELECT value FROM SchedulingMeta WHERE key = ?', (_POLICY_HASH_KEY,)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        record_policy(conn, policy)
+        conn.commit()
+        logger.info(f"Recorded scheduling policy {policy.fingerprint}.")
+        return None
+    if row[0] == policy.fingerprint:
+        return None
+    return stored_policy(conn)
+
+
+def _case_by_index(column: str, values: Sequence[int]) -> str:
+    """
+    SQL mapping a ladder position to values[position], clamping out-of-range positions.
+    """
+    whens = ' '.join(f'WHEN {i} THEN {int(value)}' for i, value in enumerate(values))
+    return f'CASE MAX({column}, 0) {whens} ELSE {int(values[-1])} END'
+
+
+def _index_for_days_sql(days: str, intervals: Sequence[int]) -> str:
+    """
+    SQL equivalent of SchedulingStrategy.interval_index_for.
+    """
+    whens = ' '.join(
+        f'WHEN {days} >= {int(intervals[i])} THEN {i}' for i in range(len(intervals) - 1, 0, -1)
+    )
+    return f'CASE {whens} ELSE 0 END' if whens else '0'
+
+
+def _recompute_sql(old: Optional[SchedulingPolicy], new: SchedulingPolicy) -> Tuple[str, Dict[str, Any]]:
+    """
+    Build a query returning every UserProgress row with its values under both policies.
+
+    - mastered: when the thresholds changed, recomputed from the counters, so the flag is dropped
+      where the new policy is stricter and granted where it is laxer. Otherwise kept as stored,
+      since a mastered problem keeps the flag until it is failed.
+    - interval index: each old ladder position maps to the longest new interval not exceeding its
+      own; memory-model rows with a stability take the position of their recomputed interval.
+    - next_due: memory-model rows are rescheduled from last_attempt when the strategy, retention
+      or cap changed. Other rows keep their offset from the old interval (so leveled dates stay
+      spread out) and move by the difference between the old and new interval, never earlier than
+      the day after the last attempt; 1-day retries after a failure are left alone.
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: The query and its named parameters.
+    """
+    new_intervals = new.spaced_intervals
+    old_intervals = old.spaced_intervals if old else new_intervals
+    index_map = [
+        max(0, min(len(new_intervals) - 1, bisect_right(new_intervals, old_days) - 1))
+        for old_days in old_intervals
+    ]
+    memory = new.strategy == MemoryModelStrategy.name
+    if memory:
+        strategy = MemoryModelStrategy(new_intervals, new.desired_retention, new.max_interval_days)
+        scale = (strategy.desired_retention ** (1 / strategy.DECAY) - 1) / strategy.FACTOR
+    else:
+        scale = 0.0
+    # Memory-model dates only move when a setting that shapes them changed.
+    memory_changed = old is None or (old.strategy, old.desired_retention, old.max_interval_days) != (
+        new.strategy, new.desired_retention, new.max_interval_days
+    )
+    thresholds_changed = old is not None and (old.mastery_threshold_ratio, old.min_attempts_for_mastery) != (
+        new.mastery_threshold_ratio, new.min_attempts_for_mastery
+    )
+    new_mastered = (
+        'CASE WHEN attempts >= :min_attempts AND successes * 1.0 / attempts >= :ratio THEN 1 ELSE 0 END'
+        if thresholds_changed else 'mastered'
+    )
+    memory_days = 'MAX(1, MIN(:max_interval, CAST(ROUND(stability * :scale) AS INTEGER)))'
+    has_memory = f'{int(memory)} AND stability IS NOT NULL AND last_attempt IS NOT NULL'
+
+    sql = f'''
+        SELECT problem_id, old_mastered, new_mastered, old_index, new_index, old_due,
+               CASE
+                   WHEN old_due IS NULL OR last_attempt IS NULL THEN old_due
+                   WHEN memory_days IS NOT NULL THEN
+                       CASE WHEN {int(memory_changed)} THEN date(last_attempt, '+' || memory_days || ' days') ELSE old_due END
+                   WHEN julianday(date(old_due)) - julianday(date(last_attempt)) <= 1 THEN old_due
+                   ELSE MAX(
+                       date(julianday(old_due) + {_case_by_index('new_index', new_intervals)} - old_days),
+                       date(last_attempt, '+1 day')
+                   )
+               END AS new_due
+        FROM (
+            SELECT problem_id, last_attempt, next_due AS old_due,
+                   mastered AS old_mastered, current_interval_index AS old_index,
+                   {new_mastered} AS new_mastered,
+                   {_case_by_index('current_interval_index', old_intervals)} AS old_days,
+                   CASE WHEN {has_memory} THEN {memory_days} END AS memory_days,
+                   CASE WHEN {has_memory} THEN {_index_for_days_sql(memory_days, new_intervals)}
+                        ELSE {_case_by_index('current_interval_index', index_map)} END AS new_index
+            FROM UserProgress
+        )
+    '''
+    params = {
+        'min_attempts': new.min_attempts_for_mastery,
+        'ratio': new.mastery_threshold_ratio,
+        'max_interval': new.max_interval_days,
+        'scale': scale,
+    }
+    return sql, params
+
+
+def _build_diff(conn: sqlite3.Connection, old: Optional[SchedulingPolicy], new: SchedulingPolicy) -> None:
+    """
+    Evaluate the recompute in one pass over UserProgress into temp.RescheduleDiff, keeping only the
+    rows that change. The summary, the sample and the UPDATE all read this table, so the
+    per-row expressions are evaluated once.
+    """
+    sql, params = _recompute_sql(old, new)
+    conn.execute('DROP TABLE IF EXISTS temp.RescheduleDiff')
+    with profiler.span('reschedule.diff'):
+        conn.execute(f'''
+            CREATE TEMP TABLE RescheduleDiff AS
+            SELECT problem_id, old_mastered, new_mastered, old_index, new_index, old_due, new_due
+            FROM ({sql})
+            WHERE old_mastered IS NOT new_mastered OR old_index IS NOT new_index OR old_due IS NOT new_due
+        ''', params)
+
+
+def _summarize(conn: sqlite3.Connection, today: datetime.date, sample: int) -> RescheduleSummary:
+    rows, due_now = conn.execute(
+        'SELECT COUNT(*), COALESCE(SUM(date(next_due) <= ?), 0) FROM UserProgress', (today.isoformat(),)
+    ).fetchone()
+    changed = conn.execute('''
+        SELECT COUNT(*),
+               COALESCE(SUM(new_mastered AND NOT old_mastered), 0),
+               COALESCE(SUM(old_mastered AND NOT new_mastered), 0),
+               COALESCE(SUM(old_index IS NOT new_index), 0),
+               COALESCE(SUM(date(new_due) < date(old_due)), 0),
+               COALESCE(SUM(date(new_due) > date(old_due)), 0),
+               COALESCE(SUM(date(new_due) <= :today) - SUM(date(old_due) <= :today), 0)
+        FROM temp.RescheduleDiff
+    ''', {'today': today.isoformat()}).fetchone()
+    samples: List[RescheduleChange] = []
+    if sample > 0:
+        samples = [
+            RescheduleChange(r[0], r[1] or '', r[2], r[3], r[4], r[5], bool(r[6]), bool(r[7]))
+            for r in conn.execute('''
+                SELECT d.problem_id, p.title, d.old_index, d.new_index, d.old_due, d.new_due,
+                       d.old_mastered, d.new_mastered
+                FROM temp.RescheduleDiff d
+                LEFT JOIN Problems p ON p.id = d.problem_id
+                ORDER BY d.old_mastered IS NOT d.new_mastered DESC,
+                         ABS(julianday(d.new_due) - julianday(d.old_due)) DESC,
+                         d.problem_id
+                LIMIT ?
+            ''', (sample,)).fetchall()
+        ]
+    return RescheduleSummary(
+        rows, changed[0], changed[1], changed[2], changed[3], changed[4], changed[5],
+        due_now, due_now + changed[6], samples
+    )
+
+
+def plan(
+    conn: sqlite3.Connection,
+    old: Optional[SchedulingPolicy],
+    new: SchedulingPolicy,
+    today: datetime.date,
+    sample: int = 10
+) -> RescheduleSummary:
+    """
+    Compute, without writing to the database, what recomputing progress under new would change.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+        old (Optional[SchedulingPolicy]): Policy the rows were computed under; None assumes the
+            new ladder.
+        new (SchedulingPolicy): Current settings.
+        today (datetime.date): Reference date for the due-now counts.
+        sample (int): Changed rows to include, largest changes first.
+
+    Returns:
+        RescheduleSummary: Counts of changed rows and a sample of them.
+    """
+    try:
+        _build_diff(conn, old, new)
+        return _summarize(conn, today, sample)
+    finally:
+        conn.execute('DROP TABLE IF EXISTS temp.RescheduleDiff')
+
+
+def apply(
+    conn: sqlite3.Connection,
+    old: Optional[SchedulingPolicy],
+    new: SchedulingPolicy,
+    today: datetime.date,
+    sample: int = 10
+) -> RescheduleSummary:
+    """
+    Recompute every progress row under new in one IMMEDIATE transaction: the changed rows are
+    written by a single UPDATE ... FROM the diff table, DueCounts is rebuilt and the new policy is
+    recorded. Nothing is written if any step fails.
+
+    Parameters are those of plan; conn must have no transaction in progress.
+
+    Returns:
+        RescheduleSummary: The changes, computed before they were written.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        _build_diff(conn, old, new)
+        summary = _summarize(conn, today, sample)
+        with profiler.span('reschedule.apply'):
+            # Rebuilding DueCounts once is far cheaper than its update trigger firing per row.
+            conn.execute('DROP TRIGGER IF EXISTS trg_due_counts_update')
+            conn.execute('''
+                UPDATE UserProgress
+                SET mastered = d.new_mastered, current_interval_index = d.new_index, next_due = d.new_due
+                FROM temp.RescheduleDiff d
+                WHERE UserProgress.problem_id = d.problem_id
+            ''')
+            ensure_due_histogram(conn)
+            rebuild_due_histogram(conn)
+        record_policy(conn, new)
+        conn.execute('DROP TABLE temp.RescheduleDiff')
+        conn.commit()
+    except sqlite3.Error:
+        conn.rollback()
+        raise
+    logger.info(
+        f"Rescheduled {summary.changed}/{summary.rows} progress rows for policy {new.fingerprint} "
+        f"(mastered +{summary.mastered_gained}/-{summary.mastered_lost})."
+    )
+    return summary
@@ -0,0 +1,286 @@
+import configparser
+import datetime
+import hashlib
+import os
+import pickle
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TypeVar
+
+import profiler
+from logger import get_logger
+
+logger = get_logger(__name__, 'result_cache.log')
+
+T = TypeVar('T')
+
+CACHE_ENV_VAR = 'LEETCODE_NO_CACHE'
+CACHE_DIR_SUFFIX = '.cache'
+
+DEFAULT_SETTINGS: Dict[str, str] = {
+    'enabled': 'true',
+    'max_bytes': '16777216',
+    'max_entries': '256',
+}
+
+# Files whose contents change command results; their signatures are part of every key.
+_WATCHED_SUFFIXES = ('', '-wal')
+_CONFIG_PATH = 'config.ini'
+
+_settings: Optional[Dict[str, str]] = None
+_disabled: bool = os.environ.get(CACHE_ENV_VAR, '') not in ('', '0')
+
+
+def load_cache_settings(config_path: str = _CONFIG_PATH) -> Dict[str, str]:
+    """
+    Read the [Cache] section of config.ini, falling back to defaults for missing keys.
+
+    Parameters:
+        config_path (str): Path to the configuration file.
+
+    Returns:
+        Dict[str, str]: Cache settings.
+    """
+    settings = dict(DEFAULT_SETTINGS)
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    if 'Cache' in config:
+        settings.update({key: value for key, value in config['Cache'].items() if key in settings})
+    return settings
+
+
+def _get_settings() -> Dict[str, str]:
+    global _settings
+    if _settings is None:
+        _settings = load_cache_settings()
+    return _settings
+
+
+def disable() -> None:
+    """
+    Bypass the cache for the rest of the process (the --no-cache flag). Nothing is read or written.
+    """
+    global _disabled
+    _disabled = True
+
+
+def is_enabled() -> bool:
+    """
+    Returns:
+        bool: True unless the cache was disabled by flag, environment variable or config.
+    """
+    return not _disabled and _get_settings()['enabled'].lower() in ('1', 'true', 'yes', 'on')
+
+
+def _signature(path: str) -> Tuple[int, int]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (0, -1)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def change_stamp(db_path: str) -> Tuple[Tuple[int, int], ...]:
+    """
+    Identify the current state of the database without opening it.
+
+    Every committed write changes the size or modification time of the database file (or of its
+    WAL file), and config.ini is included because scoring settings change results too.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        Tuple[Tuple[int, int], ...]: (mtime_ns, size) of each watched file.
+    """
+    paths = [db_path + suffix for suffix in _WATCHED_SUFFIXES] + [_CONFIG_PATH]
+    return tuple(_signature(path) for path in paths)
+
+
+class ResultCache:
+    """
+    A directory of pickled results named by key hash, bounded by total size and entry count.
+    Hits refresh the file's modification time, so eviction removes least recently used entries.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, max_entries: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pickle")
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Parameters:
+            key (str): Entry key.
+
+        Returns:
+            Tuple[bool, Any]: (hit, value).
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as handle:
+                value = pickle.load(handle)
+        except FileNotFoundError:
+            return False, None
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+            logger.warning(f"Discarding unreadable cache entry '{path}': {e}")
+            self._remove(path)
+            return False, None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return True, value
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a value and evict old entries if the cache is over its bounds.
+
+        Parameters:
+            key (str): Entry key.
+            value (Any): Picklable value.
+        """
+        try:
+            data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError) as e:
+            logger.warning(f"Result for cache key {key} is not picklable: {e}")
+            return
+        if len(data) > self.max_bytes:
+            logger.debug(f"Result for cache key {key} is larger than the cache; not stored.")
+            return
+
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, 'wb') as handle:
+                handle.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry '{path}': {e}")
+            self._remove(tmp_path)
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Remove least recently used entries until the cache is within max_bytes and max_entries.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith('.pickle'):
+                        st = entry.stat()
+                        entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        except OSError:
+            return 0
+
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes and count <= self.max_entries:
+                break
+            self._remove(path)
+            total -= size
+            count -= 1
+            removed += 1
+        if removed:
+            logger.debug(f"Evicted {removed} cache entries.")
+        return removed
+
+    def clear(self) -> int:
+        """
+        Remove every entry.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        removed = 0
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith('.pickle'):
+                        self._remove(entry.path)
+                        removed += 1
+        except OSError:
+            pass
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def cache_for(db_path: str) -> ResultCache:
+    """
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        ResultCache: The cache stored next to the database.
+    """
+    settings = _get_settings()
+    return ResultCache(db_path + CACHE_DIR_SUFFIX, int(settings['max_bytes']), int(settings['max_entries']))
+
+
+def make_key(command: str, args: Iterable[Any], current_date: Optional[datetime.date], stamp: Any) -> str:
+    """
+    Hash the parts of a cache key.
+
+    Parameters:
+        command (str): Command name.
+        args (Iterable[Any]): Arguments that affect the result.
+        current_date (Optional[datetime.date]): Simulated or real date the result is computed for.
+        stamp (Any): Database change stamp (see change_stamp).
+
+    Returns:
+        str: Hex digest.
+    """
+    material = repr((command, tuple(args), (current_date or datetime.date.today()).isoformat(), stamp))
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def cached(
+    command: str,
+    args: Iterable[Any],
+    db_path: str,
+    compute: Callable[[], T],
+    current_date: Optional[datetime.date] = None
+) -> T:
+    """
+    Return the cached result of a read-only computation, computing and storing it on a miss.
+
+    Parameters:
+        command (str): Command name.
+        args (Iterable[Any]): Arguments that affect the result.
+        db_path (str): Database the result is computed from.
+        compute (Callable[[], T]): Function producing the result.
+        current_date (Optional[datetime.date]): Date the result depends on. Defaults to today.
+
+    Returns:
+        T: The result.
+    """
+    if not is_enabled() or db_path == ':memory:':
+        return compute()
+
+    with profiler.span('cache.lookup'):
+        cache = cache_for(db_path)
+        key = make_key(command, args, current_date, change_stamp(db_path))
+        hit, value = cache.get(key)
+    if hit:
+        logger.debug(f"Cache hit for '{command}'.")
+        return value
+
+    value = compute()
+    with profiler.span('cache.store'):
+        cache.put(key, value)
+    return value
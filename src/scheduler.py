@@ -1,22 +1,94 @@
 import sqlite3
 import datetime
+import math
 import sys
-from typing import Generator, List, Set, Optional, Tuple, Dict
+from typing import Generator, List, NamedTuple, Set, Optional, Tuple, Dict, Union
 from contextlib import contextmanager
 from dataclasses import dataclass
-from functools import lru_cache
+from array import array
 import configparser
+import logging
 
 # Import configurations
-from topic_priority import TopicPriority
-from frequency_weights import FrequencyWeights
-from pattern_weights import PatternWeights
+from db_utils import mirror_enabled, open_connection, run_with_retry, sync_mirror
+from sql_trace import query_budget
+from weight_registry import get_weight_registry, TOPIC, FREQUENCY, PATTERN
 from prerequisite_map import PREREQUISITE_MAP, validate_prerequisite_map
-from models import Problem
-from logger import get_logger
+from prerequisite_graph import PrerequisiteEngine, Unlocks
+from score_tables import ScoreTables, DIFFICULTY_RANK_SQL
+from generation_cache import GenerationCache
+from scheduling_strategies import (
+    DEFAULT_STRATEGY, ReviewOutcome, ReviewState, SchedulingStrategy, create_strategy
+)
+from catalog_snapshot import CatalogSnapshot, CsrIndex, load_catalog, read_catalog_stamp
+from load_leveling import Capacity, estimated_minutes, fetch_load, level_due_date, shift_window
+from models import Problem, ProblemRow, ProblemTable
+from topic_ratings import level_distances, load_rating_settings, record_attempt
+import profiler
+from profiler import traced
+from logger import get_logger, log_once
 
 logger = get_logger(__name__, 'scheduler.log')
 
+
+def as_date(value: Optional[datetime.date]) -> datetime.date:
+    """
+    Parameters:
+        value (Optional[datetime.date]): A date, a datetime (as click.DateTime options give), or None.
+
+    Returns:
+        datetime.date: The date part, or today if None. Due dates are stored as plain ISO dates.
+    """
+    if value is None:
+        return datetime.date.today()
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    return value
+
+# Records one attempt in a single statement: counters are incremented in SQL (creating the row on
+# the first attempt) and the schedule computed in Python is stored; RETURNING yields the new row.
+PROGRESS_UPSERT_SQL = '''
+    INSERT INTO UserProgress (
+        problem_id, attempts, successes, hints_used, time_spent,
+        last_attempt, next_due, mastered, current_interval_index,
+        stability, memory_difficulty
+    )
+    VALUES (?, 1, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(problem_id) DO UPDATE SET
+        attempts = attempts + 1,
+        successes = successes + excluded.successes,
+        hints_used = hints_used + excluded.hints_used,
+        time_spent = time_spent + excluded.time_spent,
+        last_attempt = excluded.last_attempt,
+        next_due = excluded.next_due,
+        mastered = excluded.mastered,
+        current_interval_index = excluded.current_interval_index,
+        stability = excluded.stability,
+        memory_difficulty = excluded.memory_difficulty
+    RETURNING attempts, successes, hints_used, time_spent, mastered
+'''
+
+
+class ProgressUpdate(NamedTuple):
+    """
+    A problem's progress after one attempt, as written by update_progress.
+    """
+    problem_id: int
+    attempts: int
+    successes: int
+    hints_used: int
+    time_spent: int
+    next_due: str
+    interval_index: int
+    was_mastered: bool
+    mastered: bool
+    unlocks: Unlocks = Unlocks(topics=[], problems=[])
+
+    @property
+    def newly_mastered(self) -> bool:
+        return self.mastered and not self.was_mastered
+
+
 class ProblemScheduler:
     """
     Handles problem scheduling, fetching due problems, calculating scores, and updating user progress.
@@ -32,16 +104,27 @@ class ProblemScheduler:
             db_path (str): Path to the SQLite database file.
         """
 
-        self.current_date = current_date or datetime.date.today()
+        self.current_date = as_date(current_date)
         validate_prerequisite_map() 
+        self.load_config()
 
-        config = configparser.ConfigParser()
-        config_path = 'config.ini'
-        read_files = config.read(config_path)
-        config.read('config.ini')
+        self._catalog: Optional[CatalogSnapshot] = None
+        self._prereq_engine: Optional[PrerequisiteEngine] = None
+        self.weights = get_weight_registry()
+        self.cache = GenerationCache(default_ttl=self.CACHE_TTL)
+        self._score_tables: Optional[ScoreTables] = None
+        self._held_connection: Optional[sqlite3.Connection] = None
+
+    @traced('scheduler.config')
+    def load_config(self, config_path: str = 'config.ini') -> None:
+        """
+        Parse and validate config.ini, setting the scheduling and scoring attributes.
+        Exits the process if the file, a section or a key is missing.
 
+        Parameters:
+            config_path (str): Path to the configuration file.
+        """
         config = configparser.ConfigParser()
-        config_path = 'config.ini'  # Ensure this path is correct
         read_files = config.read(config_path)
 
         if not read_files:
@@ -91,20 +174,61 @@ class ProblemScheduler:
         self.FREQUENCY_WEIGHT_MULTIPLIER = float(config['Scoring']['frequency_weight_multiplier'])
         self.DIFFICULTY_WEIGHT_MULTIPLIER = float(config['Scoring']['difficulty_weight_multiplier'])
         self.TOPIC_PRIORITY_OFFSET = int(config['Scoring']['topic_priority_offset'])
-
+        # Optional: interval strategy ('ladder' or 'memory') and its memory-model settings.
+        self.STRATEGY_NAME = config.get('Scheduling', 'strategy', fallback=DEFAULT_STRATEGY)
+        self.DESIRED_RETENTION = config.getfloat('Scheduling', 'desired_retention', fallback=0.9)
+        self.MAX_INTERVAL_DAYS = config.getint('Scheduling', 'max_interval_days', fallback=365)
+        try:
+            self.strategy: SchedulingStrategy = create_strategy(
+                self.STRATEGY_NAME, self.SPACED_INTERVALS, self.DESIRED_RETENTION, self.MAX_INTERVAL_DAYS
+            )
+        except ValueError as e:
+            logger.error(f"Invalid scheduling strategy in config.ini: {e}")
+            print(f"⚠️ Configuration error: {e}")
+            sys.exit(1)
+        # Optional: daily review capacity used to spread due dates (0 = unlimited, no leveling).
+        self.CAPACITY = Capacity(
+            problems=config.getint('Capacity', 'daily_problems', fallback=0),
+            minutes=config.getint('Capacity', 'daily_minutes', fallback=0),
+            tolerance=config.getfloat('Capacity', 'tolerance', fallback=0.15),
+            max_shift_days=config.getint('Capacity', 'max_shift_days', fallback=7)
+        )
+        # Optional: Elo topic ratings and how strongly problems near the learner's level are preferred.
+        self.RATINGS = load_rating_settings(config_path)
+        # Optional: how long cached reads may be reused when other processes write to the database.
+        self.CACHE_TTL = config.getfloat('Cache', 'scheduler_ttl_seconds', fallback=300.0)
 
     @contextmanager
-    def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
+    def get_connection(self, read_only: bool = False) -> Generator[sqlite3.Connection, None, None]:
         """
-        Context manager for SQLite database connection.
+        Context manager for SQLite database connection. Between hold_connection and
+        release_connection the held connection is reused instead of opening a new one.
+
+        Parameters:
+            read_only (bool): The block only reads; with mirroring on it runs against the in-memory mirror.
         
         Yields:
             sqlite3.Connection: SQLite connection object.
         """
+        held = self._held_connection
+        if held is not None and not (read_only and mirror_enabled()):
+            isolation_level = held.isolation_level
+            try:
+                yield held
+                held.commit()
+            except BaseException as e:
+                if isinstance(e, sqlite3.Error):
+                    logger.error(f"Database error: {e}")
+                held.rollback()
+                raise
+            finally:
+                held.isolation_level = isolation_level
+            return
+
         conn: Optional[sqlite3.Connection] = None
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
+            with profiler.span('scheduler.connect'):
+                conn = open_connection(self.db_path, read_only)
             yield conn
             conn.commit()
         except sqlite3.Error as e:
@@ -116,16 +240,61 @@ class ProblemScheduler:
             if conn:
                 conn.close()
 
-    @lru_cache(maxsize=128)
+    def hold_connection(self) -> None:
+        """
+        Keep one connection open and serve every get_connection block from it (reads still go to
+        the mirror when mirroring is on) until release_connection. Each block still commits or
+        rolls back on exit, so no transaction stays open between blocks.
+        """
+        if self._held_connection is None:
+            self._held_connection = open_connection(self.db_path)
+
+    def release_connection(self) -> None:
+        """
+        Close the connection kept open by hold_connection.
+        """
+        if self._held_connection is not None:
+            self._held_connection.close()
+            self._held_connection = None
+
     def get_mastered_topics(self) -> Set[str]:
         """
         Determine which topics have been mastered based on problem mastery.
         A topic is considered mastered if at least MASTERY_THRESHOLD_RATIO of its problems are mastered.
+        The result is cached until the next write through this scheduler or the cache TTL.
         
         Returns:
             Set[str]: Set of mastered topic names.
         """
+        return set(self.cache.get('mastered_topics', self._load_mastered_topics))
+
+    def _load_mastered_topics(self) -> frozenset:
         mastered_topics: Set[str] = set()
+        try:
+            with self.get_connection(read_only=True) as conn:
+                counts = self.fetch_topic_mastery_counts(conn)
+        except sqlite3.Error as e:
+            logger.error(f"Error fetching mastered topics: {e}")
+            return frozenset(mastered_topics)
+
+        for topic, (total, mastered_count) in counts.items():
+            if self.is_topic_mastered(total, mastered_count):
+                mastered_topics.add(topic)
+                logger.debug("Topic '%s' mastered with ratio %.2f", topic, mastered_count / total)
+
+        logger.info(f"Mastered topics: {mastered_topics}")
+        return frozenset(mastered_topics)
+
+    def fetch_topic_mastery_counts(self, conn: sqlite3.Connection) -> Dict[str, Tuple[int, int]]:
+        """
+        Count total and mastered problems per topic.
+
+        Parameters:
+            conn (sqlite3.Connection): Open database connection.
+
+        Returns:
+            Dict[str, Tuple[int, int]]: Mapping of topic name to (total problems, mastered problems).
+        """
         query: str = '''
             SELECT t.name AS topic, COUNT(p.id) AS total, 
                    SUM(CASE WHEN up.mastered = 1 THEN 1 ELSE 0 END) AS mastered_count
@@ -134,27 +303,81 @@ class ProblemScheduler:
             LEFT JOIN UserProgress up ON p.id = up.problem_id
             GROUP BY t.name
         '''
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            try:
-                cursor.execute(query)
-                rows = cursor.fetchall()
-            except sqlite3.Error as e:
-                logger.error(f"Error fetching mastered topics: {e}")
-                return mastered_topics
+        rows = conn.execute(query).fetchall()
+        return {row['topic']: (row['total'], row['mastered_count'] or 0) for row in rows}
+
+    def is_topic_mastered(self, total: int, mastered_count: int) -> bool:
+        """
+        Apply MASTERY_THRESHOLD_RATIO to a topic's problem counts.
 
-        for row in rows:
-            topic: str = row['topic']
-            total: int = row['total']
-            mastered_count: int = row['mastered_count'] or 0
-            mastery_ratio: float = mastered_count / total if total > 0 else 0
+        Parameters:
+            total (int): Number of problems in the topic.
+            mastered_count (int): Number of mastered problems in the topic.
 
-            if mastery_ratio >= self.MASTERY_THRESHOLD_RATIO:
-                mastered_topics.add(topic)
-                logger.debug(f"Topic '{topic}' mastered with ratio {mastery_ratio:.2f}")
+        Returns:
+            bool: True if the topic counts as mastered.
+        """
+        mastery_ratio: float = mastered_count / total if total > 0 else 0
+        return mastery_ratio >= self.MASTERY_THRESHOLD_RATIO
 
-        logger.info(f"Mastered topics: {mastered_topics}")
-        return mastered_topics
+    def fetch_mastered_problem_ids(self, conn: sqlite3.Connection) -> Set[int]:
+        """
+        Fetch the IDs of all mastered problems in a single query.
+
+        Parameters:
+            conn (sqlite3.Connection): Open database connection.
+
+        Returns:
+            Set[int]: IDs of mastered problems.
+        """
+        rows = conn.execute('SELECT problem_id FROM UserProgress WHERE mastered = 1').fetchall()
+        return {row[0] for row in rows}
+
+    def get_mastered_problem_ids(self) -> frozenset:
+        """
+        Return the IDs of mastered problems, cached like get_mastered_topics.
+
+        Returns:
+            frozenset: IDs of mastered problems.
+        """
+        def load() -> frozenset:
+            with self.get_connection(read_only=True) as conn:
+                return frozenset(self.fetch_mastered_problem_ids(conn))
+        return self.cache.get('mastered_problem_ids', load)
+
+    def get_catalog(self) -> CatalogSnapshot:
+        """
+        Return the catalog snapshot, checking the catalog version with a single query.
+        When the version changed, the snapshot is reloaded and the prerequisite engine and
+        score tables derived from it are dropped.
+
+        Returns:
+            CatalogSnapshot: The current catalog snapshot.
+        """
+        with self.get_connection(read_only=True) as conn:
+            stamp = read_catalog_stamp(conn)
+            catalog = self._catalog
+            if catalog is None or stamp is None or catalog.stamp != stamp:
+                with profiler.span('scheduler.catalog_load'):
+                    catalog = load_catalog(conn, self.db_path, stamp)
+                self._catalog = catalog
+                self._prereq_engine = None
+                self._score_tables = None
+                self.cache.bump('catalog changed')
+        return catalog
+
+    def get_prerequisite_engine(self) -> PrerequisiteEngine:
+        """
+        Return the compiled topic/problem prerequisite graphs, compiling them from the catalog
+        snapshot on first use.
+
+        Returns:
+            PrerequisiteEngine: The compiled prerequisite engine.
+        """
+        if self._prereq_engine is None:
+            catalog = self._catalog or self.get_catalog()
+            self._prereq_engine = PrerequisiteEngine.from_catalog(catalog)
+        return self._prereq_engine
 
     def can_schedule_topic(self, topic: str, mastered_topics: Set[str]) -> bool:
         """
@@ -167,12 +390,11 @@ class ProblemScheduler:
         Returns:
             bool: True if the topic can be scheduled, False otherwise.
         """
-        prerequisites: List[str] = PREREQUISITE_MAP.get(topic, [])
-        missing: List[str] = [prereq for prereq in prerequisites if prereq not in mastered_topics]
-        if missing:
-            logger.debug(f"Cannot schedule topic '{topic}' as prerequisites {missing} are not mastered.")
+        graph = self.get_prerequisite_engine().topics
+        if not graph.can_schedule(topic, graph.mask_of(mastered_topics)):
+            logger.debug("Cannot schedule topic '%s' as prerequisites %s are not mastered.", topic, PREREQUISITE_MAP.get(topic))
             return False
-        logger.debug(f"All prerequisites for topic '{topic}' are mastered.")
+        logger.debug("All prerequisites for topic '%s' are mastered.", topic)
         return True
 
     def check_prereq_mastery(self, prereq_ids: List[int]) -> bool:
@@ -194,7 +416,7 @@ class ProblemScheduler:
             FROM UserProgress
             WHERE problem_id IN ({placeholders}) AND mastered = 1
         '''
-        with self.get_connection() as conn:
+        with self.get_connection(read_only=True) as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute(query, prereq_ids)
@@ -204,10 +426,36 @@ class ProblemScheduler:
                 return False
 
         all_mastered: bool = mastered_count == len(prereq_ids)
-        logger.debug(f"Prerequisite mastery check: {all_mastered} (Mastered {mastered_count}/{len(prereq_ids)})")
+        logger.debug("Prerequisite mastery check: %s (Mastered %d/%d)", all_mastered, mastered_count, len(prereq_ids))
         return all_mastered
 
-    @lru_cache(maxsize=None)
+    def load_weights(self) -> None:
+        """
+        Apply weight overrides from the database to the shared weight registry.
+        Cached weight maps are only rebuilt if the registry version changes.
+        """
+        version = self.weights.version
+        try:
+            with self.get_connection(read_only=True) as conn:
+                self.weights.load_overrides(conn)
+        except sqlite3.Error as e:
+            logger.error(f"Error loading weight overrides: {e}")
+        if self.weights.version != version:
+            self.cache.bump('weights changed')
+
+    def _weight_map(self, category: str) -> Dict[str, int]:
+        """
+        Return the lowercase-keyed weight map for a category from the scheduler cache.
+        load_weights bumps the cache generation whenever the registry changes.
+
+        Parameters:
+            category (str): One of 'topic', 'frequency' or 'pattern'.
+
+        Returns:
+            Dict[str, int]: Mapping of lowercase display names to weights.
+        """
+        return self.cache.get(f'weights.{category}', lambda: self.weights.tables[category], ttl=None)
+
     def get_topic_priority_map(self) -> Dict[str, int]:
         """
         Retrieve a mapping of topics to their priorities.
@@ -215,9 +463,8 @@ class ProblemScheduler:
         Returns:
             Dict[str, int]: Mapping of topic names to priorities.
         """
-        return TopicPriority.get_priority_map()
+        return self._weight_map(TOPIC)
     
-    @lru_cache(maxsize=None)
     def get_frequency_weight_map(self) -> Dict[str, int]:
         """
         Retrieve a mapping of frequency levels to their weights.
@@ -225,146 +472,306 @@ class ProblemScheduler:
         Returns:
             Dict[str, int]: Mapping of frequency levels to weights.
         """
-        return FrequencyWeights.get_weight_map()
+        return self._weight_map(FREQUENCY)
     
-    @lru_cache(maxsize=None)
     def get_pattern_weight_map(self) -> Dict[str, int]:
         """
         Retrieve a mapping of patterns to their weights.
 
         Returns:
-            Dict[str, int]: Mapping of pattern names to weights.
+            Dict[str, int]: Mapping of patterns to weights.
+        """
+        return self._weight_map(PATTERN)
+
+    def get_score_tables(self) -> ScoreTables:
+        """
+        Return the weight maps resolved into ID-indexed arrays, rebuilding them when the
+        weight registry version or the catalog changes.
+
+        Returns:
+            ScoreTables: Dense scoring tables for the current weights.
         """
-        return PatternWeights.get_weight_map()
+        tables = self._score_tables
+        if tables is None or tables.weights_version != self.weights.version:
+            catalog = self._catalog or self.get_catalog()
+            tables = ScoreTables.build(
+                catalog.topics,
+                catalog.pattern_list,
+                self.weights.version,
+                self.get_topic_priority_map(),
+                self.get_pattern_weight_map(),
+                self.get_frequency_weight_map(),
+                self.DEFAULT_TOPIC_PRIORITY,
+                self.DEFAULT_PATTERN_WEIGHT,
+                self.DEFAULT_FREQ_WEIGHT
+            )
+            self._score_tables = tables
+        return tables
 
     def calculate_problem_score(
         self,
-        problem: Problem
+        problem: Union[Problem, ProblemRow],
+        level_distance: Optional[float] = None
     ) -> float:
         """
         Compute a final score for the given problem based on various factors.
         Higher score indicates higher urgency.
+
+        Problems loaded by get_due_problems carry interned IDs and are scored by indexing the
+        score tables; other problems fall back to name lookups in the weight maps.
         
         Parameters:
-            problem (Problem): The problem instance.
+            problem (Union[Problem, ProblemRow]): The problem instance.
+            level_distance (Optional[float]): Rating difference from the problem's topic rating,
+                when within RATINGS.level_window (see topic_ratings.level_distances).
         
         Returns:
             float: Calculated score representing urgency.
         """
-        # 1) Base difficulty weighting (lower for easier problems)
-        diff_weight: int = self.DIFFICULTY_ORDER.get(problem.difficulty, self.DEFAULT_DIFFICULTY_WEIGHT)
+        if problem.topic_id is not None and problem.frequency_code is not None:
+            tables: ScoreTables = self.get_score_tables()
 
-        # 2) Topic Priority (higher priority topics have higher scores)
-        topic_priority: int = self.get_topic_priority_map().get(problem.topic, self.DEFAULT_TOPIC_PRIORITY)
+            # 1) Base difficulty weighting (lower for easier problems)
+            diff_weight: int = problem.difficulty_rank or self.DEFAULT_DIFFICULTY_WEIGHT
 
-        # 3) Frequency weighting (Higher frequency means higher urgency)
-        freq_weight: int = self.get_frequency_weight_map().get(problem.frequency.lower(), self.DEFAULT_FREQ_WEIGHT)
+            # 2) Topic Priority (higher priority topics have higher scores)
+            topic_priority: int = tables.topic_priority[problem.topic_id]
 
-        # 4) Patterns weighting
-        pattern_score: float = sum(
-            self.get_pattern_weight_map().get(pat.lower(), self.DEFAULT_PATTERN_WEIGHT) 
-            for pat in problem.patterns
-        )
-        # Log unknown patterns
-        for pat in problem.patterns:
-            if pat.lower() not in self.get_pattern_weight_map():
-                logger.warning(f"Unknown pattern '{pat}' encountered. Using default weight.")
-
-        # 5) Performance-based factor
-        if problem.attempts == 0:
-            urgency_factor = self.BASE_URGENCY_FACTOR * 1.0  # Assign maximum urgency
+            # 3) Frequency weighting (Higher frequency means higher urgency)
+            freq_weight: int = tables.frequency_weight[problem.frequency_code]
+
+            # 4) Patterns weighting
+            pattern_weight = tables.pattern_weight
+            pattern_score: float = sum(pattern_weight[pid] for pid in problem.pattern_ids)
+            # Log unknown patterns
+            for pid in problem.pattern_ids:
+                if not tables.pattern_known[pid]:
+                    log_once(logger, logging.WARNING, ('unknown_pattern', pid), "Unknown pattern '%s' encountered. Using default weight.", tables.pattern_names[pid])
         else:
-            success_rate = problem.successes / problem.attempts
-            urgency_factor = self.BASE_URGENCY_FACTOR * (1 - success_rate)
+            diff_weight = self.DIFFICULTY_ORDER.get(problem.difficulty, self.DEFAULT_DIFFICULTY_WEIGHT)
+            topic_priority = self.get_topic_priority_map().get(problem.topic, self.DEFAULT_TOPIC_PRIORITY)
+            freq_weight = self.get_frequency_weight_map().get(problem.frequency.lower(), self.DEFAULT_FREQ_WEIGHT)
+            pattern_score = sum(
+                self.get_pattern_weight_map().get(pat.lower(), self.DEFAULT_PATTERN_WEIGHT) 
+                for pat in problem.patterns
+            )
+            for pat in problem.patterns:
+                if pat.lower() not in self.get_pattern_weight_map():
+                    log_once(logger, logging.WARNING, ('unknown_pattern', pat), "Unknown pattern '%s' encountered. Using default weight.", pat)
+
+        # 5) Performance-based factor (estimated forgetting when the strategy models memory)
+        recall = self.strategy.recall_probabilities(
+            [problem.stability if problem.stability is not None else math.nan], [problem.last_attempt], self.current_date
+        )
+        score = self._combine_score(
+            diff_weight, topic_priority, pattern_score, freq_weight,
+            problem.attempts, problem.successes, recall[0] if recall is not None else math.nan,
+            problem.hints_used, problem.time_spent, level_distance
+        )
+        logger.debug("Calculated score %.2f for problem '%s' (ID=%d)", score, problem.title, problem.id)
+        return score
+
+    def _combine_score(
+        self,
+        diff_weight: int,
+        topic_priority: int,
+        pattern_score: float,
+        freq_weight: int,
+        attempts: int,
+        successes: int,
+        recall: float,
+        hints_used: int,
+        time_spent: int,
+        level_distance: Optional[float]
+    ) -> float:
+        """
+        The scoring formula shared by calculate_problem_score and score_table, given the weights
+        already looked up for one problem.
 
-        # 6) Hints and time spent increase urgency
-        hints_factor: float = problem.hints_used * self.HINTS_FACTOR
-        time_factor: float = problem.time_spent / self.TIME_NORMALIZATION_FACTOR  # Normalize time spent
+        Parameters:
+            recall (float): Estimated recall probability; NaN when the strategy has no memory model.
+            level_distance (Optional[float]): Difference between the problem's rating and its
+                topic's rating when within RATINGS.level_window, else None.
 
-        # 7) Attempts slightly decrease urgency (more attempts might mean less urgent)
-        attempts_factor: float = -self.ATTEMPT_PENALTY * problem.attempts
+        Returns:
+            float: Score; higher is more urgent.
+        """
+        # Performance-based urgency: maximal before the first attempt, then the estimated forgetting
+        # or the failure rate.
+        if attempts == 0:
+            urgency_factor = self.BASE_URGENCY_FACTOR * 1.0
+        elif recall == recall:
+            urgency_factor = self.BASE_URGENCY_FACTOR * (1 - recall)
+        else:
+            urgency_factor = self.BASE_URGENCY_FACTOR * (1 - successes / attempts)
 
-        # Final score calculation
         score: float = (
             (diff_weight * self.DIFFICULTY_WEIGHT_MULTIPLIER) +                      # Weighted difficulty
             (self.INVERT_TOPIC_PRIORITY_BASE - topic_priority) +  # Inverted topic priority
             (pattern_score * self.PATTERN_WEIGHT_MULTIPLIER) +                   # Weighted patterns
             (freq_weight * self.FREQUENCY_WEIGHT_MULTIPLIER) +                       # Weighted frequency
             urgency_factor +                          # Performance-based urgency
-            hints_factor +                            # Hints used
-            time_factor +                             # Time spent
-            attempts_factor                           # Attempts
+            hints_used * self.HINTS_FACTOR +          # Hints used increase urgency
+            time_spent / self.TIME_NORMALIZATION_FACTOR +  # Time spent, normalized
+            -self.ATTEMPT_PENALTY * attempts           # More attempts slightly decrease urgency
         )
 
-        logger.debug(f"Calculated score {score:.2f} for problem '{problem.title}' (ID={problem.id})")
+        # Problems near the learner's level in their topic, most for an exact match.
+        if level_distance is not None and self.RATINGS.level_bonus:
+            window = self.RATINGS.level_window
+            score += self.RATINGS.level_bonus * (1.0 - level_distance / window) if window > 0 else self.RATINGS.level_bonus
         return score
 
-    def get_due_problems(self) -> List[Problem]:
+    def score_table(
+        self,
+        table: ProblemTable,
+        tables: Optional[ScoreTables] = None,
+        distances: Optional[Dict[int, float]] = None
+    ) -> List[float]:
+        """
+        Compute calculate_problem_score for every row of a ProblemTable, reading the columns
+        directly instead of materializing a Problem per row. Recall probabilities for memory-model
+        strategies are computed for the whole table in one batch.
+
+        Parameters:
+            table (ProblemTable): Problems to score.
+            tables (Optional[ScoreTables]): Score tables; defaults to get_score_tables().
+            distances (Optional[Dict[int, float]]): Rating difference per problem at the
+                learner's level (see topic_ratings.level_distances).
+
+        Returns:
+            List[float]: Scores in row order.
+        """
+        tables = tables or self.get_score_tables()
+        recall = self.strategy.recall_probabilities(table.stabilities, table.last_attempts, self.current_date)
+        topic_priority = tables.topic_priority
+        frequency_weight = tables.frequency_weight
+        pattern_weight = tables.pattern_weight
+        pattern_known = tables.pattern_known
+        offsets = table.pattern_offsets
+        pattern_values = table.pattern_values
+        distances = distances or {}
+
+        for pid in set(pattern_values):
+            if not pattern_known[pid]:
+                log_once(logger, logging.WARNING, ('unknown_pattern', pid), "Unknown pattern '%s' encountered. Using default weight.", tables.pattern_names[pid])
+
+        return [
+            self._combine_score(
+                table.difficulty_ranks[i] or self.DEFAULT_DIFFICULTY_WEIGHT,
+                topic_priority[table.topic_ids[i]],
+                sum(pattern_weight[pid] for pid in pattern_values[offsets[i]:offsets[i + 1]]),
+                frequency_weight[table.frequency_codes[i]],
+                table.attempts[i],
+                table.successes[i],
+                recall[i] if recall is not None else math.nan,
+                table.hints_used[i],
+                table.time_spent[i],
+                distances.get(table.ids[i])
+            )
+            for i in range(len(table))
+        ]
+
+    # Worst case, before this process has loaded the catalog: weight overrides (1), the catalog
+    # stamp and snapshot rebuild (5), the due query (1), the level query (1), topic mastery counts
+    # and mastered problem ids (2).
+    @traced('scheduler.get_due_problems')
+    @query_budget(10, name='ProblemScheduler.get_due_problems')
+    def get_due_problems(self) -> List[ProblemRow]:
         """
         Retrieve due problems considering priority, dependencies, and spaced repetition.
-        Returns a list of Problem instances sorted by their calculated scores.
+        Candidates are loaded into a ProblemTable and returned as row views sorted by score.
+        Problems rated near the learner's rating in their topic get a bonus of up to
+        RATINGS.level_bonus, largest for an exact match.
         
         Returns:
-            List[Problem]: Sorted list of due problems.
+            List[ProblemRow]: Sorted list of due problems.
         """
         today: str = self.current_date.isoformat()
-        query: str = '''
+
+        with profiler.span('scheduler.load_weights'):
+            self.load_weights()
+            catalog: CatalogSnapshot = self.get_catalog()
+            tables: ScoreTables = self.get_score_tables()
+
+        frequency_code_sql, frequency_params = tables.frequency_code_sql()
+        query: str = f'''
             SELECT p.id, p.title, p.difficulty, t.name AS topic, p.frequency,
                 p.url, p.priority, up.attempts, up.successes, up.hints_used, 
-                up.time_spent, up.last_attempt, up.next_due, up.mastered, up.current_interval_index
+                up.time_spent, up.last_attempt, up.next_due, up.mastered, up.current_interval_index,
+                p.topic_id, {DIFFICULTY_RANK_SQL} AS difficulty_rank, {frequency_code_sql} AS frequency_code,
+                up.stability, up.memory_difficulty
             FROM Problems p
             JOIN Topics t ON p.topic_id = t.topic_id
             LEFT JOIN UserProgress up ON p.id = up.problem_id
             WHERE (DATE(up.next_due) <= DATE(?) OR up.next_due IS NULL)
         '''
 
-
-        with self.get_connection() as conn:
+        with self.get_connection(read_only=True) as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute(query, (today,))
-                all_due: sqlite3.Row = cursor.fetchall()
+                with profiler.span('scheduler.due_query'):
+                    cursor.execute(query, (*frequency_params, today))
+                    all_due: sqlite3.Row = cursor.fetchall()
+                    # Rows are filtered positionally; find the column by name once.
+                    topic_id_column = [column[0] for column in cursor.description].index('topic_id')
+                distances: Dict[int, float] = {}
+                if self.RATINGS.level_bonus:
+                    with profiler.span('scheduler.level_query'):
+                        distances = level_distances(conn, self.RATINGS.level_window)
             except sqlite3.Error as e:
                 logger.error(f"Error fetching due problems: {e}")
                 return []
 
-        mastered_topics: Set[str] = self.get_mastered_topics()
-        sorted_problems_with_scores: List[Tuple[float, Problem]] = []
-
-        # Fetch all patterns and prerequisites in bulk to optimize performance
-        patterns_map: Dict[int, List[str]] = self.fetch_all_patterns()
-        prereqs_map: Dict[int, List[int]] = self.fetch_all_prerequisites()
-
-        for row in all_due:
-            problem: Problem = self.row_to_problem(row, patterns_map, prereqs_map)
-
-            if not self.can_schedule_topic(problem.topic, mastered_topics):
-                continue
-
-            if problem.prerequisites:
-                prereq_ids: List[int] = problem.prerequisites
-                if not self.check_prereq_mastery(prereq_ids):
-                    continue
+        with profiler.span('scheduler.mastered_topics'):
+            mastered_topics: Set[str] = self.get_mastered_topics()
+
+        # Patterns and prerequisites come from the memory-mapped catalog snapshot
+        pattern_ids_map: CsrIndex = catalog.patterns
+        prereqs_map: CsrIndex = catalog.prerequisites
+
+        # Resolve prerequisite checks against compiled bitsets instead of per-row queries.
+        # Topic checks are resolved once per topic_id so rows never hash topic names.
+        with profiler.span('scheduler.prereq_graph'):
+            engine = self.get_prerequisite_engine()
+            mastered_problems_mask: int = engine.problems.mask_of(self.get_mastered_problem_ids())
+            mastered_topics_mask: int = engine.topics.mask_of(mastered_topics)
+            topic_schedulable: List[bool] = [
+                engine.topics.can_schedule(name, mastered_topics_mask) for name in tables.topic_names
+            ]
+            candidates = [
+                row for row in all_due
+                if topic_schedulable[row[topic_id_column]]
+                and engine.problems.can_schedule(row[0], mastered_problems_mask)
+            ]
 
-            score: float = self.calculate_problem_score(problem)
-            sorted_problems_with_scores.append((score, problem))
+        with profiler.span('scheduler.scoring'):
+            table = ProblemTable.from_rows(candidates, pattern_ids_map, prereqs_map, tables.topic_names, tables.pattern_names)
+            scores: List[float] = self.score_table(table, tables, distances)
+            table.scores = array('d', scores)
 
         # Sort problems by descending score (higher score = more urgent)
-        sorted_problems_with_scores.sort(key=lambda x: x[0], reverse=True)
+        with profiler.span('scheduler.sorting'):
+            order: List[int] = sorted(range(len(table)), key=scores.__getitem__, reverse=True)
 
-        # Extract sorted Problem instances
-        sorted_problems: List[Problem] = [item[1] for item in sorted_problems_with_scores]
+        sorted_problems: List[ProblemRow] = [table.row(index) for index in order]
 
         logger.info(f"Retrieved {len(sorted_problems)} due problems.")
         return sorted_problems
 
+    # Worst case, an attempt that masters the problem before this process has loaded the catalog:
+    # the progress read (1), the upsert and the four due-count trigger statements it fires, which
+    # are traced as statements of their own (5), the topic rating read and writes (3), then
+    # compute_unlocks: the catalog stamp and snapshot rebuild (5), mastered problem ids, topic
+    # mastery counts and the problem's topic (3).
+    @query_budget(17, name='ProblemScheduler.update_progress')
     def update_progress(
         self,
         problem_id: int,
         success: bool,
         hints_used: int = 0,
         time_spent: int = 0
-    ) -> None:
+    ) -> 'ProgressUpdate':
         """
         Update user progress after attempting a problem.
         
@@ -373,60 +780,151 @@ class ProblemScheduler:
             success (bool): Whether the problem was solved successfully.
             hints_used (int): Number of hints used.
             time_spent (int): Time spent solving the problem in minutes.
+
+        Returns:
+            ProgressUpdate: The counters, schedule and mastery after the attempt, with the topics and
+                problems it unlocked (empty unless the problem became mastered).
         """
-        today: str = self.current_date.isoformat()
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute('BEGIN')
-
-                # Fetch existing progress
-                cursor.execute('''
-                    SELECT attempts, successes, hints_used, time_spent, current_interval_index, mastered
-                    FROM UserProgress
-                    WHERE problem_id = ?
-                ''', (problem_id,))
-                row: Optional[sqlite3.Row] = cursor.fetchone()
-
-                 # Initialize or update progress stats
-                attempts = row['attempts'] + 1 if row else 1
-                successes = row['successes'] + int(success) if row else int(success)
-                total_hints = row['hints_used'] + hints_used if row else hints_used
-                total_time = row['time_spent'] + time_spent if row else time_spent
-                mastered = row['mastered'] if row else False
-                current_interval_index = row['current_interval_index'] if row else -1  # Start before first interval
-
-                # Determine next interval and due date
-                next_interval_index, next_due, is_still_mastered = self.get_next_progress(current_interval_index, success, attempts, successes, mastered)
-
-                if row:
-                    cursor.execute('''
-                        UPDATE UserProgress
-                        SET attempts = ?, successes = ?, hints_used = ?, time_spent = ?,
-                            last_attempt = ?, next_due = ?, mastered = ?, current_interval_index = ?
-                        WHERE problem_id = ?
-                    ''', (attempts, successes, total_hints, total_time,
-                        today, next_due, is_still_mastered, next_interval_index, problem_id))
-                else:
-                    cursor.execute('''
-                    INSERT INTO UserProgress (
-                        problem_id, attempts, successes, hints_used, time_spent,
-                        last_attempt, next_due, mastered, current_interval_index
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (problem_id, attempts, successes, total_hints, total_time,
-                      today, next_due, is_still_mastered, next_interval_index))
-
-                conn.commit()
-                logger.info(f"Updated progress for problem ID {problem_id}. Mastered: {mastered}")
+            update = run_with_retry(
+                lambda: self._record_attempt(problem_id, success, hints_used, time_spent),
+                f"update_progress({problem_id})"
+            )
         except sqlite3.Error as e:
             logger.error(f"Error updating progress for problem ID {problem_id}: {e}")
             raise
+        finally:
+            self.cache.bump('update_progress')
+        sync_mirror(self.db_path, 'UserProgress', 'problem_id', (problem_id,))
+        sync_mirror(self.db_path, 'TopicRatings')
+
+        if update.newly_mastered:
+            return update._replace(unlocks=self.compute_unlocks(problem_id))
+        return update
+
+    def _record_attempt(self, problem_id: int, success: bool, hints_used: int, time_spent: int) -> ProgressUpdate:
+        """
+        Apply one attempt in a single write transaction. Safe to rerun after a lock error, since
+        the transaction is rolled back and nothing is carried over from the failed run.
+
+        The scheduling state is read once under the write lock, the strategy picks the next
+        interval, and one upsert increments the counters and stores the schedule, returning the
+        new counters and mastery so no second read is needed. The attempt is logged and its topic's
+        Elo rating updated in the same transaction.
+
+        Returns:
+            ProgressUpdate: The row after the attempt.
+        """
+        today: str = self.current_date.isoformat()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+                SELECT attempts, successes, time_spent, current_interval_index, mastered,
+                       last_attempt, stability, memory_difficulty
+                FROM UserProgress
+                WHERE problem_id = ?
+            ''', (problem_id,))
+            row: Optional[sqlite3.Row] = cursor.fetchone()
+
+            attempts = row['attempts'] + 1 if row else 1
+            successes = row['successes'] + int(success) if row else int(success)
+            total_time = row['time_spent'] + time_spent if row else time_spent
+            mastered = bool(row['mastered']) if row else False
+            state = ReviewState(
+                row['current_interval_index'] if row else -1,  # Start before first interval
+                row['stability'] if row else None,
+                row['memory_difficulty'] if row else None,
+                row['last_attempt'] if row else None
+            )
+
+            # Determine next interval and due date
+            is_still_mastered = self.check_mastery(attempts, successes, mastered)
+            outcome: ReviewOutcome = self.strategy.next_review(state, success, hints_used, is_still_mastered, self.current_date)
+            next_interval_index, next_due = outcome.interval_index, outcome.next_due
+            if self.CAPACITY.enabled:
+                next_due = self.level_due_date(conn, next_due, estimated_minutes(attempts, total_time))
+
+            written: sqlite3.Row = cursor.execute(PROGRESS_UPSERT_SQL, (
+                problem_id, int(success), hints_used, time_spent,
+                today, next_due, is_still_mastered, next_interval_index,
+                outcome.stability, outcome.memory_difficulty
+            )).fetchone()
+            record_attempt(conn, problem_id, today, success, hints_used, self.RATINGS)
+
+            conn.commit()
+            logger.info(f"Updated progress for problem ID {problem_id}. Mastered: {is_still_mastered}")
+        return ProgressUpdate(
+            problem_id, written['attempts'], written['successes'], written['hints_used'], written['time_spent'],
+            next_due, next_interval_index, mastered, bool(written['mastered'])
+        )
+
+    def level_due_date(self, conn: sqlite3.Connection, next_due: str, minutes: int) -> str:
+        """
+        Move a due date to the least-loaded day within the tolerance window around it, reading the
+        due-count histogram for that window only.
 
+        Parameters:
+            conn (sqlite3.Connection): Connection inside the update transaction.
+            next_due (str): ISO due date chosen by the scheduling strategy.
+            minutes (int): Expected minutes of the review.
+
+        Returns:
+            str: ISO due date after leveling.
+        """
+        ideal = datetime.date.fromisoformat(next_due[:10])
+        window = shift_window((ideal - self.current_date).days, self.CAPACITY)
+        if window == 0:
+            return ideal.isoformat()
+        span = datetime.timedelta(days=window)
+        load = fetch_load(conn, ideal - span, ideal + span)
+        return level_due_date(ideal, self.current_date, load, self.CAPACITY, minutes).isoformat()
+
+    def compute_unlocks(self, problem_id: int) -> Unlocks:
+        """
+        Determine which topics and problems were unlocked by a problem becoming mastered.
+        Must be called after the mastery change has been committed.
+
+        Parameters:
+            problem_id (int): ID of the newly mastered problem.
 
-    def get_next_progress(self, current_interval_index: int, success: bool, attempts: int, successes: int, mastered: bool) -> Tuple[int, str]:
+        Returns:
+            Unlocks: Newly unlocked topics and problems.
+        """
+        engine = self.get_prerequisite_engine()
+        try:
+            with self.get_connection(read_only=True) as conn:
+                problems_after: Set[int] = self.fetch_mastered_problem_ids(conn)
+                counts = self.fetch_topic_mastery_counts(conn)
+                row = conn.execute('''
+                    SELECT t.name FROM Problems p
+                    JOIN Topics t ON p.topic_id = t.topic_id
+                    WHERE p.id = ?
+                ''', (problem_id,)).fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error computing unlocks for problem ID {problem_id}: {e}")
+            return Unlocks(topics=[], problems=[])
+
+        problem_topic: Optional[str] = row[0] if row else None
+        topics_after: Set[str] = set()
+        topics_before: Set[str] = set()
+        for topic, (total, mastered_count) in counts.items():
+            if self.is_topic_mastered(total, mastered_count):
+                topics_after.add(topic)
+            before_count = mastered_count - 1 if topic == problem_topic else mastered_count
+            if self.is_topic_mastered(total, before_count):
+                topics_before.add(topic)
+
+        unlocks = engine.unlocked_by(topics_before, topics_after, problems_after - {problem_id}, problems_after)
+        if unlocks.topics or unlocks.problems:
+            logger.info(f"Mastering problem ID {problem_id} unlocked topics {unlocks.topics} and problems {unlocks.problems}")
+        return unlocks
+
+
+    def get_next_progress(self, current_interval_index: int, success: bool, attempts: int, successes: int, mastered: bool) -> Tuple[int, str, bool]:
         """
-        Determine the next interval index and due date based on progress.
+        Determine the next interval index and due date based on progress, using the configured
+        strategy without memory state.
 
         Parameters:
             current_interval_index (int): Current interval index in SPACED_INTERVALS.
@@ -435,20 +933,12 @@ class ProblemScheduler:
             successes (int): Total successes so far.
 
         Returns:
-            Tuple[int, str]: Next interval index and due date as ISO string.
+            Tuple[int, str, bool]: Next interval index, due date as ISO string and mastery status.
         """
         is_still_mastered = self.check_mastery(attempts, successes, mastered)
-
-        if success:
-            next_interval_index = min(current_interval_index + 1, len(self.SPACED_INTERVALS) - 1)
-        elif is_still_mastered:
-            next_interval_index = max(current_interval_index - 1, 0)
-        else:
-            next_interval_index = 0
-
-        next_due = self.calculate_next_due(next_interval_index, success)
-        return next_interval_index, next_due, is_still_mastered
-        
+        state = ReviewState(current_interval_index, None, None, None)
+        outcome = self.strategy.next_review(state, success, 0, is_still_mastered, self.current_date)
+        return outcome.interval_index, outcome.next_due, is_still_mastered
 
     def check_mastery(self, attempts: int, successes: int, mastered: bool) -> bool:
         """
@@ -463,12 +953,12 @@ class ProblemScheduler:
             bool: True if mastered, False otherwise.
         """
         if mastered:
-            logger.debug(f"Problem already mastered.")
+            logger.debug("Problem already mastered.")
             return True
         if attempts >= self.MIN_ATTEMPTS_FOR_MASTERY and (successes / attempts) >= self.MASTERY_THRESHOLD_RATIO:
-            logger.debug(f"Problem mastered: {successes}/{attempts} successes.")
+            logger.debug("Problem mastered: %d/%d successes.", successes, attempts)
             return True
-        logger.debug(f"Problem not mastered: {successes}/{attempts} successes.")
+        logger.debug("Problem not mastered: %d/%d successes.", successes, attempts)
         return False
 
     def calculate_next_due(self, interval_index: int, success: bool) -> str:
@@ -485,7 +975,7 @@ class ProblemScheduler:
         today = self.current_date
         days_to_next_due = self.SPACED_INTERVALS[interval_index] if success else 1
         next_due = today + datetime.timedelta(days=days_to_next_due)
-        logger.debug(f"Next due date calculated as {next_due.isoformat()} for {'success' if success else 'failure'} attempt.")
+        logger.debug("Next due date calculated as %s for %s attempt.", next_due, 'success' if success else 'failure')
         return next_due.isoformat()
 
 
@@ -524,7 +1014,7 @@ class ProblemScheduler:
         difficulty_filter: str = f"AND p.difficulty = '{difficulty.capitalize()}'" if difficulty else ""
         params: Tuple[str, ...] = (topic,)
 
-        with self.get_connection() as conn:
+        with self.get_connection(read_only=True) as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute(total_query.format(difficulty_filter=difficulty_filter), params)
@@ -541,6 +1031,38 @@ class ProblemScheduler:
 
         return (total, solved, success_rate)
 
+    def get_topic_metrics(self, difficulty: Optional[str] = None) -> Dict[str, Tuple[int, int, Optional[float]]]:
+        """
+        Retrieve the same metrics as get_additional_metrics for every topic in one grouped query.
+        
+        Parameters:
+            difficulty (Optional[str]): Difficulty level to filter.
+        
+        Returns:
+            Dict[str, Tuple[int, int, Optional[float]]]: Mapping of topic name to
+                (total problems, solved problems, success rate). Topics without progress are omitted.
+        """
+        query: str = '''
+            SELECT t.name AS topic,
+                   COUNT(*) AS total,
+                   SUM(CASE WHEN up.successes > 0 THEN 1 ELSE 0 END) AS solved,
+                   AVG(CASE WHEN up.attempts > 0
+                            THEN CAST(up.successes AS FLOAT) / CAST(up.attempts AS FLOAT) END) AS success_rate
+            FROM UserProgress up
+            JOIN Problems p ON up.problem_id = p.id
+            JOIN Topics t ON p.topic_id = t.topic_id
+            WHERE (? IS NULL OR p.difficulty = ?)
+            GROUP BY t.name
+        '''
+        difficulty_param: Optional[str] = difficulty.capitalize() if difficulty else None
+        try:
+            with self.get_connection(read_only=True) as conn:
+                rows = conn.execute(query, (difficulty_param, difficulty_param)).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Error retrieving topic metrics: {e}")
+            return {}
+        return {row['topic']: (row['total'], row['solved'] or 0, row['success_rate']) for row in rows}
+
     def get_mastery_status(self, topic: str) -> dict:
         """
         Get mastery status metrics for a topic.
@@ -562,26 +1084,31 @@ class ProblemScheduler:
     def row_to_problem(
         self,
         row: sqlite3.Row,
-        patterns_map: Dict[int, List[str]],
-        prereqs_map: Dict[int, List[int]]
+        patterns_map: Dict[int, List[int]],
+        prereqs_map: Dict[int, List[int]],
+        tables: Optional[ScoreTables] = None
     ) -> Problem:
         """
         Convert a database row to a Problem instance using pre-fetched patterns and prerequisites.
         
         Parameters:
-            row (sqlite3.Row): Database row representing a problem.
-            patterns_map (Dict[int, List[str]]): Mapping of problem_id to patterns.
+            row (sqlite3.Row): Database row representing a problem (as selected by get_due_problems).
+            patterns_map (Dict[int, List[int]]): Mapping of problem_id to pattern IDs.
             prereqs_map (Dict[int, List[int]]): Mapping of problem_id to prerequisite IDs.
+            tables (Optional[ScoreTables]): Score tables used to resolve pattern names for display.
         
         Returns:
             Problem: The Problem instance.
         """
+        tables = tables or self.get_score_tables()
+        pattern_ids: List[int] = patterns_map.get(row['id'], [])
+        pattern_names: List[str] = tables.pattern_names
         problem = Problem(
             id=row['id'],
             title=row['title'],
             difficulty=row['difficulty'],
             topic=row['topic'],
-            patterns=patterns_map.get(row['id'], []),
+            patterns=[pattern_names[pid] for pid in pattern_ids],
             frequency=row['frequency'],
             url=row['url'],
             priority=row['priority'],
@@ -592,7 +1119,13 @@ class ProblemScheduler:
             time_spent=row['time_spent'] or 0,
             last_attempt=row['last_attempt'],
             next_due=row['next_due'],
-            mastered=bool(row['mastered']) if row['mastered'] is not None else False
+            mastered=bool(row['mastered']) if row['mastered'] is not None else False,
+            topic_id=row['topic_id'],
+            pattern_ids=pattern_ids,
+            frequency_code=row['frequency_code'],
+            difficulty_rank=row['difficulty_rank'],
+            stability=row['stability'],
+            memory_difficulty=row['memory_difficulty']
         )
         return problem
 
@@ -609,7 +1142,7 @@ class ProblemScheduler:
             JOIN Patterns pr ON pp.pattern_id = pr.pattern_id
         '''
         patterns_map: Dict[int, List[str]] = {}
-        with self.get_connection() as conn:
+        with self.get_connection(read_only=True) as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute(query)
@@ -620,31 +1153,23 @@ class ProblemScheduler:
                     patterns_map.setdefault(problem_id, []).append(pattern_name)
             except sqlite3.Error as e:
                 logger.error(f"Error fetching all patterns: {e}")
-        logger.debug(f"Fetched patterns for {len(patterns_map)} problems.")
+        logger.debug("Fetched patterns for %d problems.", len(patterns_map))
         return patterns_map
 
-    def fetch_all_prerequisites(self) -> Dict[int, List[int]]:
+    def fetch_all_pattern_ids(self) -> CsrIndex:
         """
-        Fetch all prerequisites associated with each problem in bulk.
+        Return the pattern IDs associated with each problem, read from the catalog snapshot.
         
         Returns:
-            Dict[int, List[int]]: Mapping of problem_id to list of prerequisite IDs.
+            CsrIndex: Mapping of problem_id to pattern IDs.
         """
-        query: str = '''
-            SELECT problem_id, prerequisite_id
-            FROM ProblemPrerequisites
-        '''
-        prereqs_map: Dict[int, List[int]] = {}
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            try:
-                cursor.execute(query)
-                rows: List[sqlite3.Row] = cursor.fetchall()
-                for row in rows:
-                    problem_id: int = row['problem_id']
-                    prereq_id: int = row['prerequisite_id']
-                    prereqs_map.setdefault(problem_id, []).append(prereq_id)
-            except sqlite3.Error as e:
-                logger.error(f"Error fetching all prerequisites: {e}")
-        logger.debug(f"Fetched prerequisites for {len(prereqs_map)} problems.")
-        return prereqs_map
\ No newline at end of file
+        return self.get_catalog().patterns
+
+    def fetch_all_prerequisites(self) -> CsrIndex:
+        """
+        Return the prerequisites associated with each problem, read from the catalog snapshot.
+        
+        Returns:
+            CsrIndex: Mapping of problem_id to prerequisite IDs.
+        """
+        return self.get_catalog().prerequisites
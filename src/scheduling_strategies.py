@@ -0,0 +1,307 @@
+import datetime
+import math
+import sqlite3
+from array import array
+from bisect import bisect_right
+from typing import Dict, NamedTuple, Optional, Sequence, Type
+
+from logger import get_logger
+
+logger = get_logger(__name__, 'scheduling_strategies.log')
+
+DEFAULT_STRATEGY = 'ladder'
+
+# Columns added to UserProgress for strategies that keep per-problem memory state.
+MEMORY_COLUMNS = (
+    ('stability', 'REAL'),
+    ('memory_difficulty', 'REAL'),
+)
+
+# Review grades, as in SM-2/FSRS: 1 = forgot, 2 = recalled with help, 3 = recalled.
+GRADE_AGAIN, GRADE_HARD, GRADE_GOOD = 1, 2, 3
+
+
+class ReviewState(NamedTuple):
+    """
+    Progress of one problem before the current attempt is applied.
+    """
+    interval_index: int
+    stability: Optional[float]
+    memory_difficulty: Optional[float]
+    last_attempt: Optional[str]
+
+
+class ReviewOutcome(NamedTuple):
+    """
+    Scheduling decision for one attempt.
+    """
+    interval_index: int
+    next_due: str
+    stability: Optional[float]
+    memory_difficulty: Optional[float]
+
+
+def ensure_memory_columns(conn: sqlite3.Connection) -> None:
+    """
+    Add the memory-model columns to UserProgress if the database predates them.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+    """
+    existing = {row[1] for row in conn.execute('PRAGMA table_info(UserProgress)').fetchall()}
+    for column, column_type in MEMORY_COLUMNS:
+        if column not in existing:
+            conn.execute(f'ALTER TABLE UserProgress ADD COLUMN {column} {column_type}')
+            logger.info(f"Added column '{column}' to UserProgress.")
+
+
+def days_between(earlier: Optional[str], today: datetime.date) -> Optional[int]:
+    """
+    Parameters:
+        earlier (Optional[str]): ISO date or datetime string.
+        today (datetime.date): Reference date.
+
+    Returns:
+        Optional[int]: Whole days elapsed, or None if earlier is missing or malformed.
+    """
+    if not earlier:
+        return None
+    try:
+        return max(0, today.toordinal() - datetime.date.fromisoformat(earlier[:10]).toordinal())
+    except ValueError:
+        return None
+
+
+class SchedulingStrategy:
+    """
+    Decides when a problem is due again after an attempt.
+
+    Strategies that model memory also estimate recall probability, which the scheduler uses to
+    rank due problems; the default implementation returns None and ranking falls back to the
+    success rate.
+    """
+    name: str = ''
+
+    def __init__(self, spaced_intervals: Sequence[int]):
+        self.spaced_intervals = list(spaced_intervals)
+
+    def next_review(
+        self,
+        state: ReviewState,
+        success: bool,
+        hints_used: int,
+        is_mastered: bool,
+        today: datetime.date
+    ) -> ReviewOutcome:
+        """
+        Parameters:
+            state (ReviewState): Progress before this attempt.
+            success (bool): Whether the attempt was successful.
+            hints_used (int): Hints used in this attempt.
+            is_mastered (bool): Mastery status after this attempt.
+            today (datetime.date): Date of the attempt.
+
+        Returns:
+            ReviewOutcome: The next interval and due date.
+        """
+        raise NotImplementedError
+
+    def recall_probabilities(
+        self,
+        stabilities: Sequence[float],
+        last_attempts: Sequence[Optional[str]],
+        today: datetime.date
+    ) -> Optional[array]:
+        """
+        Estimate recall probability for a batch of problems.
+
+        Parameters:
+            stabilities (Sequence[float]): Stability per problem (NaN when unknown).
+            last_attempts (Sequence[Optional[str]]): Last attempt date per problem.
+            today (datetime.date): Reference date.
+
+        Returns:
+            Optional[array]: Probabilities in [0, 1] (NaN where there is no memory state), or None
+                if the strategy does not model memory.
+        """
+        return None
+
+    def interval_index_for(self, days: int) -> int:
+        """
+        Map an interval in days to the closest ladder position, so current_interval_index stays
+        meaningful whichever strategy produced the interval.
+
+        Parameters:
+            days (int): Interval in days.
+
+        Returns:
+            int: Index into spaced_intervals.
+        """
+        return max(0, min(bisect_right(self.spaced_intervals, days) - 1, len(self.spaced_intervals) - 1))
+
+
+class LadderStrategy(SchedulingStrategy):
+    """
+    The fixed SPACED_INTERVALS ladder: one step up on success, one step down on a failed
+    attempt of a mastered problem, back to the start otherwise, and a 1-day retry on failure.
+    """
+    name = 'ladder'
+
+    def next_review(
+        self,
+        state: ReviewState,
+        success: bool,
+        hints_used: int,
+        is_mastered: bool,
+        today: datetime.date
+    ) -> ReviewOutcome:
+        if success:
+            next_interval_index = min(state.interval_index + 1, len(self.spaced_intervals) - 1)
+        elif is_mastered:
+            next_interval_index = max(state.interval_index - 1, 0)
+        else:
+            next_interval_index = 0
+
+        days_to_next_due = self.spaced_intervals[next_interval_index] if success else 1
+        next_due = today + datetime.timedelta(days=days_to_next_due)
+        return ReviewOutcome(next_interval_index, next_due.isoformat(), state.stability, state.memory_difficulty)
+
+
+class MemoryModelStrategy(SchedulingStrategy):
+    """
+    Per-problem stability and difficulty updated after every review, following the FSRS
+    formulation of the SM-2 family. Stability is the number of days after which recall
+    probability drops to 90%; the next review is scheduled when it reaches desired_retention.
+    """
+    name = 'memory'
+
+    # FSRS v4.5 default parameters.
+    W = (0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+         0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755)
+    DECAY = -0.5
+    FACTOR = 0.9 ** (1 / DECAY) - 1
+
+    def __init__(self, spaced_intervals: Sequence[int], desired_retention: float = 0.9, max_interval: int = 365):
+        super().__init__(spaced_intervals)
+        if not 0 < desired_retention < 1:
+            raise ValueError(f"desired_retention must be between 0 and 1, got {desired_retention}.")
+        self.desired_retention = desired_retention
+        self.max_interval = max_interval
+
+    def retrievability(self, elapsed_days: float, stability: float) -> float:
+        """
+        Recall probability after elapsed_days for a problem with the given stability.
+        """
+        return (1 + self.FACTOR * elapsed_days / stability) ** self.DECAY
+
+    def interval_days(self, stability: float) -> int:
+        """
+        Days until recall probability falls to desired_retention, clamped to [1, max_interval].
+        """
+        days = stability / self.FACTOR * (self.desired_retention ** (1 / self.DECAY) - 1)
+        return max(1, min(self.max_interval, int(round(days))))
+
+    @staticmethod
+    def grade(success: bool, hints_used: int) -> int:
+        if not success:
+            return GRADE_AGAIN
+        return GRADE_HARD if hints_used > 0 else GRADE_GOOD
+
+    def _initial_difficulty(self, grade: int) -> float:
+        w = self.W
+        return min(10.0, max(1.0, w[4] - (grade - 3) * w[5]))
+
+    def next_review(
+        self,
+        state: ReviewState,
+        success: bool,
+        hints_used: int,
+        is_mastered: bool,
+        today: datetime.date
+    ) -> ReviewOutcome:
+        w = self.W
+        grade = self.grade(success, hints_used)
+        elapsed = days_between(state.last_attempt, today)
+
+        if state.stability is None or state.memory_difficulty is None or elapsed is None:
+            stability = w[grade - 1]
+            difficulty = self._initial_difficulty(grade)
+        else:
+            stability, difficulty = state.stability, state.memory_difficulty
+            recall = self.retrievability(elapsed, stability)
+
+            next_difficulty = difficulty - w[6] * (grade - 3)
+            # Mean reversion towards the difficulty of a first review graded Good.
+            difficulty = min(10.0, max(1.0, w[7] * self._initial_difficulty(GRADE_GOOD) + (1 - w[7]) * next_difficulty))
+
+            if grade == GRADE_AGAIN:
+                stability = min(stability, w[11] * difficulty ** -w[12] * ((stability + 1) ** w[13] - 1) * math.exp(w[14] * (1 - recall)))
+            else:
+                hard_penalty = w[15] if grade == GRADE_HARD else 1.0
+                stability = stability * (
+                    1 + math.exp(w[8]) * (11 - difficulty) * stability ** -w[9] * (math.exp(w[10] * (1 - recall)) - 1) * hard_penalty
+                )
+
+        stability = max(0.1, stability)
+        days = self.interval_days(stability)
+        next_due = today + datetime.timedelta(days=days)
+        return ReviewOutcome(self.interval_index_for(days), next_due.isoformat(), stability, difficulty)
+
+    def recall_probabilities(
+        self,
+        stabilities: Sequence[float],
+        last_attempts: Sequence[Optional[str]],
+        today: datetime.date
+    ) -> Optional[array]:
+        factor, decay = self.FACTOR, self.DECAY
+        today_ordinal = today.toordinal()
+        ordinals: Dict[str, int] = {}
+        result = array('d', [math.nan]) * len(stabilities)
+        for i, (stability, last_attempt) in enumerate(zip(stabilities, last_attempts)):
+            if not last_attempt or stability != stability or stability <= 0:
+                continue
+            key = last_attempt[:10]
+            ordinal = ordinals.get(key)
+            if ordinal is None:
+                try:
+                    ordinal = ordinals[key] = datetime.date.fromisoformat(key).toordinal()
+                except ValueError:
+                    continue
+            elapsed = today_ordinal - ordinal
+            result[i] = (1 + factor * (elapsed if elapsed > 0 else 0) / stability) ** decay
+        return result
+
+
+STRATEGIES: Dict[str, Type[SchedulingStrategy]] = {
+    LadderStrategy.name: LadderStrategy,
+    MemoryModelStrategy.name: MemoryModelStrategy,
+}
+
+
+def create_strategy(
+    name: str,
+    spaced_intervals: Sequence[int],
+    desired_retention: float = 0.9,
+    max_interval: int = 365
+) -> SchedulingStrategy:
+    """
+    Instantiate a strategy by name.
+
+    Parameters:
+        name (str): One of STRATEGIES.
+        spaced_intervals (Sequence[int]): The configured interval ladder.
+        desired_retention (float): Target recall probability for memory-model strategies.
+        max_interval (int): Longest interval in days for memory-model strategies.
+
+    Returns:
+        SchedulingStrategy: The strategy.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    key = name.strip().lower()
+    if key not in STRATEGIES:
+        raise ValueError(f"Unknown scheduling strategy '{name}'. Expected one of {sorted(STRATEGIES)}.")
+    if key == MemoryModelStrategy.name:
+        return MemoryModelStrategy(spaced_intervals, desired_retention, max_interval)
+    return STRATEGIES[key](spaced_intervals)
@@ -0,0 +1,114 @@
+from typing import Dict, List, Sequence, Tuple
+
+from logger import get_logger
+
+logger = get_logger(__name__, 'score_tables.log')
+
+DIFFICULTY_RANK_SQL = "CASE p.difficulty WHEN 'Easy' THEN 1 WHEN 'Medium' THEN 2 WHEN 'Hard' THEN 3 END"
+
+
+class ScoreTables:
+    """
+    Scoring weights resolved into dense lists indexed by database IDs.
+
+    topic_priority and pattern_weight are indexed by topic_id and pattern_id. Frequencies are stored as
+    TEXT in Problems, so they are mapped to integer codes inside the due query (see frequency_code_sql);
+    the last slot of frequency_weight holds the default for unknown frequencies. Names are kept only
+    for display and log messages.
+    """
+    __slots__ = (
+        'weights_version', 'topic_priority', 'topic_names', 'pattern_weight', 'pattern_known',
+        'pattern_names', 'frequency_names', 'frequency_weight'
+    )
+
+    def __init__(self):
+        self.weights_version: int = -1
+        self.topic_priority: List[int] = []
+        self.topic_names: List[str] = []
+        self.pattern_weight: List[int] = []
+        self.pattern_known: bytearray = bytearray()
+        self.pattern_names: List[str] = []
+        self.frequency_names: List[str] = []
+        self.frequency_weight: List[int] = []
+
+    @classmethod
+    def build(
+        cls,
+        topics: Sequence[Tuple[int, str]],
+        patterns: Sequence[Tuple[int, str]],
+        weights_version: int,
+        topic_map: Dict[str, int],
+        pattern_map: Dict[str, int],
+        frequency_map: Dict[str, int],
+        default_topic_priority: int,
+        default_pattern_weight: int,
+        default_frequency_weight: int
+    ) -> 'ScoreTables':
+        """
+        Resolve the weight maps against the Topics and Patterns catalog.
+
+        Parameters:
+            topics (Sequence[Tuple[int, str]]): (topic_id, name) pairs.
+            patterns (Sequence[Tuple[int, str]]): (pattern_id, name) pairs.
+            weights_version (int): Weight registry version the maps belong to.
+            topic_map (Dict[str, int]): Topic priority map, as used by ProblemScheduler.
+            pattern_map (Dict[str, int]): Lowercase pattern name to weight.
+            frequency_map (Dict[str, int]): Lowercase frequency name to weight.
+            default_topic_priority (int): Priority for topics missing from topic_map.
+            default_pattern_weight (int): Weight for patterns missing from pattern_map.
+            default_frequency_weight (int): Weight for frequencies missing from frequency_map.
+
+        Returns:
+            ScoreTables: The resolved tables.
+        """
+        topic_size = max((tid for tid, _ in topics), default=-1) + 1
+        pattern_size = max((pid for pid, _ in patterns), default=-1) + 1
+
+        tables = cls()
+        tables.weights_version = weights_version
+        tables.topic_priority = [default_topic_priority] * topic_size
+        tables.topic_names = [''] * topic_size
+        for topic_id, name in topics:
+            tables.topic_priority[topic_id] = topic_map.get(name, default_topic_priority)
+            tables.topic_names[topic_id] = name
+
+        tables.pattern_weight = [default_pattern_weight] * pattern_size
+        tables.pattern_known = bytearray(pattern_size)
+        tables.pattern_names = [''] * pattern_size
+        for pattern_id, name in patterns:
+            key = name.lower()
+            tables.pattern_names[pattern_id] = name
+            if key in pattern_map:
+                tables.pattern_weight[pattern_id] = pattern_map[key]
+                tables.pattern_known[pattern_id] = 1
+
+        tables.frequency_names = list(frequency_map)
+        tables.frequency_weight = [frequency_map[name] for name in tables.frequency_names] + [default_frequency_weight]
+        logger.debug("Built score tables: %d topics, %d patterns, %d frequencies.", len(topics), len(patterns), len(tables.frequency_names))
+        return tables
+
+    def frequency_code_sql(self) -> Tuple[str, List[str]]:
+        """
+        SQL expression mapping p.frequency to its index in frequency_weight.
+
+        Returns:
+            Tuple[str, List[str]]: The CASE expression and its parameters.
+        """
+        whens = ' '.join(f'WHEN ? THEN {code}' for code in range(len(self.frequency_names)))
+        return f"CASE LOWER(p.frequency) {whens} ELSE {len(self.frequency_names)} END", list(self.frequency_names)
+
+    def frequency_code(self, frequency: str) -> int:
+        """
+        Map a frequency name to its code in Python (for problems not loaded through the due query).
+
+        Parameters:
+            frequency (str): Frequency display name.
+
+        Returns:
+            int: Index into frequency_weight.
+        """
+        key = frequency.lower()
+        for code, name in enumerate(self.frequency_names):
+            if name == key:
+                return code
+        return len(self.frequency_names)
@@ -0,0 +1,194 @@
+import math
+import sqlite3
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Union
+
+import profiler
+from load_leveling import DEFAULT_MINUTES_PER_PROBLEM, estimated_minutes
+from logger import get_logger
+from models import Problem, ProblemRow
+
+logger = get_logger(__name__, 'session_planner.log')
+
+# Largest exact dynamic program, in (items x minutes of budget) cells. Beyond it the program runs
+# on the densest items that fit and is compared with a greedy pass over all of them.
+DP_CELL_LIMIT = 4_000_000
+
+
+class TimeEstimates(NamedTuple):
+    """
+    Expected minutes per attempt from recorded history: per problem when it has recorded time,
+    else the average of its topic and difficulty, else of its difficulty, else the default.
+    """
+    by_topic_difficulty: Dict[Tuple[int, str], int]
+    by_difficulty: Dict[str, int]
+    default: int = DEFAULT_MINUTES_PER_PROBLEM
+
+    def minutes_for(self, problem: Union[Problem, ProblemRow]) -> int:
+        if problem.attempts > 0 and problem.time_spent > 0:
+            return estimated_minutes(problem.attempts, problem.time_spent)
+        minutes = self.by_topic_difficulty.get((problem.topic_id, problem.difficulty))
+        if minutes is None:
+            minutes = self.by_difficulty.get(problem.difficulty, self.default)
+        return minutes
+
+
+class SessionPlan(NamedTuple):
+    """
+    Problems chosen for a time-boxed session, highest score first.
+    """
+    problems: List[ProblemRow]
+    minutes: Dict[int, int]
+    total_minutes: int
+    total_score: float
+    exact: bool
+
+
+def load_time_estimates(conn: sqlite3.Connection) -> TimeEstimates:
+    """
+    Average recorded minutes per attempt by topic and difficulty, in one grouped query.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        TimeEstimates: Fallback averages for problems without their own recorded time.
+    """
+    rows = conn.execute('''
+        SELECT p.topic_id, p.difficulty, SUM(up.time_spent), SUM(up.attempts)
+        FROM UserProgress up
+        JOIN Problems p ON p.id = up.problem_id
+        WHERE up.attempts > 0 AND up.time_spent > 0
+        GROUP BY p.topic_id, p.difficulty
+    ''').fetchall()
+    by_topic_difficulty: Dict[Tuple[int, str], int] = {}
+    difficulty_totals: Dict[str, List[int]] = {}
+    for topic_id, difficulty, time_spent, attempts in rows:
+        by_topic_difficulty[(topic_id, difficulty)] = estimated_minutes(attempts, time_spent)
+        totals = difficulty_totals.setdefault(difficulty, [0, 0])
+        totals[0] += time_spent
+        totals[1] += attempts
+    by_difficulty = {
+        difficulty: estimated_minutes(attempts, time_spent)
+        for difficulty, (time_spent, attempts) in difficulty_totals.items()
+    }
+    return TimeEstimates(by_topic_difficulty, by_difficulty)
+
+
+def _solve_exact(items: Sequence[int], values: Sequence[float], weights: Sequence[int], capacity: int) -> List[int]:
+    """
+    0/1 knapsack by dynamic programming over the budget. best[c] is the highest value within c
+    units; each item's pass is a few list comprehensions over best, and one bytes row per item
+    records where taking it improved best, for the walk back.
+    """
+    best = [0.0] * (capacity + 1)
+    taken: List[bytes] = []
+    for i in items:
+        w, v = weights[i], values[i]
+        with_item = [b + v for b in best[:capacity + 1 - w]]
+        without = best[w:]
+        taken.append(bytes(y > x for x, y in zip(without, with_item)))
+        best = best[:w] + [y if y > x else x for x, y in zip(without, with_item)]
+
+    chosen: List[int] = []
+    c = capacity
+    for k in range(len(items) - 1, -1, -1):
+        w = weights[items[k]]
+        if c >= w and taken[k][c - w]:
+            chosen.append(items[k])
+            c -= w
+    return chosen
+
+
+def _solve_greedy(items: Sequence[int], values: Sequence[float], weights: Sequence[int], capacity: int) -> List[int]:
+    """
+    Take items by value per unit while they fit, or the single most valuable item if that is
+    worth more: at least half the optimum.
+    """
+    chosen: List[int] = []
+    remaining = capacity
+    for i in items:
+        if weights[i] <= remaining:
+            chosen.append(i)
+            remaining -= weights[i]
+    best_single = max(items, key=values.__getitem__)
+    if values[best_single] > sum(values[i] for i in chosen):
+        return [best_single]
+    return chosen
+
+
+def knapsack(values: Sequence[float], weights: Sequence[int], capacity: int) -> Tuple[List[int], bool]:
+    """
+    Choose items maximizing total value with total weight at most capacity.
+
+    Solved exactly while items x capacity stays within DP_CELL_LIMIT, after dividing weights and
+    capacity by their common divisor (default estimates are all multiples of the same minutes).
+    Larger instances run the exact program on the densest items that fit the limit and keep the
+    better of that and the greedy solution over all items.
+
+    Parameters:
+        values (Sequence[float]): Value per item; items worth 0 or less are never chosen.
+        weights (Sequence[int]): Non-negative integer weight per item.
+        capacity (int): Weight budget.
+
+    Returns:
+        Tuple[List[int], bool]: Chosen item positions, and whether the choice is optimal.
+    """
+    free = [i for i in range(len(values)) if values[i] > 0 and weights[i] <= 0]
+    items = [i for i in range(len(values)) if values[i] > 0 and 0 < weights[i] <= capacity]
+    if not items or sum(weights[i] for i in items) <= capacity:
+        return free + items, True
+
+    divisor = 0
+    for i in items:
+        divisor = math.gcd(divisor, weights[i])
+    if divisor > 1:
+        weights = [w // divisor if w > 0 else w for w in weights]
+        capacity //= divisor
+
+    items.sort(key=lambda i: values[i] / weights[i], reverse=True)
+    core_size = max(1, DP_CELL_LIMIT // (capacity + 1))
+    if len(items) <= core_size:
+        return free + _solve_exact(items, values, weights, capacity), True
+
+    exact = _solve_exact(items[:core_size], values, weights, capacity)
+    greedy = _solve_greedy(items, values, weights, capacity)
+    chosen = exact if sum(values[i] for i in exact) >= sum(values[i] for i in greedy) else greedy
+    return free + chosen, False
+
+
+def plan_session(problems: Sequence[ProblemRow], estimates: TimeEstimates, minutes: int) -> SessionPlan:
+    """
+    Choose the due problems with the highest total scheduler score that fit in a time budget.
+
+    Scores only rank problems and may be negative, so each is counted relative to the lowest due
+    score, plus one: every due problem is worth doing, and more urgent ones are worth more.
+    Unscored problems count as the least urgent.
+
+    Parameters:
+        problems (Sequence[ProblemRow]): Due problems as returned by get_due_problems.
+        estimates (TimeEstimates): Expected minutes per problem.
+        minutes (int): Time budget.
+
+    Returns:
+        SessionPlan: The chosen problems with their estimates.
+    """
+    with profiler.span('session_planner.plan'):
+        weights = [estimates.minutes_for(problem) for problem in problems]
+        scores = [problem.score if problem.score is not None else math.nan for problem in problems]
+        known = [score for score in scores if score == score]
+        lowest = min(known) if known else 0.0
+        values = [score - lowest + 1.0 if score == score else 1.0 for score in scores]
+        chosen, exact = knapsack(values, weights, minutes)
+    chosen.sort(key=values.__getitem__, reverse=True)
+    plan = SessionPlan(
+        problems=[problems[i] for i in chosen],
+        minutes={problems[i].id: weights[i] for i in chosen},
+        total_minutes=sum(weights[i] for i in chosen),
+        total_score=sum(values[i] for i in chosen),
+        exact=exact
+    )
+    logger.info(
+        f"Planned {len(plan.problems)} of {len(problems)} due problems in {plan.total_minutes}/{minutes} "
+        f"minutes (score {plan.total_score:.1f}, {'optimal' if exact else 'approximate'})."
+    )
+    return plan
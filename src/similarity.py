@@ -0,0 +1,380 @@
+import random
+import sqlite3
+from bisect import bisect_left
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import profiler
+from logger import get_logger
+
+logger = get_logger(__name__, 'similarity.log')
+
+# Neighbors stored per problem.
+NEIGHBORS = 10
+# Tokens shared by more problems than this (typically a large topic) are not expanded exactly;
+# problems overlapping only through them are found by MinHash banding instead.
+POSTING_LIMIT = 500
+# MinHash signature of BANDS pairs of values; two problems become candidates when any pair matches.
+BANDS = 16
+# Most candidates a problem takes from one LSH bucket: the members with the nearest ids.
+BUCKET_LIMIT = 32
+
+_PATTERN, _TOPIC, _NEIGHBORHOOD = 1, 2, 3
+_PRIME = (1 << 61) - 1
+_BUCKET_MASK = (1 << 63) - 1
+_rng = random.Random(0x5eed)
+_HASHES = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(BANDS * 2)]
+
+# Problem features as tokens: (kind << 32) | id.
+Features = Dict[int, FrozenSet[int]]
+
+SIMILAR_PROBLEMS_SCHEMA = '''CREATE TABLE IF NOT EXISTS SimilarProblems (
+    problem_id INTEGER NOT NULL,
+    rank INTEGER NOT NULL,
+    similar_id INTEGER NOT NULL,
+    similarity REAL NOT NULL,
+    PRIMARY KEY (problem_id, rank)
+) WITHOUT ROWID'''
+
+SIMILAR_BUCKETS_SCHEMA = '''CREATE TABLE IF NOT EXISTS SimilarBuckets (
+    problem_id INTEGER NOT NULL,
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    PRIMARY KEY (problem_id, band)
+) WITHOUT ROWID'''
+
+SIMILARITY_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_similar_problems_similar ON SimilarProblems(similar_id)',
+    'CREATE INDEX IF NOT EXISTS idx_similar_buckets_bucket ON SimilarBuckets(band, bucket, problem_id)',
+)
+
+
+class SimilarProblem(NamedTuple):
+    """
+    One stored neighbor of a problem.
+    """
+    id: int
+    title: str
+    difficulty: str
+    topic: str
+    similarity: float
+
+
+def load_features(conn: sqlite3.Connection) -> Features:
+    """
+    Read every problem's feature set in one query: its patterns, its topic, and its prerequisite
+    neighborhood (itself, its prerequisites and the problems that require it), so problems built
+    on the same prerequisites overlap.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        Features: Token set per problem id.
+    """
+    features: Dict[int, Set[int]] = {}
+    for problem_id, kind, value in conn.execute(f'''
+        SELECT id, {_TOPIC}, topic_id FROM Problems
+        UNION ALL SELECT id, {_NEIGHBORHOOD}, id FROM Problems
+        UNION ALL SELECT problem_id, {_PATTERN}, pattern_id FROM ProblemPatterns
+        UNION ALL SELECT problem_id, {_NEIGHBORHOOD}, prerequisite_id FROM ProblemPrerequisites
+        UNION ALL SELECT prerequisite_id, {_NEIGHBORHOOD}, problem_id FROM ProblemPrerequisites
+    '''):
+        features.setdefault(problem_id, set()).add((kind << 32) | value)
+    return {problem_id: frozenset(tokens) for problem_id, tokens in features.items()}
+
+
+class SimilarityIndex:
+    """
+    Inverted index over problem features for top-k Jaccard neighbors.
+
+    Candidates of a problem are the problems sharing one of its tokens with at most POSTING_LIMIT
+    problems, plus its MinHash band mates when some token is more common than that. Every
+    candidate is then scored with the exact Jaccard similarity, so small catalogs get exact
+    neighbors and large ones are not expanded quadratically through their biggest topics.
+
+    Band buckets are computed in memory for a full rebuild, or read from SimilarBuckets through
+    `conn` when refreshing a few problems, so a refresh only hashes the problems it touches.
+    """
+
+    def __init__(self, features: Features, conn: Optional[sqlite3.Connection] = None):
+        self.features = features
+        postings: Dict[int, List[int]] = {}
+        for problem_id in sorted(features):
+            for token in features[problem_id]:
+                postings.setdefault(token, []).append(problem_id)
+        self.postings = postings
+        self._conn = conn
+        self._token_hashes: Dict[int, List[int]] = {}
+        self._keys: Dict[int, List[int]] = {}
+        self._buckets: Optional[List[Dict[int, List[int]]]] = None
+
+    def band_keys(self, problem_id: int) -> List[int]:
+        """
+        Parameters:
+            problem_id (int): Problem to hash.
+
+        Returns:
+            List[int]: The problem's bucket in each band.
+        """
+        keys = self._keys.get(problem_id)
+        if keys is not None:
+            return keys
+        vectors = []
+        for token in self.features[problem_id]:
+            hashes = self._token_hashes.get(token)
+            if hashes is None:
+                hashes = self._token_hashes[token] = [(a * token + b) % _PRIME for a, b in _HASHES]
+            vectors.append(hashes)
+        signature = list(map(min, *vectors)) if len(vectors) > 1 else vectors[0]
+        keys = self._keys[problem_id] = [
+            ((high * 1000003) ^ low) & _BUCKET_MASK for high, low in zip(signature[0::2], signature[1::2])
+        ]
+        return keys
+
+    def _banded(self) -> List[Dict[int, List[int]]]:
+        if self._buckets is None:
+            with profiler.span('similarity.minhash'):
+                buckets: List[Dict[int, List[int]]] = [{} for _ in range(BANDS)]
+                for problem_id in sorted(self.features):
+                    for band, key in zip(buckets, self.band_keys(problem_id)):
+                        band.setdefault(key, []).append(problem_id)
+                self._buckets = buckets
+        return self._buckets
+
+    def bucket_rows(self) -> Iterable[Tuple[int, int, int]]:
+        """
+        Returns:
+            Iterable[Tuple[int, int, int]]: (problem id, band, bucket) for every problem, in
+            SimilarBuckets key order.
+        """
+        for problem_id in sorted(self.features):
+            for band, key in enumerate(self.band_keys(problem_id)):
+                yield problem_id, band, key
+
+    def _band_mates(self, problem_id: int, band: int, key: int) -> List[int]:
+        half = BUCKET_LIMIT // 2
+        if self._conn is None:
+            members = self._banded()[band][key]
+            position = bisect_left(members, problem_id)
+            return members[max(0, position - half):position + half + 1]
+        below = self._conn.execute('''
+            SELECT problem_id FROM SimilarBuckets WHERE band = ? AND bucket = ? AND problem_id < ?
+            ORDER BY problem_id DESC LIMIT ?
+        ''', (band, key, problem_id, half)).fetchall()
+        above = self._conn.execute('''
+            SELECT problem_id FROM SimilarBuckets WHERE band = ? AND bucket = ? AND problem_id >= ?
+            ORDER BY problem_id LIMIT ?
+        ''', (band, key, problem_id, half + 1)).fetchall()
+        return [row[0] for row in below] + [row[0] for row in above]
+
+    def candidates(self, problem_id: int) -> Set[int]:
+        """
+        Parameters:
+            problem_id (int): Problem to find neighbors for.
+
+        Returns:
+            Set[int]: Problems worth scoring against it.
+        """
+        found: Set[int] = set()
+        common = False
+        for token in self.features.get(problem_id, ()):
+            posting = self.postings[token]
+            if len(posting) <= POSTING_LIMIT:
+                found.update(posting)
+            else:
+                common = True
+        if common:
+            for band, key in enumerate(self.band_keys(problem_id)):
+                found.update(self._band_mates(problem_id, band, key))
+        found.discard(problem_id)
+        return found
+
+    def similarity(self, a: int, b: int) -> float:
+        """
+        Returns:
+            float: Jaccard similarity of two problems' features.
+        """
+        tokens_a, tokens_b = self.features[a], self.features[b]
+        shared = len(tokens_a & tokens_b)
+        return shared / (len(tokens_a) + len(tokens_b) - shared) if shared else 0.0
+
+    def neighbors(self, problem_id: int, k: int = NEIGHBORS) -> List[Tuple[int, float]]:
+        """
+        Parameters:
+            problem_id (int): Problem to find neighbors for.
+            k (int): Neighbors to return.
+
+        Returns:
+            List[Tuple[int, float]]: (problem id, similarity), most similar first, ties by id.
+        """
+        features = self.features
+        tokens = features[problem_id]
+        size = len(tokens)
+        scored = []
+        for other in self.candidates(problem_id):
+            other_tokens = features[other]
+            shared = len(tokens & other_tokens)
+            if shared:
+                scored.append((-shared / (size + len(other_tokens) - shared), other))
+        scored.sort()
+        return [(other, -negated) for negated, other in scored[:k]]
+
+
+def ensure_similar_problems(conn: sqlite3.Connection) -> None:
+    """
+    Create the SimilarProblems and SimilarBuckets tables if missing, building them for the
+    existing catalog when they are first created.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+    """
+    existing = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('SimilarProblems', 'SimilarBuckets')"
+    ).fetchone()[0]
+    conn.execute(SIMILAR_PROBLEMS_SCHEMA)
+    conn.execute(SIMILAR_BUCKETS_SCHEMA)
+    for statement in SIMILARITY_INDEXES:
+        conn.execute(statement)
+    if existing < 2:
+        rebuild_similar(conn)
+
+
+def _write_neighbors(conn: sqlite3.Connection, index: SimilarityIndex, problem_ids: Iterable[int], k: int) -> None:
+    conn.executemany(
+        'INSERT INTO SimilarProblems (problem_id, rank, similar_id, similarity) VALUES (?, ?, ?, ?)',
+        (
+            (problem_id, rank, other, similarity)
+            for problem_id in problem_ids
+            for rank, (other, similarity) in enumerate(index.neighbors(problem_id, k))
+        )
+    )
+
+
+def rebuild_similar(conn: sqlite3.Connection, k: int = NEIGHBORS) -> int:
+    """
+    Recompute the buckets and neighbors of every problem. The caller commits.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection inside a write transaction.
+        k (int): Neighbors per problem.
+
+    Returns:
+        int: Problems indexed.
+    """
+    with profiler.span('similarity.rebuild'):
+        index = SimilarityIndex(load_features(conn))
+        # Refill the buckets in key order and build the bucket index once afterwards, rather
+        # than maintaining it row by row.
+        conn.execute('DROP INDEX IF EXISTS idx_similar_buckets_bucket')
+        conn.execute('DELETE FROM SimilarBuckets')
+        conn.executemany(
+            'INSERT INTO SimilarBuckets (problem_id, band, bucket) VALUES (?, ?, ?)', index.bucket_rows()
+        )
+        conn.execute(SIMILARITY_INDEXES[1])
+        conn.execute('DELETE FROM SimilarProblems')
+        _write_neighbors(conn, index, sorted(index.features), k)
+    logger.info(f"Rebuilt similar-problem index for {len(index.features)} problems.")
+    return len(index.features)
+
+
+def _chunks(values: List[int], size: int = 500) -> Iterable[List[int]]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def refresh_similar(conn: sqlite3.Connection, problem_ids: Iterable[int], k: int = NEIGHBORS) -> int:
+    """
+    Update the index after the features of some problems changed (new problems, patterns or
+    prerequisites). The changed problems are rehashed into SimilarBuckets; recomputed are their
+    neighbors, those of the problems that list one of them, and those of the problems one of them
+    now outranks the last stored neighbor of. The caller commits.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection inside the transaction that changed the catalog.
+        problem_ids (Iterable[int]): Problems whose features changed.
+        k (int): Neighbors per problem.
+
+    Returns:
+        int: Problems whose neighbors were recomputed.
+    """
+    with profiler.span('similarity.refresh'):
+        index = SimilarityIndex(load_features(conn), conn)
+        dirty = sorted(set(problem_ids) & index.features.keys())
+        if not dirty:
+            return 0
+        if len(dirty) * 2 >= len(index.features):
+            return rebuild_similar(conn, k)
+
+        for chunk in _chunks(dirty):
+            placeholders = ', '.join('?' * len(chunk))
+            conn.execute(f'DELETE FROM SimilarBuckets WHERE problem_id IN ({placeholders})', chunk)
+        conn.executemany(
+            'INSERT INTO SimilarBuckets (problem_id, band, bucket) VALUES (?, ?, ?)',
+            [(problem_id, band, key) for problem_id in dirty for band, key in enumerate(index.band_keys(problem_id))]
+        )
+
+        affected: Set[int] = set(dirty)
+        similarities: Dict[int, float] = {}
+        for problem_id in dirty:
+            for other in index.candidates(problem_id):
+                similarity = index.similarity(problem_id, other)
+                if similarity > similarities.get(other, 0.0):
+                    similarities[other] = similarity
+        candidates = sorted(set(similarities) - affected)
+        for chunk in _chunks(dirty):
+            placeholders = ', '.join('?' * len(chunk))
+            affected.update(row[0] for row in conn.execute(
+                f'SELECT problem_id FROM SimilarProblems WHERE similar_id IN ({placeholders})', chunk
+            ))
+        for chunk in _chunks(candidates):
+            placeholders = ', '.join('?' * len(chunk))
+            stored = {
+                row[0]: (row[1], row[2]) for row in conn.execute(f'''
+                    SELECT problem_id, COUNT(*), MIN(similarity) FROM SimilarProblems
+                    WHERE problem_id IN ({placeholders}) GROUP BY problem_id
+                ''', chunk)
+            }
+            for other in chunk:
+                count, lowest = stored.get(other, (0, 0.0))
+                if count < k or similarities[other] >= lowest:
+                    affected.add(other)
+
+        refreshed = sorted(affected)
+        for chunk in _chunks(refreshed):
+            placeholders = ', '.join('?' * len(chunk))
+            conn.execute(f'DELETE FROM SimilarProblems WHERE problem_id IN ({placeholders})', chunk)
+        _write_neighbors(conn, index, refreshed, k)
+    logger.info(f"Refreshed similar problems of {len(refreshed)} problems after {len(dirty)} changed.")
+    return len(refreshed)
+
+
+def similar_problems(
+    conn: sqlite3.Connection,
+    problem_id: int,
+    limit: int = 5,
+    exclude_mastered: bool = True
+) -> List[SimilarProblem]:
+    """
+    Look up the stored neighbors of a problem: one primary-key range scan of SimilarProblems.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+        problem_id (int): Problem to find similar problems for.
+        limit (int): Most problems to return.
+        exclude_mastered (bool): Skip problems already mastered.
+
+    Returns:
+        List[SimilarProblem]: Most similar first.
+    """
+    mastered_filter = 'AND COALESCE(up.mastered, 0) = 0' if exclude_mastered else ''
+    rows = conn.execute(f'''
+        SELECT s.similar_id, p.title, p.difficulty, t.name, s.similarity
+        FROM SimilarProblems s
+        JOIN Problems p ON p.id = s.similar_id
+        JOIN Topics t ON t.topic_id = p.topic_id
+        LEFT JOIN UserProgress up ON up.problem_id = s.similar_id
+        WHERE s.problem_id = ? {mastered_filter}
+        ORDER BY s.rank
+        LIMIT ?
+    ''', (problem_id, limit)).fetchall()
+    return [SimilarProblem(*row) for row in rows]
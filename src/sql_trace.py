@@ -0,0 +1,331 @@
+import functools
+import os
+import re
+import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, List, Optional, Type, TypeVar
+
+from prettytable import PrettyTable
+from logger import get_logger
+
+logger = get_logger(__name__, 'sql_trace.log')
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+# Budget modes: 'off' ignores budgets, 'warn' logs overruns, 'strict' raises QueryBudgetExceeded.
+BUDGET_MODES = ('off', 'warn', 'strict')
+BUDGET_ENV_VAR = 'LEETCODE_SQL_BUDGET'
+
+_TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK', 'END', 'SAVEPOINT', 'RELEASE')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised in strict mode when a command or method issues more statements than its budget.
+    """
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Reduce a statement to its shape: literals become '?', IN-lists collapse and whitespace is folded.
+
+    Parameters:
+        sql (str): SQL text, either with placeholders or with expanded parameters.
+
+    Returns:
+        str: Normalized statement text.
+    """
+    text = _STRING_LITERAL.sub('?', sql)
+    text = _NUMBER_LITERAL.sub('?', text)
+    text = _PLACEHOLDER_LIST.sub('(?, ...)', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+class StatementStats:
+    """
+    Aggregated statistics for one normalized statement.
+    """
+    __slots__ = ('sql', 'count', 'seconds', 'rows')
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.count = 0
+        self.seconds = 0.0
+        self.rows = 0
+
+
+class QueryTracer:
+    """
+    Counts and profiles statements on every connection attached to it.
+
+    Statement counts come from sqlite3.Connection.set_trace_callback, so they include statements
+    that are not issued through a cursor (implicit BEGIN/COMMIT, executemany iterations).
+    Execution time and returned rows are measured by TracedCursor.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, StatementStats] = {}
+        self.total: int = 0
+
+    def _entry(self, sql: str) -> StatementStats:
+        key = normalize_sql(sql)
+        entry = self.stats.get(key)
+        if entry is None:
+            entry = self.stats[key] = StatementStats(key)
+        return entry
+
+    def on_statement(self, sql: str) -> None:
+        """
+        Trace callback invoked by sqlite3 for every statement executed.
+
+        Parameters:
+            sql (str): Statement text with bound parameters expanded.
+        """
+        self._entry(sql).count += 1
+        if not sql.lstrip().upper().startswith(_TRANSACTION_CONTROL):
+            self.total += 1
+
+    def record(self, sql: str, seconds: float, rows: int) -> None:
+        """
+        Add execution time and returned rows for a statement.
+
+        Parameters:
+            sql (str): Statement text.
+            seconds (float): Elapsed time.
+            rows (int): Rows fetched.
+        """
+        entry = self._entry(sql)
+        entry.seconds += seconds
+        entry.rows += rows
+
+    def attach(self, conn: sqlite3.Connection) -> None:
+        """
+        Start tracing a connection.
+
+        Parameters:
+            conn (sqlite3.Connection): Connection to trace.
+        """
+        conn.set_trace_callback(self.on_statement)
+
+    def render_report(self) -> PrettyTable:
+        """
+        Build a table of statements ordered by execution count.
+
+        Returns:
+            PrettyTable: The report.
+        """
+        table = PrettyTable()
+        table.field_names = ["Count", "Total (ms)", "Rows", "Statement"]
+        table.align["Statement"] = "l"
+        table.max_width["Statement"] = 100
+        for entry in sorted(self.stats.values(), key=lambda e: (-e.count, -e.seconds)):
+            table.add_row([entry.count, f"{entry.seconds * 1000:.2f}", entry.rows, entry.sql])
+        table.title = f"SQL trace ({self.total} statements)"
+        return table
+
+
+class TracedCursor(sqlite3.Cursor):
+    """
+    Cursor that reports execution time and fetched rows to the active tracer.
+    """
+
+    def execute(self, sql: str, parameters: Any = ()) -> 'TracedCursor':
+        self._traced_sql = sql
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            _report(sql, time.perf_counter() - start, 0)
+
+    def executemany(self, sql: str, seq_of_parameters: Any) -> 'TracedCursor':
+        self._traced_sql = sql
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            _report(sql, time.perf_counter() - start, 0)
+
+    def _timed_fetch(self, fetch: Callable[..., Any], *args: Any) -> Any:
+        start = time.perf_counter()
+        result = fetch(*args)
+        if result is None:
+            rows = 0
+        elif isinstance(result, list):
+            rows = len(result)
+        else:
+            rows = 1
+        _report(getattr(self, '_traced_sql', ''), time.perf_counter() - start, rows)
+        return result
+
+    def fetchone(self) -> Any:
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, size: int = 1) -> List[Any]:
+        return self._timed_fetch(super().fetchmany, size)
+
+    def fetchall(self) -> List[Any]:
+        return self._timed_fetch(super().fetchall)
+
+    def __next__(self) -> Any:
+        row = super().__next__()
+        _report(getattr(self, '_traced_sql', ''), 0.0, 1)
+        return row
+
+
+class TracedConnection(sqlite3.Connection):
+    """
+    Connection whose cursors (including those created by Connection.execute) are TracedCursors.
+    """
+
+    def cursor(self, factory: Type[sqlite3.Cursor] = TracedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+
+_tracer: Optional[QueryTracer] = None
+_budget_mode: str = os.environ.get(BUDGET_ENV_VAR, 'off').lower()
+if _budget_mode not in BUDGET_MODES:
+    _budget_mode = 'off'
+
+
+def _report(sql: str, seconds: float, rows: int) -> None:
+    if _tracer is not None and sql:
+        _tracer.record(sql, seconds, rows)
+
+
+def enable() -> QueryTracer:
+    """
+    Start tracing connections opened from now on. Keeps an existing tracer if already enabled.
+
+    Returns:
+        QueryTracer: The active tracer.
+    """
+    global _tracer
+    if _tracer is None:
+        _tracer = QueryTracer()
+    return _tracer
+
+
+def disable() -> None:
+    """
+    Stop tracing newly opened connections and drop collected statistics.
+    """
+    global _tracer
+    _tracer = None
+
+
+def get_tracer() -> Optional[QueryTracer]:
+    """
+    Returns:
+        Optional[QueryTracer]: The active tracer, or None if tracing is disabled.
+    """
+    return _tracer
+
+
+def set_budget_mode(mode: str) -> None:
+    """
+    Select how query budgets are enforced. Any mode other than 'off' enables tracing.
+
+    Parameters:
+        mode (str): One of 'off', 'warn' or 'strict'.
+    """
+    global _budget_mode
+    if mode not in BUDGET_MODES:
+        raise ValueError(f"Unknown budget mode '{mode}'. Expected one of {BUDGET_MODES}.")
+    _budget_mode = mode
+    if mode != 'off':
+        enable()
+
+
+def connection_factory() -> Type[sqlite3.Connection]:
+    """
+    Connection class to pass to sqlite3.connect(factory=...).
+
+    Returns:
+        Type[sqlite3.Connection]: TracedConnection while tracing, else sqlite3.Connection.
+    """
+    return TracedConnection if _tracer is not None else sqlite3.Connection
+
+
+def attach(conn: sqlite3.Connection) -> None:
+    """
+    Attach the active tracer to a connection. No-op when tracing is disabled.
+
+    Parameters:
+        conn (sqlite3.Connection): Newly opened connection.
+    """
+    if _tracer is not None:
+        _tracer.attach(conn)
+
+
+@contextmanager
+def query_budget_scope(name: str, max_queries: int) -> Generator[None, None, None]:
+    """
+    Assert that the enclosed block issues at most max_queries statements (transaction control excluded).
+
+    Parameters:
+        name (str): Name of the command or method, used in messages.
+        max_queries (int): Maximum number of statements allowed.
+
+    Raises:
+        QueryBudgetExceeded: In strict mode, if the budget is exceeded.
+    """
+    if _budget_mode == 'off' or _tracer is None:
+        yield
+        return
+    tracer = _tracer
+    start = tracer.total
+    yield
+    used = tracer.total - start
+    if used > max_queries:
+        message = f"'{name}' issued {used} SQL statements, exceeding its budget of {max_queries}."
+        if _budget_mode == 'strict':
+            logger.error(message)
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+    else:
+        logger.debug(f"'{name}' issued {used}/{max_queries} SQL statements.")
+
+
+def query_budget(max_queries: int, name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Decorator applying query_budget_scope to every call of a function.
+
+    Parameters:
+        max_queries (int): Maximum number of statements per call.
+        name (Optional[str]): Label used in messages. Defaults to the function's qualified name.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(func: F) -> F:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _budget_mode == 'off':
+                return func(*args, **kwargs)
+            with query_budget_scope(label, max_queries):
+                return func(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorator
+
+
+def finish() -> None:
+    """
+    Print the statement report to stderr and stop tracing.
+    """
+    if _tracer is None:
+        return
+    print(_tracer.render_report(), file=sys.stderr)
+    disable()
+
+
+if _budget_mode != 'off':
+    enable()
@@ -0,0 +1,186 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+from prettytable import PrettyTable
+
+from db_utils import is_lock_error
+from logger import get_logger
+
+logger = get_logger(__name__, 'stress_concurrency.log')
+
+
+def _writer(db_path: str, worker: int, updates: int, problem_ids: List[int], seed: int, results: Any) -> None:
+    """
+    Record `updates` attempts on random problems through ProblemScheduler.update_progress.
+    """
+    from scheduler import ProblemScheduler
+    scheduler = ProblemScheduler()
+    scheduler.db_path = db_path
+    rng = random.Random(seed + worker)
+    written: Counter = Counter()
+    lock_errors = other_errors = 0
+    start = time.perf_counter()
+    for _ in range(updates):
+        problem_id = rng.choice(problem_ids)
+        try:
+            scheduler.update_progress(problem_id, rng.random() < 0.7, 0, 1)
+            written[problem_id] += 1
+        except sqlite3.Error as e:
+            if is_lock_error(e):
+                lock_errors += 1
+            else:
+                other_errors += 1
+                logger.error(f"Writer {worker}: {e}")
+    results.put(('writer', worker, dict(written), lock_errors, other_errors, time.perf_counter() - start))
+
+
+def _reader(db_path: str, worker: int, stop: Any, results: Any) -> None:
+    """
+    Run the view-progress and due-problem reads until stop is set.
+    """
+    from scheduler import ProblemScheduler
+    from view_progress import load_progress
+    scheduler = ProblemScheduler()
+    scheduler.db_path = db_path
+    reads = lock_errors = other_errors = 0
+    start = time.perf_counter()
+    while not stop.is_set():
+        try:
+            load_progress(db_path)
+            scheduler.cache.bump('stress')
+            scheduler.get_due_problems()
+            reads += 1
+        except sqlite3.Error as e:
+            if is_lock_error(e):
+                lock_errors += 1
+            else:
+                other_errors += 1
+                logger.error(f"Reader {worker}: {e}")
+    results.put(('reader', worker, reads, lock_errors, other_errors, time.perf_counter() - start))
+
+
+def _progress_totals(db_path: str) -> Dict[int, int]:
+    conn = sqlite3.connect(db_path)
+    try:
+        return {row[0]: row[1] for row in conn.execute('SELECT problem_id, attempts FROM UserProgress')}
+    finally:
+        conn.close()
+
+
+def run(db_path: str, writers: int, readers: int, updates: int, seed: int) -> Dict[str, Any]:
+    """
+    Hammer a copy of a database with concurrent writer and reader processes and check that every
+    committed update is present afterwards.
+
+    Parameters:
+        db_path (str): Database to copy; the original is never written.
+        writers (int): Writer processes.
+        readers (int): Reader processes.
+        updates (int): update_progress calls per writer.
+        seed (int): Random seed for the problems each writer picks.
+
+    Returns:
+        Dict[str, Any]: Throughput, error counts and the number of lost updates.
+    """
+    work_dir = tempfile.mkdtemp(prefix='leetcode-stress-')
+    work_path = os.path.join(work_dir, os.path.basename(db_path))
+    try:
+        source = sqlite3.connect(db_path)
+        target = sqlite3.connect(work_path)
+        source.backup(target)
+        problem_ids = [row[0] for row in target.execute('SELECT id FROM Problems')]
+        source.close()
+        target.close()
+        if not problem_ids:
+            raise ValueError(f"Database '{db_path}' has no problems to update.")
+        before = _progress_totals(work_path)
+
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        stop = context.Event()
+        reader_procs = [context.Process(target=_reader, args=(work_path, i, stop, results)) for i in range(readers)]
+        writer_procs = [
+            context.Process(target=_writer, args=(work_path, i, updates, problem_ids, seed, results))
+            for i in range(writers)
+        ]
+        start = time.perf_counter()
+        for process in reader_procs + writer_procs:
+            process.start()
+
+        messages = []
+        while len(messages) < writers:
+            try:
+                messages.append(results.get(timeout=600))
+            except queue.Empty:
+                raise RuntimeError("Writers did not finish within 10 minutes.")
+        elapsed = time.perf_counter() - start
+        stop.set()
+        while len(messages) < writers + readers:
+            messages.append(results.get(timeout=600))
+        for process in reader_procs + writer_procs:
+            process.join()
+
+        written: Counter = Counter()
+        summary = {'writes': 0, 'reads': 0, 'write_lock_errors': 0, 'read_lock_errors': 0, 'other_errors': 0}
+        for kind, _, payload, lock_errors, other_errors, _ in messages:
+            summary['other_errors'] += other_errors
+            if kind == 'writer':
+                written.update(payload)
+                summary['writes'] += sum(payload.values())
+                summary['write_lock_errors'] += lock_errors
+            else:
+                summary['reads'] += payload
+                summary['read_lock_errors'] += lock_errors
+
+        after = _progress_totals(work_path)
+        lost = sum(
+            abs(after.get(problem_id, 0) - before.get(problem_id, 0) - written[problem_id])
+            for problem_id in set(after) | set(written)
+        )
+        summary.update({
+            'seconds': elapsed,
+            'writes_per_second': summary['writes'] / elapsed if elapsed else 0.0,
+            'reads_per_second': summary['reads'] / elapsed if elapsed else 0.0,
+            'lost_updates': lost,
+        })
+        return summary
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Stress concurrent access: writer and reader processes on a copy of the database."
+    )
+    parser.add_argument('--db-path', default='leetcode_mastery.db', help='Database to copy for the test.')
+    parser.add_argument('--writers', type=int, default=4, help='Writer processes.')
+    parser.add_argument('--readers', type=int, default=4, help='Reader processes.')
+    parser.add_argument('--updates', type=int, default=50, help='Progress updates per writer.')
+    parser.add_argument('--seed', type=int, default=7, help='Random seed.')
+    args = parser.parse_args()
+
+    summary = run(args.db_path, args.writers, args.readers, args.updates, args.seed)
+    logger.info(f"Stress test: {summary}")
+    table = PrettyTable()
+    table.field_names = ["Metric", "Value"]
+    table.align["Metric"] = "l"
+    for key, value in summary.items():
+        table.add_row([key, f"{value:.2f}" if isinstance(value, float) else value])
+    table.title = f"{args.writers} writers x {args.updates} updates, {args.readers} readers"
+    print(table)
+    if summary['lost_updates'] or summary['write_lock_errors'] or summary['other_errors']:
+        print("⚠️ Concurrent access lost or rejected updates.")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,11 @@
 from enum import Enum
-from typing import Dict
+from typing import Dict, Optional
 from logger import get_logger
 
 logger = get_logger(__name__, 'topic_priority.log')
 
+_PRIORITY_MAP: Optional[Dict[str, int]] = None
+
 class TopicPriority(Enum):
     """
     Enum representing different topics and their associated priorities.
@@ -41,12 +43,15 @@ class TopicPriority(Enum):
     @classmethod
     def _display_name_to_priority_map(cls) -> Dict[str, int]:
         """
-        Creates a mapping from display names (in lowercase) to their priorities.
+        Returns the cached mapping from display names (in lowercase) to their priorities.
 
         Returns:
             Dict[str, int]: Mapping of topic display names to priorities.
         """
-        return {member.display_name.lower(): member.priority for member in cls}
+        global _PRIORITY_MAP
+        if _PRIORITY_MAP is None:
+            _PRIORITY_MAP = {member.display_name.lower(): member.priority for member in cls}
+        return _PRIORITY_MAP
 
     @classmethod
     def get_priority(cls, topic: str, default: int = 100) -> int:
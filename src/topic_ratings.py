@@ -0,0 +1,294 @@
+import configparser
+import sqlite3
+from typing import Dict, List, NamedTuple, Optional
+
+import profiler
+from logger import get_logger
+
+logger = get_logger(__name__, 'topic_ratings.log')
+
+DEFAULT_RATING = 1500.0
+# Problems are fixed opponents rated by difficulty.
+DIFFICULTY_RATINGS: Dict[str, float] = {'Easy': 1200.0, 'Medium': 1500.0, 'Hard': 1800.0}
+# Result of an attempt: a solve with hints counts as a draw.
+WIN, HINTED_WIN, LOSS = 1.0, 0.5, 0.0
+
+
+def _problem_rating_sql(column: str) -> str:
+    cases = ' '.join(f"WHEN '{difficulty}' THEN {rating}" for difficulty, rating in DIFFICULTY_RATINGS.items())
+    return f"(CASE {column} {cases} ELSE {DEFAULT_RATING} END)"
+
+
+# The index expression and the level query must spell the rating identically for SQLite to match them.
+PROBLEM_RATING_SQL = _problem_rating_sql('p.difficulty')
+
+ATTEMPT_LOG_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS AttemptLog (
+        attempt_id INTEGER PRIMARY KEY,
+        problem_id INTEGER NOT NULL,
+        attempted_on TEXT NOT NULL,
+        success INTEGER NOT NULL,
+        hints_used INTEGER NOT NULL DEFAULT 0,
+        FOREIGN KEY (problem_id) REFERENCES Problems(id)
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_attemptlog_problem_id ON AttemptLog(problem_id)',
+    f'''CREATE INDEX IF NOT EXISTS idx_problems_topic_rating
+        ON Problems(topic_id, {_problem_rating_sql('difficulty')})''',
+)
+
+
+class RatingSettings(NamedTuple):
+    """
+    Elo parameters: k_factor is the largest change one attempt can make; problems within
+    level_window points of their topic's rating get up to level_bonus added to their score.
+    """
+    k_factor: float = 32.0
+    level_window: float = 200.0
+    level_bonus: float = 2.0
+
+
+def load_rating_settings(config_path: str = 'config.ini') -> RatingSettings:
+    """
+    Parameters:
+        config_path (str): Path to the configuration file.
+
+    Returns:
+        RatingSettings: Configured [Ratings] settings, with defaults for missing keys.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    defaults = RatingSettings()
+    return RatingSettings(
+        k_factor=config.getfloat('Ratings', 'k_factor', fallback=defaults.k_factor),
+        level_window=config.getfloat('Ratings', 'level_window', fallback=defaults.level_window),
+        level_bonus=config.getfloat('Ratings', 'level_bonus', fallback=defaults.level_bonus)
+    )
+
+
+def problem_rating(difficulty: str) -> float:
+    """
+    Parameters:
+        difficulty (str): 'Easy', 'Medium' or 'Hard'.
+
+    Returns:
+        float: The problem's rating as an opponent.
+    """
+    return DIFFICULTY_RATINGS.get(difficulty, DEFAULT_RATING)
+
+
+def attempt_result(success: bool, hints_used: int) -> float:
+    """
+    Returns:
+        float: The learner's score for one attempt: WIN, HINTED_WIN or LOSS.
+    """
+    if not success:
+        return LOSS
+    return HINTED_WIN if hints_used > 0 else WIN
+
+
+def expected_result(rating: float, opponent: float) -> float:
+    """
+    Returns:
+        float: Probability the learner at `rating` solves a problem rated `opponent`.
+    """
+    return 1.0 / (1.0 + 10.0 ** ((opponent - rating) / 400.0))
+
+
+def updated_rating(rating: float, opponent: float, result: float, k_factor: float) -> float:
+    """
+    One Elo step.
+
+    Parameters:
+        rating (float): Topic rating before the attempt.
+        opponent (float): Rating of the attempted problem.
+        result (float): Score of the attempt (see attempt_result).
+        k_factor (float): Largest possible change.
+
+    Returns:
+        float: Topic rating after the attempt.
+    """
+    return rating + k_factor * (result - expected_result(rating, opponent))
+
+
+def ensure_topic_ratings(conn: sqlite3.Connection, settings: Optional[RatingSettings] = None) -> None:
+    """
+    Create the attempt log and the per-topic problem-rating index, and rebuild the ratings from
+    the recorded progress when the log is first created.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+        settings (Optional[RatingSettings]): Elo parameters; defaults to the [Ratings] section of
+            config.ini, so the seeded ratings match the ones later attempts update.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'AttemptLog'"
+    ).fetchone()
+    for statement in ATTEMPT_LOG_SCHEMA:
+        conn.execute(statement)
+    if not exists:
+        recompute_ratings(conn, settings or load_rating_settings())
+
+
+def record_attempt(
+    conn: sqlite3.Connection,
+    problem_id: int,
+    attempted_on: str,
+    success: bool,
+    hints_used: int,
+    settings: RatingSettings
+) -> Optional[float]:
+    """
+    Log one attempt and apply its Elo step to the problem's topic: one read and two writes,
+    independent of history length. Runs inside the caller's write transaction.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection inside the attempt's write transaction.
+        problem_id (int): Attempted problem.
+        attempted_on (str): ISO date of the attempt.
+        success (bool): Whether it was solved.
+        hints_used (int): Hints used.
+        settings (RatingSettings): Elo parameters.
+
+    Returns:
+        Optional[float]: The topic's new rating, or None if the problem does not exist.
+    """
+    row = conn.execute('''
+        SELECT p.topic_id, p.difficulty, tr.rating
+        FROM Problems p
+        LEFT JOIN TopicRatings tr ON tr.topic_id = p.topic_id
+        WHERE p.id = ?
+    ''', (problem_id,)).fetchone()
+    if row is None:
+        return None
+    topic_id, difficulty, rating = row[0], row[1], row[2]
+    conn.execute(
+        'INSERT INTO AttemptLog (problem_id, attempted_on, success, hints_used) VALUES (?, ?, ?, ?)',
+        (problem_id, attempted_on, int(success), hints_used)
+    )
+    new_rating = updated_rating(
+        DEFAULT_RATING if rating is None else rating,
+        problem_rating(difficulty),
+        attempt_result(success, hints_used),
+        settings.k_factor
+    )
+    conn.execute('''
+        INSERT INTO TopicRatings (topic_id, rating) VALUES (?, ?)
+        ON CONFLICT(topic_id) DO UPDATE SET rating = excluded.rating
+    ''', (topic_id, new_rating))
+    return new_rating
+
+
+def recompute_ratings(conn: sqlite3.Connection, settings: RatingSettings = RatingSettings()) -> int:
+    """
+    Rebuild every topic rating from scratch by replaying history in one pass. The caller commits.
+
+    Attempts recorded before the attempt log existed are known only as per-problem totals; they
+    are replayed first, in order of each problem's last attempt, as that many games each scored
+    at the problem's success rate. The logged attempts follow in the order they were made.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection inside a write transaction.
+        settings (RatingSettings): Elo parameters.
+
+    Returns:
+        int: Attempts replayed.
+    """
+    k_factor = settings.k_factor
+    with profiler.span('topic_ratings.recompute'):
+        ratings: Dict[int, float] = {
+            row[0]: DEFAULT_RATING for row in conn.execute('SELECT topic_id FROM Topics')
+        }
+        replayed = 0
+        for topic_id, difficulty, games, wins in conn.execute('''
+            SELECT p.topic_id, p.difficulty,
+                   up.attempts - COALESCE(l.attempts, 0), up.successes - COALESCE(l.successes, 0)
+            FROM UserProgress up
+            JOIN Problems p ON p.id = up.problem_id
+            LEFT JOIN (
+                SELECT problem_id, COUNT(*) AS attempts, SUM(success) AS successes
+                FROM AttemptLog GROUP BY problem_id
+            ) l ON l.problem_id = up.problem_id
+            WHERE up.attempts > COALESCE(l.attempts, 0)
+            ORDER BY up.last_attempt, up.problem_id
+        '''):
+            opponent = problem_rating(difficulty)
+            result = min(max(wins / games, LOSS), WIN)
+            rating = ratings.get(topic_id, DEFAULT_RATING)
+            for _ in range(games):
+                rating = updated_rating(rating, opponent, result, k_factor)
+            ratings[topic_id] = rating
+            replayed += games
+
+        for topic_id, difficulty, success, hints_used in conn.execute('''
+            SELECT p.topic_id, p.difficulty, l.success, l.hints_used
+            FROM AttemptLog l
+            JOIN Problems p ON p.id = l.problem_id
+            ORDER BY l.attempt_id
+        '''):
+            ratings[topic_id] = updated_rating(
+                ratings.get(topic_id, DEFAULT_RATING),
+                problem_rating(difficulty),
+                attempt_result(success, hints_used),
+                k_factor
+            )
+            replayed += 1
+
+        conn.executemany('''
+            INSERT INTO TopicRatings (topic_id, rating) VALUES (?, ?)
+            ON CONFLICT(topic_id) DO UPDATE SET rating = excluded.rating
+        ''', ratings.items())
+    logger.info(f"Recomputed {len(ratings)} topic ratings from {replayed} attempts.")
+    return replayed
+
+
+def level_distances(conn: sqlite3.Connection, window: float) -> Dict[int, float]:
+    """
+    Find the problems rated within `window` points of their topic's rating, in one query: each
+    topic is a range scan of idx_problems_topic_rating.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+        window (float): Largest rating difference considered at the learner's level.
+
+    Returns:
+        Dict[int, float]: Rating difference per problem at the learner's level.
+    """
+    return {
+        problem_id: distance for problem_id, distance in conn.execute(f'''
+            SELECT p.id, ABS({PROBLEM_RATING_SQL} - tr.rating)
+            FROM TopicRatings tr
+            CROSS JOIN Problems p ON p.topic_id = tr.topic_id
+                AND {PROBLEM_RATING_SQL} BETWEEN tr.rating - ? AND tr.rating + ?
+        ''', (window, window))
+    }
+
+
+class TopicRating(NamedTuple):
+    """
+    A topic's rating with its attempt counts.
+    """
+    topic: str
+    rating: float
+    attempts: int
+    successes: int
+
+
+def fetch_topic_ratings(conn: sqlite3.Connection) -> List[TopicRating]:
+    """
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        List[TopicRating]: Every topic, highest rating first.
+    """
+    rows = conn.execute(f'''
+        SELECT t.name, COALESCE(tr.rating, {DEFAULT_RATING}),
+               COALESCE(SUM(up.attempts), 0), COALESCE(SUM(up.successes), 0)
+        FROM Topics t
+        LEFT JOIN TopicRatings tr ON tr.topic_id = t.topic_id
+        LEFT JOIN Problems p ON p.topic_id = t.topic_id
+        LEFT JOIN UserProgress up ON up.problem_id = p.id
+        GROUP BY t.topic_id
+        ORDER BY 2 DESC, t.name
+    ''').fetchall()
+    return [TopicRating(*row) for row in rows]
@@ -2,7 +2,10 @@ import sqlite3
 from prettytable import PrettyTable
 import logging
 import json
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import profiler
+import result_cache
+from db_utils import open_connection
 from logger import get_logger
 
 logger = get_logger(__name__, 'view_progress.log')
@@ -17,22 +20,22 @@ def fetch_overall_metrics(cursor: sqlite3.Cursor) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Dictionary containing overall metrics.
     """
-    metrics: Dict[str, Any] = {}
-
-    cursor.execute('SELECT COUNT(*) FROM Problems')
-    metrics['total_problems'] = cursor.fetchone()[0]
-
-    cursor.execute('SELECT COUNT(*) FROM UserProgress')
-    metrics['attempted_problems'] = cursor.fetchone()[0]
-
-    cursor.execute('SELECT COUNT(*) FROM UserProgress WHERE mastered = 1')
-    metrics['mastered'] = cursor.fetchone()[0]
-
-    cursor.execute('SELECT SUM(attempts) FROM UserProgress')
-    metrics['total_attempts'] = cursor.fetchone()[0] or 0
-
-    cursor.execute('SELECT SUM(successes) FROM UserProgress')
-    metrics['total_successes'] = cursor.fetchone()[0] or 0
+    cursor.execute('''
+        SELECT (SELECT COUNT(*) FROM Problems) AS total_problems,
+               COUNT(*) AS attempted_problems,
+               COALESCE(SUM(mastered = 1), 0) AS mastered,
+               COALESCE(SUM(attempts), 0) AS total_attempts,
+               COALESCE(SUM(successes), 0) AS total_successes
+        FROM UserProgress
+    ''')
+    row = cursor.fetchone()
+    metrics: Dict[str, Any] = {
+        'total_problems': row[0],
+        'attempted_problems': row[1],
+        'mastered': row[2],
+        'total_attempts': row[3],
+        'total_successes': row[4]
+    }
 
     metrics['success_rate'] = (
         (metrics['total_successes'] / metrics['total_attempts'] * 100)
@@ -52,39 +55,20 @@ def fetch_progress_by_difficulty(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]
     Returns:
         List[Dict[str, Any]]: List of metrics per difficulty level.
     """
-    cursor.execute('SELECT DISTINCT difficulty FROM Problems')
-    difficulties = [row[0] for row in cursor.fetchall()]
-    
-    progress: List[Dict[str, Any]] = []
-    for difficulty in difficulties:
-        cursor.execute('''
-            SELECT COUNT(*) FROM UserProgress up
-            JOIN Problems p ON up.problem_id = p.id
-            WHERE p.difficulty = ?
-        ''', (difficulty,))
-        attempted = cursor.fetchone()[0]
-
-        cursor.execute('''
-            SELECT COUNT(*) FROM UserProgress up
-            JOIN Problems p ON up.problem_id = p.id
-            WHERE p.difficulty = ? AND up.mastered = 1
-        ''', (difficulty,))
-        mastered_count = cursor.fetchone()[0]
-
-        cursor.execute('''
-            SELECT SUM(up.successes) FROM UserProgress up
-            JOIN Problems p ON up.problem_id = p.id
-            WHERE p.difficulty = ?
-        ''', (difficulty,))
-        successes = cursor.fetchone()[0] or 0
-
-        cursor.execute('''
-            SELECT SUM(up.attempts) FROM UserProgress up
-            JOIN Problems p ON up.problem_id = p.id
-            WHERE p.difficulty = ?
-        ''', (difficulty,))
-        attempts = cursor.fetchone()[0] or 0
+    cursor.execute('''
+        SELECT p.difficulty,
+               COUNT(up.problem_id) AS attempted,
+               COALESCE(SUM(up.mastered = 1), 0) AS mastered,
+               COALESCE(SUM(up.successes), 0) AS successes,
+               COALESCE(SUM(up.attempts), 0) AS attempts
+        FROM Problems p
+        LEFT JOIN UserProgress up ON up.problem_id = p.id
+        GROUP BY p.difficulty
+        ORDER BY MIN(p.rowid)
+    ''')
 
+    progress: List[Dict[str, Any]] = []
+    for difficulty, attempted, mastered_count, successes, attempts in cursor.fetchall():
         diff_success_rate = (successes / attempts * 100) if attempts > 0 else 0
         progress.append({
             "difficulty": difficulty,
@@ -145,9 +129,33 @@ def render_json(data: Any) -> None:
     """
     print(json.dumps(data, indent=4))
 
+def load_progress(db_path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Fetch overall, per-difficulty and per-topic progress over one connection.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        Tuple: (overall metrics, progress by difficulty, progress by topic).
+    """
+    with profiler.span('view_progress.connect'):
+        conn = open_connection(db_path, read_only=True)
+    with conn:
+        cursor = conn.cursor()
+        with profiler.span('view_progress.overall_query'):
+            metrics = fetch_overall_metrics(cursor)
+        with profiler.span('view_progress.difficulty_query'):
+            progress_difficulty = fetch_progress_by_difficulty(cursor)
+        with profiler.span('view_progress.topic_query'):
+            progress_topic = fetch_progress_by_topic(cursor)
+    conn.close()
+    return metrics, progress_difficulty, progress_topic
+
 def view_progress(db_path: str = 'leetcode_mastery.db', output_format: str = 'table') -> None:
     """
     Display overall progress metrics, progress by difficulty, and progress by topic.
+    Results are reused from the result cache while the database is unchanged.
 
     Parameters:
         db_path (str): Path to the SQLite database file.
@@ -156,12 +164,12 @@ def view_progress(db_path: str = 'leetcode_mastery.db', output_format: str = 'ta
     logger.info(f"Viewing progress from database '{db_path}' with format '{output_format}'.")
 
     try:
-        with sqlite3.connect(db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
+        metrics, progress_difficulty, progress_topic = result_cache.cached(
+            'view-progress', (), db_path, lambda: load_progress(db_path)
+        )
 
+        with profiler.span('view_progress.render'):
             # Overall Metrics
-            metrics = fetch_overall_metrics(cursor)
             print("Overall Progress:")
             if output_format.lower() == 'json':
                 render_json(metrics)
@@ -179,7 +187,6 @@ def view_progress(db_path: str = 'leetcode_mastery.db', output_format: str = 'ta
 
             # Progress by Difficulty
             print("Progress by Difficulty:")
-            progress_difficulty = fetch_progress_by_difficulty(cursor)
             if output_format.lower() == 'json':
                 render_json(progress_difficulty)
             else:
@@ -188,7 +195,6 @@ def view_progress(db_path: str = 'leetcode_mastery.db', output_format: str = 'ta
 
             # Progress by Topic
             print("Progress by Topic:")
-            progress_topic = fetch_progress_by_topic(cursor)
             if output_format.lower() == 'json':
                 render_json(progress_topic)
             else:
@@ -209,6 +215,14 @@ if __name__ == "__main__":
     parser.add_argument('--db-path', default='leetcode_mastery.db', help='Path to the SQLite database file.')
     parser.add_argument('--output-format', default='table', choices=['table', 'json'],
                         help='Output format: table (default) or JSON.')
+    parser.add_argument('--profile', action='store_true', help='Print a per-stage timing breakdown.')
+    parser.add_argument('--profile-trace', default=None, help='Also write Chrome trace-event JSON to this file.')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute instead of reusing a cached result.')
     args = parser.parse_args()
 
+    if args.profile or args.profile_trace:
+        profiler.enable()
+    if args.no_cache:
+        result_cache.disable()
     view_progress(db_path=args.db_path, output_format=args.output_format)
+    profiler.finish(args.profile_trace)
@@ -3,9 +3,17 @@ import matplotlib.pyplot as plt
 import datetime
 import logging
 from contextlib import contextmanager
-from typing import List, Tuple, Any, Optional
+from typing import Dict, List, Tuple, Any, Optional
 import argparse
-from logger import get_logger
+import os
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from typing import NamedTuple, Sequence
+import profiler
+import result_cache
+from db_utils import open_connection
+from logger import configure_worker_logging, get_logger
 
 logger = get_logger(__name__, 'visualize_progress.log')
 
@@ -20,8 +28,7 @@ def get_connection(db_path: str = 'leetcode_mastery.db') -> sqlite3.Connection:
         sqlite3.Connection: SQLite connection object.
     """
     try:
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
+        conn = open_connection(db_path, read_only=True)
         logger.debug(f"Connected to database at '{db_path}'.")
         return conn
     except sqlite3.Error as e:
@@ -41,32 +48,68 @@ def plot_graph(x: List[Any], y: List[float], title: str, xlabel: str, ylabel: st
         kind (str): Type of plot ('line' or 'bar'). Default is 'line'.
         save_path (Optional[str]): Path to save the plot image. If None, displays the plot.
     """
-    plt.figure(figsize=(10, 6))
+    with profiler.span('visualize.plot'):
+        _draw_graph(x, y, title, xlabel, ylabel, kind)
 
-    if kind == 'line':
-        plt.plot(x, y, marker='o', linestyle='-', color='blue')
-    elif kind == 'bar':
-        plt.bar(x, y, color='skyblue')
-    else:
-        logger.warning(f"Unsupported plot kind '{kind}'. Defaulting to 'line'.")
-        plt.plot(x, y, marker='o', linestyle='-', color='blue')
-
-    plt.title(title)
-    plt.xlabel(xlabel)
-    plt.ylabel(ylabel)
-    plt.grid(True, linestyle='--', alpha=0.5)
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-
-    if save_path:
-        plt.savefig(save_path)
-        logger.info(f"Plot saved to {save_path}")
+    with profiler.span('visualize.output'):
+        if save_path:
+            plt.savefig(save_path)
+            logger.info(f"Plot saved to {save_path}")
+        else:
+            plt.show()
+
+class ChartSpec(NamedTuple):
+    """
+    Everything needed to draw one chart, independent of the database and of pyplot.
+    """
+    x: List[Any]
+    y: List[float]
+    title: str
+    xlabel: str
+    ylabel: str
+    kind: str = 'line'
+
+def _draw_graph(x: List[Any], y: List[float], title: str, xlabel: str, ylabel: str, kind: str) -> None:
+    """
+    Draw a line or bar chart onto a new current figure.
+
+    Parameters:
+        x (List[Any]): Data for the x-axis.
+        y (List[float]): Data for the y-axis.
+        title (str): Title of the plot.
+        xlabel (str): Label for the x-axis.
+        ylabel (str): Label for the y-axis.
+        kind (str): Type of plot ('line' or 'bar').
+    """
+    fig = plt.figure(figsize=(10, 6))
+    _draw_on_axes(fig.gca(), ChartSpec(x, y, title, xlabel, ylabel, kind))
+    fig.tight_layout()
+
+def _draw_on_axes(ax: Any, spec: ChartSpec) -> None:
+    """
+    Draw a chart onto the given matplotlib Axes.
+
+    Parameters:
+        ax (matplotlib.axes.Axes): Target axes.
+        spec (ChartSpec): Chart data and labels.
+    """
+    if spec.kind == 'line':
+        ax.plot(spec.x, spec.y, marker='o', linestyle='-', color='blue')
+    elif spec.kind == 'bar':
+        ax.bar(spec.x, spec.y, color='skyblue')
     else:
-        plt.show()
+        logger.warning(f"Unsupported plot kind '{spec.kind}'. Defaulting to 'line'.")
+        ax.plot(spec.x, spec.y, marker='o', linestyle='-', color='blue')
 
-def fetch_data(query: str, params: Tuple = (), db_path: str = 'leetcode_mastery.db') -> List[sqlite3.Row]:
+    ax.set_title(spec.title)
+    ax.set_xlabel(spec.xlabel)
+    ax.set_ylabel(spec.ylabel)
+    ax.grid(True, linestyle='--', alpha=0.5)
+    ax.tick_params(axis='x', labelrotation=45)
+
+def fetch_data(query: str, params: Tuple = (), db_path: str = 'leetcode_mastery.db') -> List[Dict[str, Any]]:
     """
-    Fetch data from the database.
+    Fetch data from the database, reusing a cached result while the database is unchanged.
 
     Parameters:
         query (str): SQL query to execute.
@@ -74,40 +117,60 @@ def fetch_data(query: str, params: Tuple = (), db_path: str = 'leetcode_mastery.
         db_path (str): Path to the SQLite database file.
 
     Returns:
-        List[sqlite3.Row]: List of rows fetched from the database.
+        List[Dict[str, Any]]: Rows fetched from the database, keyed by column name.
     """
-    try:
-        with get_connection(db_path) as conn:
+    def run_query() -> List[Dict[str, Any]]:
+        with profiler.span('visualize.connect'):
+            conn = get_connection(db_path)
+        with conn, profiler.span('visualize.query'):
             cursor = conn.cursor()
             cursor.execute(query, params)
-            rows = cursor.fetchall()
+            rows = [dict(row) for row in cursor.fetchall()]
             logger.debug(f"Fetched {len(rows)} rows for query: {query}")
             return rows
+
+    try:
+        return result_cache.cached('visualize', (query, tuple(params)), db_path, run_query)
     except sqlite3.Error as e:
         logger.error(f"Database query error: {e}")
         return []
 
-def plot_success_over_time(db_path: str, save_path: Optional[str] = None) -> None:
-    """
-    Plot the success rate over time.
+SUCCESS_OVER_TIME_QUERY = '''
+    SELECT last_attempt, SUM(successes) as successes, SUM(attempts) as attempts
+    FROM UserProgress
+    WHERE last_attempt IS NOT NULL
+    GROUP BY last_attempt
+    ORDER BY last_attempt
+'''
 
-    Parameters:
-        db_path (str): Path to the SQLite database file.
-        save_path (Optional[str]): Path to save the plot image.
+MASTERED_TOPICS_QUERY = '''
+    SELECT t.name as topic, COUNT(p.id) as total, SUM(up.mastered) as mastered
+    FROM Problems p
+    JOIN Topics t ON p.topic_id = t.topic_id
+    LEFT JOIN UserProgress up ON p.id = up.problem_id
+    GROUP BY t.name
+'''
+
+DIFFICULTY_SUCCESS_QUERY = '''
+    SELECT p.difficulty, SUM(up.successes) as successes, SUM(up.attempts) as attempts
+    FROM Problems p
+    LEFT JOIN UserProgress up ON p.id = up.problem_id
+    GROUP BY p.difficulty
+'''
+
+def success_over_time_chart(rows: List[Dict[str, Any]]) -> Optional[ChartSpec]:
     """
-    query = '''
-        SELECT last_attempt, SUM(successes) as successes, SUM(attempts) as attempts
-        FROM UserProgress
-        WHERE last_attempt IS NOT NULL
-        GROUP BY last_attempt
-        ORDER BY last_attempt
-    '''
-    rows = fetch_data(query, db_path=db_path)
+    Parameters:
+        rows (List[Dict[str, Any]]): Rows of SUCCESS_OVER_TIME_QUERY.
 
+    Returns:
+        Optional[ChartSpec]: The chart, or None if there is no data.
+    """
     dates, rates = [], []
     for row in rows:
         try:
-            date = datetime.datetime.strptime(row['last_attempt'], "%Y-%m-%dT%H:%M:%S").date()
+            # update_progress stores plain dates; older rows may hold full timestamps.
+            date = datetime.date.fromisoformat(row['last_attempt'][:10])
             success_rate = (row['successes'] / row['attempts']) * 100 if row['attempts'] else 0
             dates.append(date)
             rates.append(success_rate)
@@ -115,53 +178,36 @@ def plot_success_over_time(db_path: str, save_path: Optional[str] = None) -> Non
             logger.warning(f"Skipping invalid data: {e}")
 
     if dates and rates:
-        plot_graph(dates, rates, "Success Rate Over Time", "Date", "Success Rate (%)", kind='line', save_path=save_path)
-    else:
-        logger.info("No data available to plot for Success Rate Over Time.")
+        return ChartSpec(dates, rates, "Success Rate Over Time", "Date", "Success Rate (%)", kind='line')
+    logger.info("No data available to plot for Success Rate Over Time.")
+    return None
 
-def plot_mastered_topics(db_path: str, save_path: Optional[str] = None) -> None:
+def mastered_topics_chart(rows: List[Dict[str, Any]]) -> Optional[ChartSpec]:
     """
-    Plot the number of mastered problems by topic.
-
     Parameters:
-        db_path (str): Path to the SQLite database file.
-        save_path (Optional[str]): Path to save the plot image.
-    """
-    query = '''
-        SELECT t.name as topic, COUNT(p.id) as total, SUM(up.mastered) as mastered
-        FROM Problems p
-        JOIN Topics t ON p.topic_id = t.topic_id
-        LEFT JOIN UserProgress up ON p.id = up.problem_id
-        GROUP BY t.name
-    '''
-    rows = fetch_data(query, db_path=db_path)
+        rows (List[Dict[str, Any]]): Rows of MASTERED_TOPICS_QUERY.
 
+    Returns:
+        Optional[ChartSpec]: The chart, or None if there is no data.
+    """
     topics, mastered_counts = [], []
     for row in rows:
         topics.append(row['topic'])
         mastered_counts.append(row['mastered'] or 0)
 
     if topics and mastered_counts:
-        plot_graph(topics, mastered_counts, "Mastered Problems by Topic", "Topic", "Number of Mastered Problems", kind='bar', save_path=save_path)
-    else:
-        logger.info("No data available to plot for Mastered Problems by Topic.")
+        return ChartSpec(topics, mastered_counts, "Mastered Problems by Topic", "Topic", "Number of Mastered Problems", kind='bar')
+    logger.info("No data available to plot for Mastered Problems by Topic.")
+    return None
 
-def plot_difficulty_success(db_path: str, save_path: Optional[str] = None) -> None:
+def difficulty_success_chart(rows: List[Dict[str, Any]]) -> Optional[ChartSpec]:
     """
-    Plot the success rate categorized by difficulty.
-
     Parameters:
-        db_path (str): Path to the SQLite database file.
-        save_path (Optional[str]): Path to save the plot image.
-    """
-    query = '''
-        SELECT p.difficulty, SUM(up.successes) as successes, SUM(up.attempts) as attempts
-        FROM Problems p
-        LEFT JOIN UserProgress up ON p.id = up.problem_id
-        GROUP BY p.difficulty
-    '''
-    rows = fetch_data(query, db_path=db_path)
+        rows (List[Dict[str, Any]]): Rows of DIFFICULTY_SUCCESS_QUERY.
 
+    Returns:
+        Optional[ChartSpec]: The chart, or None if there is no data.
+    """
     difficulties, success_rates = [], []
     for row in rows:
         difficulties.append(row['difficulty'])
@@ -169,26 +215,183 @@ def plot_difficulty_success(db_path: str, save_path: Optional[str] = None) -> No
         success_rates.append(rate)
 
     if difficulties and success_rates:
-        plot_graph(difficulties, success_rates, "Success Rate by Difficulty", "Difficulty", "Success Rate (%)", kind='bar', save_path=save_path)
-    else:
-        logger.info("No data available to plot for Success Rate by Difficulty.")
-        
+        return ChartSpec(difficulties, success_rates, "Success Rate by Difficulty", "Difficulty", "Success Rate (%)", kind='bar')
+    logger.info("No data available to plot for Success Rate by Difficulty.")
+    return None
+
+# Chart type -> (query, builder, output file stem).
+CHART_TYPES = {
+    'time': (SUCCESS_OVER_TIME_QUERY, success_over_time_chart, 'success_over_time'),
+    'topics': (MASTERED_TOPICS_QUERY, mastered_topics_chart, 'mastered_topics'),
+    'difficulty': (DIFFICULTY_SUCCESS_QUERY, difficulty_success_chart, 'difficulty_success'),
+}
+
+def _plot_chart(chart_type: str, db_path: str, save_path: Optional[str]) -> None:
+    query, build, _ = CHART_TYPES[chart_type]
+    spec = build(fetch_data(query, db_path=db_path))
+    if spec is not None:
+        plot_graph(*spec, save_path=save_path)
+
+def plot_success_over_time(db_path: str, save_path: Optional[str] = None) -> None:
+    """
+    Plot the success rate over time.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        save_path (Optional[str]): Path to save the plot image.
+    """
+    _plot_chart('time', db_path, save_path)
+
+def plot_mastered_topics(db_path: str, save_path: Optional[str] = None) -> None:
+    """
+    Plot the number of mastered problems by topic.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        save_path (Optional[str]): Path to save the plot image.
+    """
+    _plot_chart('topics', db_path, save_path)
+
+def plot_difficulty_success(db_path: str, save_path: Optional[str] = None) -> None:
+    """
+    Plot the success rate categorized by difficulty.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+        save_path (Optional[str]): Path to save the plot image.
+    """
+    _plot_chart('difficulty', db_path, save_path)
+
+def fetch_all_chart_data(db_path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Run the queries of every chart type over one connection, reusing a cached result while the
+    database is unchanged.
+
+    Parameters:
+        db_path (str): Path to the SQLite database file.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Rows per chart type.
+    """
+    def run_queries() -> Dict[str, List[Dict[str, Any]]]:
+        with profiler.span('visualize.connect'):
+            conn = get_connection(db_path)
+        try:
+            return query_chart_data(conn)
+        finally:
+            conn.close()
+
+    return result_cache.cached('visualize-all', (), db_path, run_queries)
+
+def query_chart_data(conn: sqlite3.Connection) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Run the query of every chart type on an open connection.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Rows per chart type.
+    """
+    with profiler.span('visualize.query'):
+        return {
+            chart_type: [dict(row) for row in conn.execute(query).fetchall()]
+            for chart_type, (query, _, _) in CHART_TYPES.items()
+        }
+
+def render_chart_file(spec: ChartSpec, path: str) -> str:
+    """
+    Render a chart to an image file without pyplot, so it works headless and in worker processes.
+    The format follows the file extension.
+
+    Parameters:
+        spec (ChartSpec): Chart data and labels.
+        path (str): Output file path.
+
+    Returns:
+        str: The path written.
+    """
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    _draw_on_axes(fig.add_subplot(), spec)
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
+
+def render_all(
+    db_paths: Sequence[str],
+    out_dir: str,
+    formats: Sequence[str] = ('png',),
+    workers: Optional[int] = None
+) -> List[str]:
+    """
+    Render every chart type for each database.
+
+    Data for each database is fetched over one connection; figures are rendered in a process pool.
+    With several databases each gets a subdirectory of out_dir named after the database file.
+
+    Parameters:
+        db_paths (Sequence[str]): Databases to chart.
+        out_dir (str): Output directory.
+        formats (Sequence[str]): Image formats, e.g. 'png' and 'svg'.
+        workers (Optional[int]): Worker processes; 1 renders in this process. Defaults to the CPU count.
+
+    Returns:
+        List[str]: Paths of the files written.
+    """
+    jobs: List[Tuple[ChartSpec, str]] = []
+    for db_path in db_paths:
+        target = out_dir
+        if len(db_paths) > 1:
+            target = os.path.join(out_dir, os.path.splitext(os.path.basename(db_path))[0])
+        os.makedirs(target, exist_ok=True)
+
+        data = fetch_all_chart_data(db_path)
+        for chart_type, (_, build, stem) in CHART_TYPES.items():
+            spec = build(data[chart_type])
+            if spec is None:
+                continue
+            jobs.extend((spec, os.path.join(target, f"{stem}.{fmt}")) for fmt in formats)
+
+    with profiler.span('visualize.render'):
+        if workers == 1 or len(jobs) <= 1:
+            written = [render_chart_file(spec, path) for spec, path in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=configure_worker_logging) as pool:
+                written = list(pool.map(render_chart_file, *zip(*jobs)))
+    for path in written:
+        logger.info(f"Plot saved to {path}")
+    return written
 
 def main():
     parser = argparse.ArgumentParser(description="Visualize progress metrics.")
-    parser.add_argument('--db-path', default='leetcode_mastery.db', help='Path to the SQLite database file.')
+    parser.add_argument('--db-path', nargs='+', default=['leetcode_mastery.db'],
+                        help='Path to the SQLite database file (several with --all).')
     parser.add_argument('--save', help='Path to save the plot image (optional).')
-    parser.add_argument('--type', required=True, choices=['time', 'topics', 'difficulty'],
+    parser.add_argument('--type', choices=list(CHART_TYPES),
                         help='Type of plot to generate: time (success over time), topics (mastered by topic), difficulty (success by difficulty).')
+    parser.add_argument('--all', action='store_true', help='Render every chart type to files in --out without a display.')
+    parser.add_argument('--out', default='charts', help='Output directory for --all.')
+    parser.add_argument('--format', nargs='+', choices=['png', 'svg'], default=['png'], help='Image formats for --all.')
+    parser.add_argument('--workers', type=int, default=None, help='Rendering processes for --all (default: CPU count).')
+    parser.add_argument('--profile', action='store_true', help='Print a per-stage timing breakdown.')
+    parser.add_argument('--profile-trace', default=None, help='Also write Chrome trace-event JSON to this file.')
+    parser.add_argument('--no-cache', action='store_true', help='Re-run queries instead of reusing cached results.')
 
     args = parser.parse_args()
+    if not args.all and not args.type:
+        parser.error('one of --type or --all is required')
+    if args.profile or args.profile_trace:
+        profiler.enable()
+    if args.no_cache:
+        result_cache.disable()
 
-    if args.type == 'time':
-        plot_success_over_time(args.db_path, save_path=args.save)
-    elif args.type == 'topics':
-        plot_mastered_topics(args.db_path, save_path=args.save)
-    elif args.type == 'difficulty':
-        plot_difficulty_success(args.db_path, save_path=args.save)
+    if args.all:
+        written = render_all(args.db_path, args.out, args.format, args.workers)
+        print(f"Wrote {len(written)} chart(s) to '{args.out}'.")
+    else:
+        _plot_chart(args.type, args.db_path[0], save_path=args.save)
+    profiler.finish(args.profile_trace)
 
 if __name__ == "__main__":
     main()
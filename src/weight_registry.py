@@ -0,0 +1,208 @@
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from topic_priority import TopicPriority
+from frequency_weights import FrequencyWeights
+from pattern_weights import PatternWeights
+from logger import get_logger
+
+logger = get_logger(__name__, 'weight_registry.log')
+
+TOPIC = 'topic'
+FREQUENCY = 'frequency'
+PATTERN = 'pattern'
+CATEGORIES: Tuple[str, ...] = (TOPIC, FREQUENCY, PATTERN)
+
+DEFAULTS: Dict[str, int] = {TOPIC: 100, FREQUENCY: 2, PATTERN: 1}
+
+WEIGHTS_SCHEMA = '''CREATE TABLE IF NOT EXISTS Weights (
+    category TEXT NOT NULL CHECK (category IN ('topic', 'frequency', 'pattern')),
+    name TEXT NOT NULL COLLATE NOCASE,
+    weight INTEGER NOT NULL,
+    PRIMARY KEY (category, name)
+)'''
+
+
+def create_weights_table(conn: sqlite3.Connection) -> None:
+    """
+    Create the Weights override table if missing.
+
+    Parameters:
+        conn (sqlite3.Connection): Open database connection.
+    """
+    conn.execute(WEIGHTS_SCHEMA)
+
+
+class WeightRegistry:
+    """
+    Flat lookup tables for topic priorities, frequency weights and pattern weights.
+
+    Tables are built once from the TopicPriority, FrequencyWeights and PatternWeights enums and
+    can be overridden from the Weights table. Each table is keyed both by the exact display name and
+    by its lowercase form, so lookups with canonical names are a single dict probe. The version
+    counter only increases when a reload actually changes a weight, so consumers can key derived
+    caches on it.
+    """
+
+    def __init__(self):
+        self.version: int = 0
+        self.tables: Dict[str, Dict[str, int]] = {}
+        self._exact: Dict[str, Dict[str, int]] = {}
+        self._signature: Optional[frozenset] = None
+        self._build({})
+
+    @staticmethod
+    def _enum_weights() -> Dict[str, Dict[str, int]]:
+        """
+        Read the built-in weights from the enums.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Mapping of category to display name to weight.
+        """
+        return {
+            TOPIC: {member.display_name: member.priority for member in TopicPriority},
+            FREQUENCY: {member.display_name: member.weight for member in FrequencyWeights},
+            PATTERN: {member.display_name: member.weight for member in PatternWeights},
+        }
+
+    def _build(self, overrides: Dict[str, Dict[str, int]]) -> bool:
+        """
+        Rebuild the lookup tables from the enums plus overrides.
+
+        Parameters:
+            overrides (Dict[str, Dict[str, int]]): Mapping of category to display name to weight.
+
+        Returns:
+            bool: True if any weight changed (and the version was bumped).
+        """
+        exact = self._enum_weights()
+        for category, entries in overrides.items():
+            base = exact[category]
+            lowered = {name.lower(): name for name in base}
+            for name, weight in entries.items():
+                base[lowered.get(name.lower(), name)] = weight
+
+        tables = {category: {name.lower(): weight for name, weight in entries.items()}
+                  for category, entries in exact.items()}
+        signature = frozenset((category, name, weight)
+                              for category, entries in tables.items()
+                              for name, weight in entries.items())
+        if signature == self._signature:
+            return False
+
+        self._exact = exact
+        self.tables = tables
+        if self._signature is not None:
+            self.version += 1
+            logger.info(f"Weight registry updated to version {self.version}.")
+        self._signature = signature
+        return True
+
+    def load_overrides(self, conn: sqlite3.Connection) -> bool:
+        """
+        Apply overrides stored in the Weights table. A missing table means no overrides.
+
+        Parameters:
+            conn (sqlite3.Connection): Open database connection.
+
+        Returns:
+            bool: True if the effective weights changed.
+        """
+        overrides: Dict[str, Dict[str, int]] = {}
+        try:
+            rows = conn.execute('SELECT category, name, weight FROM Weights').fetchall()
+        except sqlite3.OperationalError:
+            logger.debug("No Weights table found; using built-in weights.")
+            rows = []
+
+        for category, name, weight in rows:
+            if category not in CATEGORIES:
+                logger.warning(f"Ignoring weight override for unknown category '{category}'.")
+                continue
+            overrides.setdefault(category, {})[name] = int(weight)
+        return self._build(overrides)
+
+    def lookup(self, category: str, name: str, default: Optional[int] = None) -> int:
+        """
+        Look up a weight, trying the exact display name before the lowercase form.
+
+        Parameters:
+            category (str): One of 'topic', 'frequency' or 'pattern'.
+            name (str): Display name of the entry.
+            default (Optional[int]): Value returned if not found. Defaults to the category default.
+
+        Returns:
+            int: The weight.
+        """
+        weight = self._exact[category].get(name)
+        if weight is None:
+            weight = self.tables[category].get(name.lower())
+        if weight is None:
+            return DEFAULTS[category] if default is None else default
+        return weight
+
+    def topic_priority(self, topic: str, default: int = 100) -> int:
+        """
+        Retrieve the priority for a topic.
+
+        Parameters:
+            topic (str): The display name of the topic.
+            default (int): The default priority to return if topic not found.
+
+        Returns:
+            int: The priority of the topic.
+        """
+        return self.lookup(TOPIC, topic, default)
+
+    def frequency_weight(self, frequency: str, default: int = 2) -> int:
+        """
+        Retrieve the weight for a frequency level.
+
+        Parameters:
+            frequency (str): The display name of the frequency level.
+            default (int): The default weight to return if frequency not found.
+
+        Returns:
+            int: The weight of the frequency level.
+        """
+        return self.lookup(FREQUENCY, frequency, default)
+
+    def pattern_weight(self, pattern: str, default: int = 1) -> int:
+        """
+        Retrieve the weight for a pattern.
+
+        Parameters:
+            pattern (str): The display name of the pattern.
+            default (int): The default weight to return if pattern not found.
+
+        Returns:
+            int: The weight of the pattern.
+        """
+        return self.lookup(PATTERN, pattern, default)
+
+    def entries(self) -> List[Tuple[str, str, int]]:
+        """
+        List every effective weight.
+
+        Returns:
+            List[Tuple[str, str, int]]: (category, display name, weight) tuples.
+        """
+        return [(category, name, weight)
+                for category in CATEGORIES
+                for name, weight in sorted(self._exact[category].items())]
+
+
+_registry: Optional[WeightRegistry] = None
+
+
+def get_weight_registry() -> WeightRegistry:
+    """
+    Return the process-wide weight registry, building it on first use.
+
+    Returns:
+        WeightRegistry: The shared registry.
+    """
+    global _registry
+    if _registry is None:
+        _registry = WeightRegistry()
+    return _registry
@@ -0,0 +1,36 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'src'))
+# Logging is set up once per process, at the first import that asks for a logger and relative to
+# whatever the working directory is then: keep the suite from writing log files at all.
+os.environ['LEETCODE_LOG_FILE'] = ''
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """
+    A temporary working directory holding a copy of config.ini, as the CLI expects.
+    """
+    shutil.copy(os.path.join(ROOT, 'config.ini'), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def seeded_db(workdir):
+    """
+    The configured database in the working directory, created at the latest schema and filled
+    with the sample problems.
+    """
+    from add_problems import add_problems
+    from db_init import initialize_db
+    from sample_problems import sample_problems
+
+    initialize_db()
+    add_problems(sample_problems)
+    return str(workdir / 'leetcode_mastery.db')
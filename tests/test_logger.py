@@ -0,0 +1,16 @@
+from logger import LOG_FILE_ENV_VAR, load_logging_settings
+
+
+def test_environment_overrides_log_file(workdir, monkeypatch):
+    (workdir / 'config.ini').write_text('[Logging]\nlog_file = configured.log\nlevel = DEBUG\n')
+
+    monkeypatch.delenv(LOG_FILE_ENV_VAR, raising=False)
+    assert load_logging_settings()['log_file'] == 'configured.log'
+
+    monkeypatch.setenv(LOG_FILE_ENV_VAR, str(workdir / 'override.log'))
+    assert load_logging_settings()['log_file'] == str(workdir / 'override.log')
+
+    monkeypatch.setenv(LOG_FILE_ENV_VAR, '')
+    settings = load_logging_settings()
+    assert settings['log_file'] == ''
+    assert settings['level'] == 'DEBUG'
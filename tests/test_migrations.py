@@ -0,0 +1,241 @@
+import sqlite3
+
+import pytest
+
+import migrations
+from db_utils import open_connection
+from load_leveling import rebuild_due_histogram
+from migrations import MigrationError
+
+# The schema db_init created before the first migration, with user_version 0.
+BASELINE_SCHEMA = [
+    '''CREATE TABLE Topics (
+        topic_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL
+    )''',
+    '''CREATE TABLE Patterns (
+        pattern_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT UNIQUE NOT NULL
+    )''',
+    '''CREATE TABLE Problems (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        difficulty TEXT NOT NULL,
+        topic_id INTEGER NOT NULL,
+        url TEXT NOT NULL,
+        priority INTEGER NOT NULL DEFAULT 100,
+        frequency TEXT NOT NULL DEFAULT 'Medium',
+        FOREIGN KEY (topic_id) REFERENCES Topics(topic_id)
+    )''',
+    '''CREATE TABLE ProblemPrerequisites (
+        problem_id INTEGER,
+        prerequisite_id INTEGER,
+        FOREIGN KEY (problem_id) REFERENCES Problems(id),
+        FOREIGN KEY (prerequisite_id) REFERENCES Problems(id),
+        PRIMARY KEY (problem_id, prerequisite_id)
+    )''',
+    '''CREATE TABLE UserProgress (
+        problem_id INTEGER PRIMARY KEY,
+        attempts INTEGER DEFAULT 0,
+        successes INTEGER DEFAULT 0,
+        hints_used INTEGER DEFAULT 0,
+        time_spent INTEGER DEFAULT 0,
+        last_attempt DATETIME,
+        next_due DATETIME,
+        mastered INTEGER DEFAULT 0 NOT NULL,
+        current_interval_index INTEGER DEFAULT 0,
+        FOREIGN KEY (problem_id) REFERENCES Problems(id)
+    )''',
+    '''CREATE TABLE TopicRatings (
+        topic_id INTEGER PRIMARY KEY,
+        rating REAL DEFAULT 1500,
+        FOREIGN KEY (topic_id) REFERENCES Topics(topic_id)
+    )''',
+    '''CREATE TABLE ProblemPatterns (
+        problem_id INTEGER,
+        pattern_id INTEGER,
+        FOREIGN KEY (problem_id) REFERENCES Problems(id),
+        FOREIGN KEY (pattern_id) REFERENCES Patterns(pattern_id),
+        PRIMARY KEY (problem_id, pattern_id)
+    )''',
+    'CREATE INDEX idx_problems_topic_id ON Problems(topic_id)',
+    'CREATE INDEX idx_problempatterns_problem_id ON ProblemPatterns(problem_id)',
+    'CREATE INDEX idx_problempatterns_pattern_id ON ProblemPatterns(pattern_id)',
+    'CREATE INDEX idx_problemprerequisites_prerequisite_id ON ProblemPrerequisites(prerequisite_id)',
+    'CREATE INDEX idx_userprogress_mastered ON UserProgress(mastered)',
+]
+
+PROGRESS = [
+    (1, 4, 4, 0, 60, '2024-12-20', '2025-01-03', 1, 3),
+    (2, 3, 1, 2, 90, '2024-12-30', '2024-12-31', 0, 0),
+    (3, 1, 1, 0, 25, '2024-12-31', '2025-01-03', 0, 1),
+]
+
+
+@pytest.fixture
+def baseline_db(workdir):
+    path = str(workdir / 'baseline.db')
+    conn = sqlite3.connect(path)
+    for statement in BASELINE_SCHEMA:
+        conn.execute(statement)
+    conn.executemany('INSERT INTO Topics (name) VALUES (?)', [('Array',), ('Graph',)])
+    conn.executemany('INSERT INTO Patterns (name) VALUES (?)', [('Two Pointers',), ('BFS',)])
+    conn.executemany(
+        "INSERT INTO Problems (id, title, difficulty, topic_id, url) VALUES (?, ?, ?, ?, 'https://leetcode.com')",
+        [(1, 'Two Sum', 'Easy', 1), (2, 'Three Sum', 'Medium', 1),
+         (3, 'Number of Islands', 'Medium', 2), (4, 'Word Ladder', 'Hard', 2)]
+    )
+    conn.executemany(
+        'INSERT INTO ProblemPatterns (problem_id, pattern_id) VALUES (?, ?)',
+        [(1, 1), (2, 1), (3, 2), (4, 2)]
+    )
+    conn.execute('INSERT INTO ProblemPrerequisites (problem_id, prerequisite_id) VALUES (2, 1)')
+    conn.executemany('INSERT INTO TopicRatings (topic_id) VALUES (?)', [(1,), (2,)])
+    conn.executemany('INSERT INTO UserProgress VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', PROGRESS)
+    conn.commit()
+    assert migrations.schema_version(conn) == 0
+    conn.close()
+    return path
+
+
+def progress(conn):
+    return [tuple(row) for row in conn.execute('''
+        SELECT problem_id, attempts, successes, hints_used, time_spent, last_attempt, next_due,
+               mastered, current_interval_index
+        FROM UserProgress ORDER BY problem_id
+    ''')]
+
+
+def table_names(conn):
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")}
+
+
+def schema(conn):
+    """
+    Every table with its columns, and every index and trigger with what it covers. Compared as
+    structure rather than SQL text, since columns added by ALTER TABLE print differently.
+    """
+    objects = {}
+    for kind, name, table in conn.execute(
+        "SELECT type, name, tbl_name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"
+    ).fetchall():
+        if kind == 'table':
+            detail = tuple(tuple(row) for row in conn.execute(f'PRAGMA table_xinfo({name})'))
+        elif kind == 'index':
+            detail = (table, tuple(tuple(row) for row in conn.execute(f'PRAGMA index_xinfo({name})')))
+        else:
+            detail = table
+        objects[(kind, name)] = detail
+    return objects
+
+
+def test_open_applies_every_migration_in_order(baseline_db, monkeypatch):
+    seen = []
+
+    def recording(migration):
+        def apply(conn):
+            seen.append((migration.version, migrations.schema_version(conn)))
+            migration.apply(conn)
+        return migration._replace(apply=apply)
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [recording(m) for m in migrations.MIGRATIONS])
+
+    conn = open_connection(baseline_db)
+    try:
+        # Each step runs once, in order, on a database at the previous version.
+        assert seen == [(version, version - 1) for version in range(1, migrations.LATEST_VERSION + 1)]
+        assert migrations.schema_version(conn) == migrations.LATEST_VERSION == 9
+        assert progress(conn) == PROGRESS
+
+        assert {'stability', 'memory_difficulty'} <= {row[1] for row in conn.execute('PRAGMA table_info(UserProgress)')}
+        assert {
+            'DueCounts', 'CatalogMeta', 'idx_userprogress_next_due', 'idx_userprogress_last_attempt',
+            'SchedulingMeta', 'SimilarProblems', 'SimilarBuckets', 'AttemptLog', 'idx_problems_topic_rating',
+            'Weights'
+        } <= table_names(conn)
+        counts = conn.execute('SELECT * FROM DueCounts ORDER BY due_date').fetchall()
+        rebuild_due_histogram(conn)
+        assert conn.execute('SELECT * FROM DueCounts ORDER BY due_date').fetchall() == counts
+        assert conn.execute('SELECT COUNT(*) FROM SimilarProblems').fetchone()[0] > 0
+        # Both topics have recorded attempts, so their seeded ratings moved from the default.
+        ratings = dict(conn.execute('SELECT topic_id, rating FROM TopicRatings').fetchall())
+        assert ratings[1] != 1500.0 and ratings[2] != 1500.0
+
+        assert migrations.migrate(conn) == []
+    finally:
+        conn.close()
+
+
+def test_upgraded_schema_matches_fresh_database(baseline_db, workdir):
+    from db_init import initialize_db
+
+    fresh_path = str(workdir / 'fresh.db')
+    initialize_db(db_path=fresh_path)
+    upgraded = open_connection(baseline_db)
+    fresh = sqlite3.connect(fresh_path)
+    try:
+        assert schema(upgraded) == schema(fresh)
+        assert migrations.schema_version(upgraded) == migrations.schema_version(fresh)
+    finally:
+        upgraded.close()
+        fresh.close()
+
+
+def test_migrate_stops_at_target(baseline_db):
+    conn = sqlite3.connect(baseline_db)
+    try:
+        applied = migrations.migrate(conn, target=3)
+        assert [m.version for m in applied] == [1, 2, 3]
+        assert migrations.schema_version(conn) == 3
+        assert [m.version for m in migrations.migrate(conn)] == list(range(4, migrations.LATEST_VERSION + 1))
+    finally:
+        conn.close()
+
+
+def test_failed_step_rolls_back_and_keeps_version(baseline_db, monkeypatch):
+    def broken(conn):
+        conn.execute('CREATE INDEX idx_userprogress_next_due ON UserProgress(next_due)')
+        conn.execute('UPDATE UserProgress SET attempts = 0')
+        conn.execute('SELECT * FROM NoSuchTable')
+
+    original = list(migrations.MIGRATIONS)
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [
+        m._replace(apply=broken) if m.version == 4 else m for m in original
+    ])
+
+    conn = sqlite3.connect(baseline_db)
+    try:
+        with pytest.raises(MigrationError, match='Migration 4'):
+            migrations.migrate(conn)
+        # Steps 1-3 stay applied; everything step 4 did is undone.
+        assert migrations.schema_version(conn) == 3
+        assert 'DueCounts' in table_names(conn)
+        assert 'idx_userprogress_next_due' not in table_names(conn)
+        assert progress(conn) == PROGRESS
+        assert not conn.in_transaction
+
+        monkeypatch.setattr(migrations, 'MIGRATIONS', original)
+        assert [m.version for m in migrations.migrate(conn)] == list(range(4, migrations.LATEST_VERSION + 1))
+        assert progress(conn) == PROGRESS
+    finally:
+        conn.close()
+
+
+def test_non_sqlite_error_in_step_rolls_back(baseline_db, monkeypatch):
+    def broken(conn):
+        conn.execute('UPDATE UserProgress SET attempts = 0')
+        raise ZeroDivisionError('bad data fix-up')
+
+    monkeypatch.setattr(migrations, 'MIGRATIONS', [
+        m._replace(apply=broken) if m.version == 2 else m for m in migrations.MIGRATIONS
+    ])
+
+    conn = sqlite3.connect(baseline_db)
+    try:
+        with pytest.raises(ZeroDivisionError):
+            migrations.migrate(conn)
+        assert not conn.in_transaction
+        assert migrations.schema_version(conn) == 1
+        assert progress(conn) == PROGRESS
+    finally:
+        conn.close()
@@ -0,0 +1,68 @@
+import datetime
+import os
+
+import pytest
+from click.testing import CliRunner
+
+import cli
+import sql_trace
+from catalog_snapshot import snapshot_path
+from scheduler import ProblemScheduler
+
+TODAY = datetime.date(2025, 1, 1)
+
+
+@pytest.fixture
+def strict_budgets():
+    sql_trace.set_budget_mode('strict')
+    yield
+    sql_trace.set_budget_mode('off')
+    sql_trace.disable()
+
+
+def forget_catalog(db_path):
+    """
+    Remove the catalog snapshot file so the next scheduler rebuilds it: the longest path.
+    """
+    path = snapshot_path(db_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def test_scheduler_methods_within_budget(seeded_db, strict_budgets):
+    forget_catalog(seeded_db)
+    due = ProblemScheduler(current_date=TODAY).get_due_problems()
+    assert len(due) >= 2
+
+    ProblemScheduler(current_date=TODAY).update_progress(due[1].id, False, hints_used=1, time_spent=20)
+    for _ in range(10):
+        forget_catalog(seeded_db)
+        update = ProblemScheduler(current_date=TODAY).update_progress(due[0].id, True, time_spent=10)
+        if update.newly_mastered:
+            break
+    assert update.newly_mastered
+
+
+@pytest.fixture
+def with_progress(seeded_db):
+    scheduler = ProblemScheduler(current_date=TODAY)
+    for problem in scheduler.get_due_problems()[:5]:
+        scheduler.update_progress(problem.id, problem.id % 2 == 0, time_spent=15)
+    forget_catalog(seeded_db)
+    return seeded_db
+
+
+@pytest.mark.parametrize('args, stdin', [
+    (['problem', 'similar', '1'], None),
+    (['problem', 'list', '--pattern', 'Two', '--topic', 'Array'], None),
+    (['list-patterns'], None),
+    (['forecast', '--current-date', TODAY.isoformat()], None),
+    (['next-topics'], '1\n1\n'),
+    (['next-topics'], '2\nEasy\ny\n1\n'),
+    (['view-progress'], None),
+    (['report', '--out', 'report.html'], None),
+])
+def test_read_commands_within_budget(with_progress, strict_budgets, args, stdin):
+    result = CliRunner().invoke(cli.cli, ['--no-cache'] + args, input=stdin)
+    assert result.exception is None, result.output
+    assert result.exit_code == 0
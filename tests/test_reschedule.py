@@ -0,0 +1,173 @@
+import datetime
+import sqlite3
+
+import pytest
+
+import reschedule
+from load_leveling import rebuild_due_histogram
+from reschedule import SchedulingPolicy
+from scheduling_strategies import MemoryModelStrategy
+
+TODAY = datetime.date(2025, 1, 3)
+LAST = '2025-01-01'
+
+OLD = SchedulingPolicy(
+    strategy='ladder',
+    spaced_intervals=(1, 3, 7, 14, 30),
+    mastery_threshold_ratio=0.8,
+    min_attempts_for_mastery=3,
+    desired_retention=0.9,
+    max_interval_days=365
+)
+
+
+@pytest.fixture
+def conn(seeded_db):
+    conn = sqlite3.connect(seeded_db)
+    yield conn
+    conn.close()
+
+
+def seed(conn, rows):
+    """
+    Store progress rows (problem_id, attempts, successes, mastered, interval index, next_due,
+    stability) last attempted on LAST, as computed under OLD.
+    """
+    conn.executemany('''
+        INSERT INTO UserProgress (
+            problem_id, attempts, successes, time_spent, last_attempt, next_due,
+            mastered, current_interval_index, stability
+        ) VALUES (?, ?, ?, 30, ?, ?, ?, ?, ?)
+    ''', [(pid, attempts, successes, LAST, due, mastered, index, stability)
+          for pid, attempts, successes, mastered, index, due, stability in rows])
+    reschedule.record_policy(conn, OLD)
+    conn.commit()
+
+
+def progress(conn):
+    return {
+        row[0]: row[1:] for row in conn.execute(
+            'SELECT problem_id, current_interval_index, next_due, mastered FROM UserProgress'
+        )
+    }
+
+
+# Each old ladder position maps to the longest interval of (1, 7, 30) not exceeding its own:
+# 1 -> 1, 3 -> 1, 7 -> 7, 14 -> 7, 30 -> 30. Due dates move by the difference between the old and
+# new interval, keeping any leveling offset, but never before the day after the last attempt.
+LADDER_ROWS = [
+    (1, 2, 2, 0, 2, '2025-01-08', None),  # 7 -> 7 days: only the index moves
+    (2, 5, 5, 1, 4, '2025-02-02', None),  # 30 -> 30 days, leveled 2 days late: only the index moves
+    (3, 1, 0, 0, 0, '2025-01-02', None),  # 1-day retry after a failure: unchanged
+    (4, 2, 2, 0, 1, '2025-01-04', None),  # 3 -> 1 day: 2 days earlier
+    (5, 4, 4, 1, 3, '2025-01-20', None),  # 14 -> 7 days, leveled 5 days late: 7 days earlier
+    (6, 4, 4, 1, 3, '2025-01-06', None),  # 14 -> 7 days, leveled 9 days early: clamped
+]
+LADDER_EXPECTED = {
+    1: (1, '2025-01-08', 0),
+    2: (2, '2025-02-02', 1),
+    3: (0, '2025-01-02', 0),
+    4: (0, '2025-01-02', 0),
+    5: (1, '2025-01-13', 1),
+    6: (1, '2025-01-02', 1),
+}
+
+
+def test_plan_reports_ladder_change_without_writing(conn):
+    seed(conn, LADDER_ROWS)
+    before = progress(conn)
+    new = OLD._replace(spaced_intervals=(1, 7, 30))
+
+    summary = reschedule.plan(conn, OLD, new, TODAY, sample=10)
+
+    assert summary.rows == 6
+    assert summary.changed == 5
+    assert summary.index_changed == 5
+    assert (summary.due_earlier, summary.due_later) == (3, 0)
+    assert (summary.mastered_gained, summary.mastered_lost) == (0, 0)
+    assert (summary.due_now_before, summary.due_now_after) == (1, 3)
+    assert {change.problem_id for change in summary.samples} == {1, 2, 4, 5, 6}
+    assert progress(conn) == before
+    assert reschedule.stored_policy(conn) == OLD
+
+
+def test_apply_ladder_change(conn):
+    seed(conn, LADDER_ROWS)
+    new = OLD._replace(spaced_intervals=(1, 7, 30))
+
+    summary = reschedule.apply(conn, OLD, new, TODAY)
+
+    assert summary.changed == 5
+    assert progress(conn) == LADDER_EXPECTED
+    assert reschedule.stored_policy(conn) == new
+    # The due-count histogram matches a rebuild, and its update trigger is back.
+    counts = conn.execute('SELECT * FROM DueCounts ORDER BY due_date').fetchall()
+    rebuild_due_histogram(conn)
+    assert conn.execute('SELECT * FROM DueCounts ORDER BY due_date').fetchall() == counts
+    assert conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_due_counts_update'"
+    ).fetchone()
+
+
+def test_threshold_change_recomputes_mastery(conn):
+    seed(conn, [
+        (1, 4, 3, 0, 2, '2025-01-08', None),  # 75%: mastered under the laxer ratio
+        (2, 5, 5, 1, 4, '2025-01-31', None),  # mastered either way
+        (3, 2, 2, 1, 1, '2025-01-04', None),  # too few attempts under the stricter minimum
+        (4, 5, 3, 0, 1, '2025-01-04', None),  # 60%: not mastered either way
+    ])
+    before = progress(conn)
+    new = OLD._replace(mastery_threshold_ratio=0.7, min_attempts_for_mastery=3)
+
+    summary = reschedule.apply(conn, OLD, new, TODAY)
+
+    assert (summary.changed, summary.mastered_gained, summary.mastered_lost) == (2, 1, 1)
+    assert summary.index_changed == 0
+    after = progress(conn)
+    assert {pid: row[2] for pid, row in after.items()} == {1: 1, 2: 1, 3: 0, 4: 0}
+    # Intervals are unchanged, so indexes and due dates are too.
+    assert {pid: row[:2] for pid, row in after.items()} == {pid: row[:2] for pid, row in before.items()}
+
+
+def test_unchanged_thresholds_keep_stored_mastery(conn):
+    # Mastered under an older, laxer policy: kept, since only a failure clears the flag.
+    seed(conn, [(1, 2, 2, 1, 1, '2025-01-04', None)])
+
+    summary = reschedule.apply(conn, OLD, OLD._replace(spaced_intervals=(1, 3, 7, 14, 30, 60)), TODAY)
+
+    assert summary.changed == 0
+    assert progress(conn)[1][2] == 1
+
+
+def test_strategy_change_reschedules_memory_rows_from_last_attempt(conn):
+    seed(conn, [
+        (1, 3, 3, 0, 2, '2025-01-08', 4.0),
+        (2, 6, 6, 1, 4, '2025-01-31', 40.0),
+        (3, 1, 1, 0, 0, '2025-01-02', 0.2),
+        (4, 2, 1, 0, 1, '2025-01-04', None),  # No memory state: keeps its ladder schedule
+    ])
+    new = OLD._replace(strategy='memory', desired_retention=0.85, max_interval_days=20)
+    model = MemoryModelStrategy(new.spaced_intervals, new.desired_retention, new.max_interval_days)
+
+    reschedule.apply(conn, OLD, new, TODAY)
+
+    after = progress(conn)
+    last = datetime.date.fromisoformat(LAST)
+    for pid, stability in ((1, 4.0), (2, 40.0), (3, 0.2)):
+        days = model.interval_days(stability)
+        assert after[pid][:2] == (
+            model.interval_index_for(days), (last + datetime.timedelta(days=days)).isoformat()
+        )
+    assert model.interval_days(40.0) == 20  # Capped by max_interval_days
+    assert after[4] == (1, '2025-01-04', 0)
+
+
+def test_recompute_under_same_policy_changes_nothing(conn):
+    seed(conn, LADDER_ROWS)
+
+    sql, params = reschedule._recompute_sql(OLD, OLD)
+    rows = conn.execute(sql, params).fetchall()
+
+    assert len(rows) == len(LADDER_ROWS)
+    for problem_id, old_mastered, new_mastered, old_index, new_index, old_due, new_due in rows:
+        assert (new_mastered, new_index, new_due) == (old_mastered, old_index, old_due)
@@ -0,0 +1,61 @@
+import datetime
+import sqlite3
+
+import pytest
+from click.testing import CliRunner
+
+import cli
+from scheduler import ProblemScheduler
+
+TODAY = datetime.date(2025, 1, 1)
+
+
+@pytest.fixture
+def capacity(seeded_db, workdir):
+    """
+    Enable the daily review limit, so recorded due dates go through load leveling.
+    """
+    config = workdir / 'config.ini'
+    config.write_text(config.read_text().replace('daily_problems = 0', 'daily_problems = 2'))
+    return seeded_db
+
+
+def next_due(db_path, problem_id):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('SELECT next_due FROM UserProgress WHERE problem_id = ?', (problem_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize('current_date', [TODAY, datetime.datetime(2025, 1, 1)])
+def test_simulated_date_is_a_plain_date(capacity, current_date):
+    scheduler = ProblemScheduler(current_date=current_date)
+    assert type(scheduler.current_date) is datetime.date
+
+    problem = scheduler.get_due_problems()[0]
+    update = scheduler.update_progress(problem.id, True, time_spent=10)
+
+    assert datetime.date.fromisoformat(update.next_due) > TODAY
+    assert next_due(capacity, problem.id) == update.next_due
+
+
+def test_leveling_reads_due_dates_with_a_time_part(capacity):
+    scheduler = ProblemScheduler(current_date=TODAY)
+    with scheduler.get_connection() as conn:
+        assert datetime.date.fromisoformat(scheduler.level_due_date(conn, '2025-01-04T00:00:00', 10)) >= TODAY
+
+
+def test_today_records_attempt_on_simulated_date(capacity):
+    result = CliRunner().invoke(
+        cli.cli, ['today', '--limit', '1', '--current-date', TODAY.isoformat()], input='y\ny\n0\n10\n'
+    )
+
+    assert result.exception is None, result.output
+    conn = sqlite3.connect(capacity)
+    try:
+        rows = conn.execute('SELECT next_due FROM UserProgress').fetchall()
+    finally:
+        conn.close()
+    assert len(rows) == 1
+    assert datetime.date.fromisoformat(rows[0][0]) > TODAY
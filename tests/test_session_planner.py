@@ -0,0 +1,122 @@
+import itertools
+import random
+
+import pytest
+
+import session_planner
+from session_planner import _solve_exact, _solve_greedy, knapsack
+
+
+def brute_force(values, weights, capacity):
+    """
+    Best total value over every subset whose total weight fits.
+    """
+    best = 0.0
+    n = len(values)
+    for size in range(n + 1):
+        for subset in itertools.combinations(range(n), size):
+            if sum(weights[i] for i in subset) <= capacity:
+                best = max(best, sum(values[i] for i in subset))
+    return best
+
+
+def check_feasible(chosen, values, weights, capacity):
+    assert len(set(chosen)) == len(chosen)
+    assert sum(weights[i] for i in chosen) <= capacity
+    assert all(values[i] > 0 for i in chosen)
+
+
+def total(chosen, values):
+    return sum(values[i] for i in chosen)
+
+
+@pytest.mark.parametrize('seed', range(200))
+def test_knapsack_matches_brute_force(seed):
+    rng = random.Random(seed)
+    n = rng.randint(0, 10)
+    values = [rng.choice([rng.uniform(-5, 20), rng.randint(-3, 10), 0.0]) for _ in range(n)]
+    weights = [rng.choice([0, rng.randint(1, 30)]) for _ in range(n)]
+    capacity = rng.randint(0, 60)
+
+    chosen, exact = knapsack(values, weights, capacity)
+
+    assert exact
+    check_feasible(chosen, values, weights, capacity)
+    assert total(chosen, values) == pytest.approx(brute_force(values, weights, capacity))
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_solve_exact_matches_brute_force(seed):
+    rng = random.Random(seed)
+    n = rng.randint(1, 10)
+    values = [rng.uniform(0.1, 20) for _ in range(n)]
+    weights = [rng.randint(1, 15) for _ in range(n)]
+    capacity = rng.randint(1, 40)
+    items = [i for i in range(n) if weights[i] <= capacity]
+
+    chosen = _solve_exact(items, values, weights, capacity) if items else []
+
+    check_feasible(chosen, values, weights, capacity)
+    assert total(chosen, values) == pytest.approx(brute_force(values, weights, capacity))
+
+
+@pytest.mark.parametrize('seed', range(50))
+def test_common_divisor_is_divided_out(seed):
+    rng = random.Random(seed)
+    divisor = rng.choice([5, 15, 20])
+    n = rng.randint(2, 10)
+    values = [rng.uniform(1, 10) for _ in range(n)]
+    weights = [divisor * rng.randint(1, 6) for _ in range(n)]
+    # A budget that is not a multiple of the divisor must round down, never up.
+    capacity = divisor * rng.randint(1, 12) + rng.randint(1, divisor - 1)
+
+    chosen, exact = knapsack(values, weights, capacity)
+
+    assert exact
+    check_feasible(chosen, values, weights, capacity)
+    assert total(chosen, values) == pytest.approx(brute_force(values, weights, capacity))
+
+
+def test_zero_and_negative_values_are_never_chosen():
+    values = [0.0, -1.0, 5.0, -2.5, 3.0]
+    weights = [1, 1, 1, 0, 0]
+
+    chosen, exact = knapsack(values, weights, 10)
+
+    assert exact
+    assert sorted(chosen) == [2, 4]
+
+
+def test_weightless_items_are_always_chosen():
+    values = [1.0, 4.0, 3.0, 2.0]
+    weights = [0, 5, 5, 0]
+
+    chosen, exact = knapsack(values, weights, 5)
+
+    assert exact
+    assert sorted(chosen) == [0, 1, 3]
+
+
+@pytest.mark.parametrize('seed', range(30))
+def test_cell_limit_falls_back_to_approximation(seed, monkeypatch):
+    rng = random.Random(seed)
+    n = 12
+    values = [rng.uniform(1, 20) for _ in range(n)]
+    weights = [rng.randint(1, 13) for _ in range(n)]
+    capacity = 29
+    optimum = brute_force(values, weights, capacity)
+
+    monkeypatch.setattr(session_planner, 'DP_CELL_LIMIT', 3 * (capacity + 1))
+    chosen, exact = knapsack(values, weights, capacity)
+
+    assert not exact
+    check_feasible(chosen, values, weights, capacity)
+    # Never worse than greedy over all items, which is at least half the optimum.
+    items = sorted(
+        (i for i in range(n) if weights[i] <= capacity),
+        key=lambda i: values[i] / weights[i], reverse=True
+    )
+    greedy = _solve_greedy(items, values, weights, capacity)
+    assert total(chosen, values) >= total(greedy, values) - 1e-9
+    assert total(chosen, values) >= optimum / 2
+    assert total(chosen, values) <= optimum + 1e-9